@@ -0,0 +1,90 @@
+# Copyright 2020 Tensorforce Team. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+
+"""
+Micro-benchmark of act, observe and update step times of a DQN agent with XLA-compiled function
+graphs (config jit_compile), compared to the non-compiled function graphs. Each mode runs in a
+separate process, and functions which fall back to the non-compiled graph are logged as warning.
+"""
+
+import argparse
+import multiprocessing
+import time
+
+import numpy as np
+
+
+def run(jit_compile, args):
+    from tensorforce import Agent
+
+    agent = Agent.create(
+        agent='dqn', states=dict(type='float', shape=(args.state_size,)),
+        actions=dict(type='int', shape=(), num_values=4), max_episode_timesteps=args.episode_length,
+        memory=args.capacity, batch_size=args.batch_size,
+        network=dict(type='auto', size=args.network_size, depth=2, rnn=False),
+        config=dict(jit_compile=jit_compile, create_tf_assertions=False)
+    )
+
+    states = np.random.random_sample(size=(args.state_size,))
+
+    def act():
+        agent.act(states=states, independent=True)
+
+    def observe():
+        for timestep in range(args.episode_length):
+            agent.act(states=states)
+            agent.observe(terminal=(timestep == args.episode_length - 1), reward=1.0)
+
+    def update():
+        agent.update()
+
+    # Fill memory
+    while agent.timesteps < args.capacity:
+        observe()
+
+    times = list()
+    for function, num_steps in ((act, 1), (observe, args.episode_length), (update, 1)):
+        function()  # trace and compile
+        start = time.perf_counter()
+        for _ in range(args.repeats):
+            function()
+        times.append((time.perf_counter() - start) / (args.repeats * num_steps))
+
+    agent.close()
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--state-size', type=int, default=64, help="State vector size")
+    parser.add_argument('--network-size', type=int, default=256, help="Dense layer size")
+    parser.add_argument('--capacity', type=int, default=10000, help="Memory capacity")
+    parser.add_argument('--episode-length', type=int, default=100, help="Timesteps per episode")
+    parser.add_argument('--batch-size', type=int, default=64, help="Update batch size")
+    parser.add_argument('--repeats', type=int, default=20, help="Timed calls per measurement")
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context('spawn')
+    print('{:>12} {:>12} {:>18} {:>12}'.format('jit-compile', 'act', 'observe/timestep', 'update'))
+    for jit_compile in (False, True):
+        with context.Pool(processes=1) as pool:
+            times = pool.apply(func=run, args=(jit_compile, args))
+        print('{:>12} {:>10.3f}ms {:>16.3f}ms {:>10.3f}ms'.format(
+            str(jit_compile).lower(), *(t * 1e3 for t in times)
+        ))
+
+
+if __name__ == '__main__':
+    main()
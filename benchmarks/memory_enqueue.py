@@ -0,0 +1,102 @@
+# Copyright 2020 Tensorforce Team. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+
+"""
+Micro-benchmark of memory enqueue cost depending on the number of stored episodes: the circular
+terminal indices buffer only moves its start when episodes are overwritten, compared to the
+previous shift of all remaining terminal indices.
+"""
+
+import argparse
+import time
+
+import tensorflow as tf
+
+from tensorforce import Agent
+from tensorforce.core import TensorDict
+
+
+def shift_terminal_indices(terminal_indices, episode_count, num_episodes):
+    # Previous implementation: shift remaining terminal indices to the front
+    index = episode_count + 1
+    sparse_delta = tf.IndexedSlices(
+        values=terminal_indices[num_episodes: index], indices=tf.range(index - num_episodes)
+    )
+    return terminal_indices.scatter_update(sparse_delta=sparse_delta)
+
+
+def benchmark(function, repeats):
+    function()  # trace
+    start = time.perf_counter()
+    for _ in range(repeats):
+        function()
+    return (time.perf_counter() - start) / repeats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        '--capacities', type=int, nargs='+', default=[1000, 10000, 100000, 1000000],
+        help="Memory capacities, filled with one-timestep episodes"
+    )
+    parser.add_argument('--repeats', type=int, default=100, help="Timed calls per measurement")
+    args = parser.parse_args()
+
+    print('{:>10} {:>10} {:>14} {:>14}'.format('episodes', 'enqueue', 'terminal-shift', 'total'))
+    for capacity in args.capacities:
+        agent = Agent.create(
+            agent='dqn', states=dict(type='float', shape=(4,)),
+            actions=dict(type='int', shape=(), num_values=2), max_episode_timesteps=1000,
+            memory=capacity, batch_size=1,
+            network=dict(type='auto', size=8, depth=1, rnn=False),
+            config=dict(eager_mode=True, create_tf_assertions=False)
+        )
+        memory = agent.model.memory
+        parallel = tf.constant(0, dtype=tf.int64)
+
+        def timesteps(num_timesteps):
+            # Zero-valued one-timestep episodes
+            values = memory.values_spec.fmap(
+                function=(lambda spec: tf.zeros(
+                    shape=((num_timesteps,) + spec.shape), dtype=spec.tf_type()
+                )), cls=TensorDict
+            )
+            values['terminal'] = tf.ones(shape=(num_timesteps,), dtype=tf.int64)
+            return values
+
+        # Fill memory entirely, then every enqueued episode overwrites the oldest episode
+        memory.enqueue(**timesteps(num_timesteps=capacity).to_kwargs(), parallel=parallel)
+        values = timesteps(num_timesteps=1).to_kwargs()
+        t1 = benchmark(
+            function=(lambda: memory.enqueue(**values, parallel=parallel)), repeats=args.repeats
+        )
+
+        # Previous shift on a copy of the terminal indices
+        terminal_indices = tf.Variable(initial_value=memory.terminal_indices.numpy())
+        episode_count = tf.constant(memory.episode_count.numpy(), dtype=tf.int64)
+        one = tf.constant(1, dtype=tf.int64)
+        function = tf.function(func=(lambda: shift_terminal_indices(
+            terminal_indices=terminal_indices, episode_count=episode_count, num_episodes=one
+        )))
+        t2 = benchmark(function=function, repeats=args.repeats)
+
+        print('{:>10} {:>8.3f}ms {:>12.3f}ms {:>12.3f}ms'.format(
+            memory.episode_count.numpy().item(), t1 * 1e3, t2 * 1e3, (t1 + t2) * 1e3
+        ))
+        agent.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,164 @@
+# Copyright 2020 Tensorforce Team. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+
+"""
+Micro-benchmark of memory predecessor/successor index computation: vectorized ranges based on
+episode start indices and terminal indices, compared to the previous per-step `tf.while_loop`.
+"""
+
+import argparse
+import time
+
+import numpy as np
+import tensorflow as tf
+
+from tensorforce import Agent
+from tensorforce.core import TensorDict
+
+
+def loop_predecessors(memory, indices, horizon):
+    # Previous implementation: walk back one timestep per loop iteration
+    capacity = tf.constant(memory.capacity, dtype=tf.int64)
+
+    def body(lengths, predecessor_indices, mask):
+        previous_index = tf.math.mod(predecessor_indices[:, :1] - 1, capacity)
+        predecessor_indices = tf.concat([previous_index, predecessor_indices], axis=1)
+        previous_terminal = memory.gather(name='terminal', indices=previous_index)
+        is_not_terminal = tf.math.logical_and(previous_terminal <= 0, mask[:, :1])
+        mask = tf.concat([is_not_terminal, mask], axis=1)
+        lengths += tf.cast(tf.squeeze(is_not_terminal, axis=1), dtype=tf.int64)
+        return lengths, predecessor_indices, mask
+
+    lengths = tf.ones_like(indices)
+    predecessor_indices = tf.expand_dims(indices, axis=1)
+    mask = tf.ones_like(predecessor_indices, dtype=tf.bool)
+    lengths, predecessor_indices, mask = tf.while_loop(
+        cond=(lambda *args: True), body=body, loop_vars=(lengths, predecessor_indices, mask),
+        shape_invariants=(lengths.get_shape(), tf.TensorShape((None, None)),
+                          tf.TensorShape((None, None))),
+        maximum_iterations=horizon
+    )
+    return lengths, tf.boolean_mask(tf.reshape(predecessor_indices, (-1,)), tf.reshape(mask, (-1,)))
+
+
+def loop_successors(memory, indices, horizon):
+    # Previous implementation: walk forward one timestep per loop iteration
+    capacity = tf.constant(memory.capacity, dtype=tf.int64)
+
+    def body(lengths, successor_indices, mask):
+        current_index = successor_indices[:, -1:]
+        current_terminal = memory.gather(name='terminal', indices=current_index)
+        is_not_terminal = tf.math.logical_and(current_terminal <= 0, mask[:, -1:])
+        next_index = tf.math.mod(current_index + 1, capacity)
+        successor_indices = tf.concat([successor_indices, next_index], axis=1)
+        mask = tf.concat([mask, is_not_terminal], axis=1)
+        lengths += tf.cast(tf.squeeze(is_not_terminal, axis=1), dtype=tf.int64)
+        return lengths, successor_indices, mask
+
+    lengths = tf.ones_like(indices)
+    successor_indices = tf.expand_dims(indices, axis=1)
+    mask = tf.ones_like(successor_indices, dtype=tf.bool)
+    lengths, successor_indices, mask = tf.while_loop(
+        cond=(lambda *args: True), body=body, loop_vars=(lengths, successor_indices, mask),
+        shape_invariants=(lengths.get_shape(), tf.TensorShape((None, None)),
+                          tf.TensorShape((None, None))),
+        maximum_iterations=horizon
+    )
+    return lengths, tf.boolean_mask(tf.reshape(successor_indices, (-1,)), tf.reshape(mask, (-1,)))
+
+
+def ragged_predecessors(memory, indices, horizon):
+    lengths = tf.math.minimum(memory.num_predecessors(indices=indices), horizon) + 1
+    flat = tf.ragged.range(starts=(indices - lengths + 1), limits=(indices + 1)).flat_values
+    return lengths, tf.math.mod(flat, memory.capacity)
+
+
+def ragged_successors(memory, indices, horizon):
+    lengths = tf.math.minimum(memory.num_successors(indices=indices), horizon) + 1
+    flat = tf.ragged.range(starts=indices, limits=(indices + lengths)).flat_values
+    return lengths, tf.math.mod(flat, memory.capacity)
+
+
+def benchmark(function, memory, indices, horizon, repeats):
+    graph_function = tf.function(func=(lambda i, h: function(memory, i, h)))
+    result = graph_function(indices, horizon)  # trace
+    start = time.perf_counter()
+    for _ in range(repeats):
+        graph_function(indices, horizon)
+    return (time.perf_counter() - start) / repeats, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--capacity', type=int, default=100000, help="Memory capacity")
+    parser.add_argument('--episode-length', type=int, default=200, help="Mean episode length")
+    parser.add_argument('--batch-size', type=int, default=64, help="Number of sampled indices")
+    parser.add_argument(
+        '--horizons', type=int, nargs='+', default=[1, 10, 50, 100], help="Horizons"
+    )
+    parser.add_argument('--repeats', type=int, default=100, help="Timed calls per measurement")
+    args = parser.parse_args()
+
+    agent = Agent.create(
+        agent='dqn', states=dict(type='float', shape=(4,)),
+        actions=dict(type='int', shape=(), num_values=2), max_episode_timesteps=1000,
+        memory=args.capacity, batch_size=args.batch_size,
+        network=dict(type='auto', size=8, depth=1, rnn=False), config=dict(eager_mode=True)
+    )
+    memory = agent.model.memory
+
+    # Fill memory with random-length episodes, slightly more than capacity
+    num_timesteps = 0
+    while num_timesteps < args.capacity + args.capacity // 10:
+        length = np.random.randint(1, 2 * args.episode_length)
+        values = memory.values_spec.fmap(
+            function=(lambda spec: tf.zeros(shape=((length,) + spec.shape), dtype=spec.tf_type())),
+            cls=TensorDict
+        )
+        values['terminal'] = tf.concat(
+            values=(values['terminal'][:-1], tf.ones(shape=(1,), dtype=tf.int64)), axis=0
+        )
+        memory.enqueue(**values.to_kwargs(), parallel=tf.constant(0, dtype=tf.int64))
+        num_timesteps += length
+
+    print('capacity={} episode-length~{} batch-size={}'.format(
+        args.capacity, args.episode_length, args.batch_size
+    ))
+    print('{:>8} {:>12} {:>14} {:>12} {:>14} {:>8}'.format(
+        'horizon', 'pred-loop', 'pred-ragged', 'succ-loop', 'succ-ragged', 'equal'
+    ))
+    for horizon in args.horizons:
+        # Sample indices with complete horizon, like Replay.retrieve_timesteps
+        ages = np.random.randint(horizon, args.capacity - horizon, size=(args.batch_size,))
+        indices = tf.constant(
+            (memory.buffer_index.numpy() - 1 - ages) % args.capacity, dtype=tf.int64
+        )
+        h = tf.constant(horizon, dtype=tf.int64)
+        t1, r1 = benchmark(loop_predecessors, memory, indices, h, args.repeats)
+        t2, r2 = benchmark(ragged_predecessors, memory, indices, h, args.repeats)
+        t3, r3 = benchmark(loop_successors, memory, indices, h, args.repeats)
+        t4, r4 = benchmark(ragged_successors, memory, indices, h, args.repeats)
+        equal = all(
+            np.array_equal(x.numpy(), y.numpy()) for x, y in zip(r1 + r3, r2 + r4)
+        )
+        print('{:>8} {:>10.3f}ms {:>12.3f}ms {:>10.3f}ms {:>12.3f}ms {:>8}'.format(
+            horizon, t1 * 1e3, t2 * 1e3, t3 * 1e3, t4 * 1e3, str(equal)
+        ))
+
+    agent.close()
+
+
+if __name__ == '__main__':
+    main()
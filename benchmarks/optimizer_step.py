@@ -0,0 +1,124 @@
+# Copyright 2020 Tensorforce Team. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+
+"""
+Micro-benchmark of agent update time and peak memory for an Atari-size convolutional network: the
+delta-free optimizer step, compared to the previous step which snapshots all variables and
+returns their deltas. Each mode runs in a separate process, so peak memory is measured
+independently (GPU allocator peak if available, otherwise growth of the process peak RSS).
+"""
+
+import argparse
+import multiprocessing
+import resource
+import time
+
+import numpy as np
+
+
+def run(returns_deltas, args):
+    import tensorflow as tf
+
+    from tensorforce import Agent
+    from tensorforce.core.optimizers import Optimizer
+
+    if args.network == 'conv':
+        # Nature DQN network, 1.7M parameters
+        network = [
+            dict(type='conv2d', size=32, window=8, stride=4, padding='valid'),
+            dict(type='conv2d', size=64, window=4, stride=2, padding='valid'),
+            dict(type='conv2d', size=64, window=3, stride=1, padding='valid'),
+            dict(type='flatten'),
+            dict(type='dense', size=512)
+        ]
+    else:
+        # Dense network of similar size, 1.8M parameters
+        network = [dict(type='flatten'), dict(type='dense', size=64)]
+    agent = Agent.create(
+        agent='dqn',
+        states=dict(type='float', shape=(84, 84, 4), min_value=0.0, max_value=1.0),
+        actions=dict(type='int', shape=(), num_values=6), max_episode_timesteps=args.episode_length,
+        memory=args.capacity, batch_size=args.batch_size, network=network,
+        config=dict(eager_mode=True, create_tf_assertions=False)
+    )
+
+    if returns_deltas:
+        # Previous step: every optimizer snapshots variables and returns deltas
+        for module in agent.model.submodules:
+            if isinstance(module, Optimizer):
+                module.returns_deltas = True
+
+    # Fill memory
+    terminal = np.zeros(shape=(args.episode_length,), dtype=np.int64)
+    terminal[-1] = 1
+    for _ in range(args.capacity // args.episode_length):
+        agent.experience(
+            states=np.random.random_sample(size=(args.episode_length, 84, 84, 4)),
+            actions=np.zeros(shape=(args.episode_length,), dtype=np.int64), terminal=terminal,
+            reward=np.zeros(shape=(args.episode_length,))
+        )
+
+    num_bytes = sum(
+        variable.shape.num_elements() * variable.dtype.size
+        for variable in agent.model.trainable_variables
+    )
+
+    agent.update()  # trace
+    gpus = tf.config.list_physical_devices('GPU')
+    if len(gpus) > 0:
+        tf.config.experimental.reset_memory_stats(device='GPU:0')
+    else:
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    start = time.perf_counter()
+    for _ in range(args.repeats):
+        agent.update()
+    step_time = (time.perf_counter() - start) / args.repeats
+
+    if len(gpus) > 0:
+        peak = tf.config.experimental.get_memory_info(device='GPU:0')['peak']
+    else:
+        # ru_maxrss in kilobytes on Linux
+        peak = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss) * 1024
+
+    agent.close()
+    return num_bytes, step_time, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        '--network', choices=('conv', 'dense'), default='conv',
+        help="Nature DQN network, or dense network of similar size"
+    )
+    parser.add_argument('--capacity', type=int, default=1000, help="Memory capacity")
+    parser.add_argument('--episode-length', type=int, default=100, help="Timesteps per episode")
+    parser.add_argument('--batch-size', type=int, default=32, help="Update batch size")
+    parser.add_argument('--repeats', type=int, default=20, help="Timed updates per measurement")
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context('spawn')
+    print('{:>8} {:>12} {:>12} {:>14}'.format('step', 'variables', 'update', 'peak-memory'))
+    for returns_deltas in (True, False):
+        with context.Pool(processes=1) as pool:
+            num_bytes, step_time, peak = pool.apply(func=run, args=(returns_deltas, args))
+        print('{:>8} {:>10.1f}MB {:>10.1f}ms {:>12.1f}MB'.format(
+            ('deltas' if returns_deltas else 'no-delta'), num_bytes / 2 ** 20, step_time * 1e3,
+            peak / 2 ** 20
+        ))
+
+
+if __name__ == '__main__':
+    main()
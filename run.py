@@ -72,7 +72,8 @@ def main():
     # Parallel execution arguments
     parser.add_argument(
         '--num-parallel', type=int, default=None,
-        help='Number of environment instances to execute in parallel'
+        help='Number of environment instances to execute in parallel, or to host in case of '
+             'socket-server remote mode'
     )
     parser.add_argument(
         '--batch-agent-calls', action='store_true',
@@ -87,7 +88,8 @@ def main():
         help='Synchronize parallel environment execution on episode-level'
     )
     parser.add_argument(
-        '--remote', type=str, choices=('multiprocessing', 'socket-client', 'socket-server'),
+        '--remote', type=str,
+        choices=('multiprocessing', 'shared-memory', 'socket-client', 'socket-server'),
         default=None, help='Communication mode for remote environment execution of parallelized'
                            'environment execution'
     )
@@ -171,7 +173,7 @@ def main():
     if args.remote == 'socket-server':
         Environment.create(
             environment=environment, max_episode_timesteps=args.max_episode_timesteps,
-            remote=args.remote, port=args.port
+            remote=args.remote, port=args.port, num_instances=args.num_parallel
         )
         return
 
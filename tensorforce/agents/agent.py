@@ -24,6 +24,7 @@ import tensorflow as tf
 
 from tensorforce import util, TensorforceError
 from tensorforce.agents import Recorder
+from tensorforce.agents.learner import AsyncLearner
 import tensorforce.agents
 from tensorforce.core import ArrayDict, TensorDict, TensorSpec, TensorforceConfig
 
@@ -276,6 +277,19 @@ class Agent(Recorder):
         self.terminal_buffer = [list() for _ in range(self.parallel_interactions)]
         self.reward_buffer = [list() for _ in range(self.parallel_interactions)]
 
+        # Asynchronous learner, lock held while acting, and lock held while accessing memory or
+        # saving/restoring
+        if self.config.async_update is False:
+            self.learner = None
+            self.policy_lock = util.NullContext()
+            self.memory_lock = util.NullContext()
+        else:
+            self.learner = AsyncLearner(
+                model=self.model, max_policy_lag=int(self.config.async_update)
+            )
+            self.policy_lock = self.learner.lock
+            self.memory_lock = self.learner.memory_lock
+
         # Store agent spec as JSON
         if self.model.saver is not None:
             path = os.path.join(self.model.saver_directory, self.model.saver_filename + '.json')
@@ -309,6 +323,9 @@ class Agent(Recorder):
         Closes the agent.
         """
         super().close()
+        if self.learner is not None:
+            self.learner.close()
+            self.learner = None
         self.model.close()
         del self.model
 
@@ -326,13 +343,15 @@ class Agent(Recorder):
             buffer.clear()
 
         # Reset model
-        timesteps, episodes, updates = self.model.reset()
+        with self.memory_lock:
+            timesteps, episodes, updates = self.model.reset()
         self.timesteps = timesteps.numpy().item()
         self.episodes = episodes.numpy().item()
         self.updates = updates.numpy().item()
 
         if self.model.saver is not None:
-            self.model.save()
+            with self.memory_lock:
+                self.model.save()
 
     def initial_internals(self):
         """
@@ -439,32 +458,33 @@ class Agent(Recorder):
             )
 
         # Model.act()
-        if not independent:
-            actions, timesteps = self.model.act(
-                states=states, auxiliaries=auxiliaries, parallel=parallel
-            )
-            self.timesteps = timesteps.numpy().item()
-
-        elif len(self.internals_spec) > 0:
-            if len(self.auxiliaries_spec) > 0:
-                actions, internals = self.model.independent_act(
-                    states=states, internals=internals, auxiliaries=auxiliaries,
-                    deterministic=deterministic
-                )
-            else:
-                assert len(auxiliaries) == 0
-                actions, internals = self.model.independent_act(
-                    states=states, internals=internals, deterministic=deterministic
+        with self.policy_lock:
+            if not independent:
+                actions, timesteps = self.model.act(
+                    states=states, auxiliaries=auxiliaries, parallel=parallel
                 )
+                self.timesteps = timesteps.numpy().item()
+
+            elif len(self.internals_spec) > 0:
+                if len(self.auxiliaries_spec) > 0:
+                    actions, internals = self.model.independent_act(
+                        states=states, internals=internals, auxiliaries=auxiliaries,
+                        deterministic=deterministic
+                    )
+                else:
+                    assert len(auxiliaries) == 0
+                    actions, internals = self.model.independent_act(
+                        states=states, internals=internals, deterministic=deterministic
+                    )
 
-        else:
-            if len(self.auxiliaries_spec) > 0:
-                actions = self.model.independent_act(
-                    states=states, auxiliaries=auxiliaries, deterministic=deterministic
-                )
             else:
-                assert len(auxiliaries) == 0
-                actions = self.model.independent_act(states=states, deterministic=deterministic)
+                if len(self.auxiliaries_spec) > 0:
+                    actions = self.model.independent_act(
+                        states=states, auxiliaries=auxiliaries, deterministic=deterministic
+                    )
+                else:
+                    assert len(auxiliaries) == 0
+                    actions = self.model.independent_act(states=states, deterministic=deterministic)
 
         # Outputs from tensors
         actions = self.actions_spec.from_tensor(
@@ -476,10 +496,190 @@ class Agent(Recorder):
             )
 
         if self.model.saver is not None:
-            self.model.save()
+            with self.memory_lock:
+                self.model.save()
 
         return actions, internals
 
+    def make_act_fn(self, batched=True, independent=False, deterministic=False):
+        """
+        Returns a fast act function for latency-sensitive serving, which skips the generic input
+        processing and validation of `act()`: specifications are checked once when creating the
+        function, and each call converts the given NumPy arrays directly to tensors in a fixed
+        layout and calls the traced TensorFlow act function of the model.
+
+        Inputs are not validated, so they have to comply with the states specification. Default
+        action masks are created once per batch size and cached.
+
+        Args:
+            batched (bool): Whether inputs and outputs have a leading batch dimension
+                (<span style="color:#00C000"><b>default</b></span>: true).
+            independent (bool): Whether act is not part of the main agent-environment interaction,
+                and calls are thus not followed by observe(); only supported for agents without
+                internal states
+                (<span style="color:#00C000"><b>default</b></span>: false).
+            deterministic (bool): Whether action should be chosen deterministically, so no
+                sampling and no exploration, only valid in independent mode
+                (<span style="color:#00C000"><b>default</b></span>: false).
+
+        Returns:
+            callable[(states, parallel) -> actions]: Act function taking the state as NumPy array,
+            or a dictionary of NumPy arrays with flattened "name/subname" keys which may include
+            action masks as "[ACTION-NAME]_mask", plus the parallel execution indices as int
+            array or int if not batched (default: 0 to batch size - 1), unless independent mode;
+            returns the action as NumPy array, or a dictionary of NumPy arrays.
+        """
+        if not independent and deterministic:
+            raise TensorforceError.invalid(
+                name='Agent.make_act_fn', argument='deterministic', condition='independent is false'
+            )
+        if independent and len(self.internals_spec) > 0:
+            raise TensorforceError.invalid(
+                name='Agent.make_act_fn', argument='independent',
+                condition='agent with internal states'
+            )
+        if not independent and self.recorder is not None:
+            raise TensorforceError.invalid(
+                name='Agent.make_act_fn', argument='independent', condition='recorder specified'
+            )
+
+        # Traced function graph and argument structure, determined via placeholder tensors
+        if independent:
+            model_function = self.model.__class__.independent_act
+        else:
+            model_function = self.model.__class__.act
+        function_graph, input_signature, output_signature = model_function.concrete_function(
+            self.model
+        )
+
+        inputs = list()
+
+        def function(name, spec):
+            tensor = tf.zeros(shape=((1,) + spec.shape), dtype=spec.tf_type())
+            inputs.append((tensor, 'state', ('state' if name is None else name), spec))
+            return tensor
+
+        kwargs = OrderedDict(
+            states=self.states_spec.fmap(function=function, cls=TensorDict, with_names=True)
+        )
+
+        def function(name, spec):
+            auxiliary = TensorDict()
+            if self.config.enable_int_action_masking and spec.type == 'int' and \
+                    spec.num_values is not None:
+                if name is None:
+                    name = 'action'
+                # Mask, either part of states or default all true
+                spec = TensorSpec(type='bool', shape=(spec.shape + (spec.num_values,)))
+                auxiliary['mask'] = tf.zeros(shape=((1,) + spec.shape), dtype=spec.tf_type())
+                inputs.append((auxiliary['mask'], 'mask', name + '_mask', spec))
+            return auxiliary
+
+        if not independent or len(self.auxiliaries_spec) > 0:
+            kwargs['auxiliaries'] = self.actions_spec.fmap(
+                function=function, cls=TensorDict, with_names=True
+            )
+        if independent:
+            kwargs['deterministic'] = self.deterministic_spec.to_tensor(
+                value=deterministic, batched=False, name='Agent.make_act_fn deterministic'
+            )
+        else:
+            kwargs['parallel'] = tf.zeros(shape=(1,), dtype=self.parallel_spec.tf_type())
+            inputs.append((kwargs['parallel'], 'parallel', None, self.parallel_spec))
+
+        structure = input_signature.kwargs_to_args(
+            kwargs=kwargs, to_dict=independent, outer_tuple=True
+        )
+        leaves = tf.nest.flatten(structure)
+        layout = [
+            next(((kind, name, spec) for x, kind, name, spec in inputs if x is leaf), (
+                'constant', leaf, None
+            )) for leaf in leaves
+        ]
+        default_masks = dict()
+        default_parallel = dict()
+        output_names = list()
+
+        def act_fn(states, parallel=None):
+            if not isinstance(states, dict):
+                states = dict(state=states)
+            if batched:
+                batch_size = next(iter(states.values())).shape[0]
+            else:
+                batch_size = 1
+                states = {name: np.expand_dims(x, axis=0) for name, x in states.items()}
+
+            # Arguments in fixed layout
+            args = list()
+            for kind, name, spec in layout:
+                if kind == 'state':
+                    args.append(tf.convert_to_tensor(
+                        np.asarray(states[name], dtype=spec.np_type())
+                    ))
+                elif kind == 'mask':
+                    if name in states:
+                        args.append(tf.convert_to_tensor(
+                            np.asarray(states[name], dtype=spec.np_type())
+                        ))
+                    else:
+                        key = (name, batch_size)
+                        if key not in default_masks:
+                            default_masks[key] = tf.ones(
+                                shape=((batch_size,) + spec.shape), dtype=spec.tf_type()
+                            )
+                        args.append(default_masks[key])
+                elif kind == 'parallel':
+                    if parallel is None:
+                        if batch_size not in default_parallel:
+                            default_parallel[batch_size] = np.arange(
+                                batch_size, dtype=spec.np_type()
+                            )
+                        parallel = default_parallel[batch_size]
+                    else:
+                        parallel = np.asarray(parallel, dtype=spec.np_type()).reshape(-1)
+                    if not self.timestep_completed[parallel].all():
+                        raise TensorforceError(
+                            message="Calling agent.act must be preceded by agent.observe."
+                        )
+                    self.timestep_completed[parallel] = False
+                    args.append(tf.convert_to_tensor(parallel))
+                else:
+                    args.append(name)
+
+            # Function graph
+            with self.policy_lock:
+                outputs = function_graph(*tf.nest.pack_sequence_as(structure, args))
+
+            # Output names in fixed layout, determined once
+            leaves = tf.nest.flatten(outputs)
+            if len(output_names) == 0:
+                actions = output_signature.args_to_kwargs(
+                    args=outputs, outer_tuple=True, from_dict=independent
+                )
+                if not independent:
+                    actions = actions[0]
+                for name, x in actions.items():
+                    output_names.append(
+                        (name, next(n for n, leaf in enumerate(leaves) if leaf is x))
+                    )
+            if not independent:
+                self.timesteps = leaves[-1].numpy().item()
+
+            if self.model.saver is not None:
+                with self.memory_lock:
+                    self.model.save()
+
+            if batched:
+                actions = {name: leaves[n].numpy() for name, n in output_names}
+            else:
+                actions = {name: leaves[n].numpy()[0] for name, n in output_names}
+            if self.actions_spec.is_singleton():
+                return actions[None]
+            else:
+                return ArrayDict(actions).to_dict()
+
+        return act_fn
+
     def observe(self, reward=0.0, terminal=False, parallel=0):
         """
         Observes reward and whether a terminal state is reached, needs to be preceded by `act()`.
@@ -536,15 +736,21 @@ class Agent(Recorder):
             )
 
             # Model.observe()
-            updated, episodes, updates = self.model.observe(
-                terminal=terminal_tensor, reward=reward_tensor, parallel=parallel_tensor
-            )
+            with self.memory_lock:
+                updated, episodes, updates = self.model.observe(
+                    terminal=terminal_tensor, reward=reward_tensor, parallel=parallel_tensor
+                )
             num_updates += int(updated.numpy().item())
             self.episodes = episodes.numpy().item()
             self.updates = updates.numpy().item()
 
+            # Asynchronous update
+            if self.learner is not None and updated.numpy().item():
+                self.learner.trigger()
+
         if self.model.saver is not None:
-            self.model.save()
+            with self.memory_lock:
+                self.model.save()
 
         return num_updates
 
@@ -575,8 +781,15 @@ class Agent(Recorder):
         # for parallel in range(self.parallel_interactions):
         #     if self.buffer_indices[parallel] > 0:
         #         self.model_observe(parallel=parallel)
+        # Complete asynchronous updates before saving
+        if self.learner is not None:
+            self.learner.flush()
+
         os.makedirs(directory, exist_ok=True)
-        path = self.model.save(directory=directory, filename=filename, format=format, append=append)
+        with self.memory_lock:
+            path = self.model.save(
+                directory=directory, filename=filename, format=format, append=append
+            )
 
         if filename is None:
             filename = self.model.name
@@ -698,9 +911,10 @@ class Agent(Recorder):
                 if latest is not None:
                     filename = filename + '-' + str(latest)
 
-        self.timesteps, self.episodes, self.updates = self.model.restore(
-            directory=directory, filename=filename, format=format
-        )
+        with self.memory_lock:
+            self.timesteps, self.episodes, self.updates = self.model.restore(
+                directory=directory, filename=filename, format=format
+            )
 
     # def get_variables(self):
     #     """
@@ -58,8 +58,9 @@ class DeterministicPolicyGradient(TensorforceAgent):
             (<span style="color:#00C000"><b>default</b></span>: not given, better implicitly
             specified via `environment` argument for `Agent.create(...)`).
 
-        memory (int > 0): Replay memory capacity, has to fit at least maximum batch_size + maximum
-            network/estimator horizon + 1 timesteps
+        memory (int > 0 | specification): Replay memory capacity, has to fit at least maximum
+            batch_size + maximum network/estimator horizon + 1 timesteps, or replay memory
+            specification, e.g. `dict(type='prioritized_replay', capacity=...)`
             (<span style="color:#C00000"><b>required</b></span>).
         batch_size (<a href="../modules/parameters.html">parameter</a>, int > 0): Number of
             timesteps per update batch
@@ -186,7 +187,8 @@ class DeterministicPolicyGradient(TensorforceAgent):
             use_beta_distribution=use_beta_distribution
         )
 
-        memory = dict(type='replay', capacity=memory)
+        if not isinstance(memory, dict):
+            memory = dict(type='replay', capacity=memory)
 
         update = dict(unit='timesteps', batch_size=batch_size)
         if update_frequency != 'batch_size':
@@ -0,0 +1,121 @@
+# Copyright 2020 Tensorforce Team. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+
+from threading import Condition, Lock, Thread
+
+
+class AsyncLearner(object):
+    """
+    Performs agent updates on a background learner thread, so that `observe()` only adds
+    experience to the memory and triggers updates, instead of blocking the act/observe loop for
+    the entire optimization.
+
+    The model acts based on a copy of the policy, which is synchronized after each update while
+    holding `lock`. Acting holds the same lock, so it always uses the weights of a completed
+    update, and is only blocked while the weights are copied.
+
+    Updates hold `memory_lock`, which is also held by the agent while adding experience to the
+    memory, resetting, saving and restoring, so the memory and saved variables are never accessed
+    concurrently. Consequently, `observe()` calls which add experience block while an update is
+    in progress, whereas acting and environment interaction overlap with the update.
+
+    Args:
+        model (TensorforceModel): Agent model
+            (<span style="color:#C00000"><b>required</b></span>).
+        max_policy_lag (int > 0): Maximum number of triggered updates which are not yet completed,
+            and thus missing in the acting policy, before `trigger()` blocks
+            (<span style="color:#00C000"><b>default</b></span>: 1).
+    """
+
+    def __init__(self, model, max_policy_lag=1):
+        self.model = model
+        self.max_policy_lag = max_policy_lag
+
+        self.lock = Lock()
+        self.memory_lock = Lock()
+        self.condition = Condition()
+        self.num_pending = 0
+        self.is_closed = False
+        self.exception = None
+        self.thread = Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def trigger(self):
+        """
+        Triggers an update, blocks if the maximum policy lag is reached.
+        """
+        self.check()
+        with self.condition:
+            while self.num_pending >= self.max_policy_lag and self.exception is None:
+                self.condition.wait()
+            if self.exception is None:
+                self.num_pending += 1
+                self.condition.notify_all()
+        self.check()
+
+    def flush(self):
+        """
+        Blocks until all triggered updates are completed.
+        """
+        with self.condition:
+            while self.num_pending > 0 and self.exception is None:
+                self.condition.wait()
+        self.check()
+
+    def close(self):
+        """
+        Completes all triggered updates and stops the learner thread.
+        """
+        if self.thread is not None:
+            with self.condition:
+                self.is_closed = True
+                self.condition.notify_all()
+            self.thread.join()
+            self.thread = None
+        self.check()
+
+    def check(self):
+        if self.exception is not None:
+            exception = self.exception
+            self.exception = None
+            raise exception
+
+    def run(self):
+        while True:
+            with self.condition:
+                while self.num_pending == 0 and not self.is_closed:
+                    self.condition.wait()
+                if self.num_pending == 0:
+                    break
+
+            error = None
+            try:
+                with self.memory_lock:
+                    self.model.update()
+                with self.lock:
+                    self.model.synchronize_acting_policy()
+            except BaseException as exception:
+                error = exception
+
+            # Pending count only accessed while holding the condition
+            with self.condition:
+                if error is None:
+                    self.num_pending -= 1
+                else:
+                    # Raised on the acting thread by the next trigger/flush/close call, remaining
+                    # triggered updates are discarded
+                    self.exception = error
+                    self.num_pending = 0
+                self.condition.notify_all()
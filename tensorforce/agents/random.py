@@ -97,8 +97,11 @@ class RandomAgent(Agent):
             traces (<span style="color:#00C000"><b>default</b></span>: every episode).</li>
             <li><b>start</b> (<i>int >= 0</i>) &ndash; how many episodes to skip before starting to
             record traces (<span style="color:#00C000"><b>default</b></span>: 0).</li>
-            <li><b>max-traces</b> (<i>int > 0</i>) &ndash; maximum number of traces to keep
-            (<span style="color:#00C000"><b>default</b></span>: all).</li>
+            <li><b>format</b> (<i>"npz" | "hdf5"</i>) &ndash; traces file format, either one
+            npz file per trace or a single chunked HDF5 file
+            (<span style="color:#00C000"><b>default</b></span>: "npz").</li>
+            <li><b>max-traces</b> (<i>int > 0</i>) &ndash; maximum number of traces to keep, only
+            valid for npz format (<span style="color:#00C000"><b>default</b></span>: all).</li>
     """
 
     def __init__(
@@ -13,12 +13,12 @@
 # limitations under the License.
 # ==============================================================================
 
-import os
 from collections import OrderedDict
 
 import numpy as np
 
 from tensorforce import TensorforceError, util
+from tensorforce.agents.traces import TraceWriter
 from tensorforce.core import ArrayDict, ListDict, TensorSpec, TensorsSpec
 
 
@@ -83,10 +83,12 @@ class Recorder(object):
             recorder = dict(directory=recorder)
         if recorder is None:
             pass
-        elif not all(key in ('directory', 'frequency', 'max-traces', 'start') for key in recorder):
+        elif not all(
+            key in ('directory', 'format', 'frequency', 'max-traces', 'start') for key in recorder
+        ):
             raise TensorforceError.value(
                 name='Agent', argument='recorder values', value=list(recorder),
-                hint='not from {directory,frequency,max-traces,start}'
+                hint='not from {directory,format,frequency,max-traces,start}'
             )
         self.recorder = recorder if recorder is None else dict(recorder)
 
@@ -110,15 +112,25 @@ class Recorder(object):
         if self.recorder is not None:
             self.num_episodes = 0
 
-            self.buffers = ListDict()
-            self.buffers['terminal'] = [list() for _ in range(self.parallel_interactions)]
-            self.buffers['reward'] = [list() for _ in range(self.parallel_interactions)]
+            # Preallocated per-parallel buffers, grown on demand
+            capacity = 64
+            if self.max_episode_timesteps is not None:
+                capacity = min(capacity, self.max_episode_timesteps + 1)
 
             def function(spec):
-                return [list() for _ in range(self.parallel_interactions)]
+                return np.zeros(
+                    shape=((self.parallel_interactions, capacity) + spec.shape),
+                    dtype=spec.np_type()
+                )
 
-            self.buffers['states'] = self.states_spec.fmap(function=function, cls=ListDict)
-            self.buffers['actions'] = self.actions_spec.fmap(function=function, cls=ListDict)
+            self.buffers = ArrayDict()
+            self.buffers['states'] = self.states_spec.fmap(function=function, cls=ArrayDict)
+            self.buffers['actions'] = self.actions_spec.fmap(function=function, cls=ArrayDict)
+            self.buffers['terminal'] = function(self.terminal_spec)
+            self.buffers['reward'] = function(self.reward_spec)
+            self.buffer_index = np.zeros(
+                shape=(self.parallel_interactions,), dtype=util.np_dtype(dtype='int')
+            )
 
             function = (lambda x: list())
 
@@ -128,8 +140,15 @@ class Recorder(object):
             self.recorded['terminal'] = list()
             self.recorded['reward'] = list()
 
+            # Traces are written on a background thread
+            self.trace_writer = TraceWriter(
+                directory=self.recorder['directory'], format=self.recorder.get('format', 'npz'),
+                max_traces=self.recorder.get('max-traces')
+            )
+
     def close(self):
-        pass
+        if self.recorder is not None and self.is_initialized:
+            self.trace_writer.close()
 
     def reset(self):
         # Reset timestep check
@@ -138,12 +157,9 @@ class Recorder(object):
 
         # Reset buffers
         if self.recorder is not None:
-            for buffer in self.buffers.values():
-                for x in buffer:
-                    x.clear()
-            if self.recorder is not None:
-                for x in self.recorded.values():
-                    x.clear()
+            self.buffer_index[:] = 0
+            for x in self.recorded.values():
+                x.clear()
 
     def initial_internals(self):
         return OrderedDict()
@@ -255,9 +271,11 @@ class Recorder(object):
         # Buffer inputs for recording
         if self.recorder is not None and not independent and \
                 self.num_episodes >= self.recorder.get('start', 0):
-            for n in range(num_parallel):
-                for name in self.states_spec:
-                    self.buffers['states'][name][parallel[n]].append(states[name][n])
+            index = self.buffer_index[parallel]
+            if index.max() >= self.buffers['terminal'].shape[1]:
+                self._grow_buffers(capacity=(index.max() + 1))
+            for name, buffer in self.buffers['states'].items():
+                buffer[parallel, index] = states[name]
 
         # fn_act()
         if self._is_agent:
@@ -281,12 +299,18 @@ class Recorder(object):
         # Buffer outputs for recording
         if self.recorder is not None and not independent and \
                 self.num_episodes >= self.recorder.get('start', 0):
-            for n in range(num_parallel):
-                for name in self.actions_spec:
-                    self.buffers['actions'][name][parallel[n]].append(actions[name][n])
+            index = self.buffer_index[parallel]
+            for name, buffer in self.buffers['actions'].items():
+                buffer[parallel, index] = actions[name]
 
         # Unbatch actions
-        if batched:
+        if batched and input_type is np.ndarray:
+            # If inputs were stacked arrays, return stacked arrays
+            actions = actions.to_dict()
+            if independent and not is_internals_none:
+                internals = internals.to_dict()
+
+        elif batched:
             # If inputs were batched, turn list of dicts into dict of lists
             function = (lambda x: x.item() if x.shape == () else x)
             # TODO: recursive
@@ -323,7 +347,7 @@ class Recorder(object):
 
     def observe(self, reward=0.0, terminal=False, parallel=0):
         # Check whether inputs are batched
-        if util.is_iterable(x=reward):
+        if util.is_iterable(x=reward) or (isinstance(reward, np.ndarray) and reward.ndim == 1):
             reward = np.asarray(reward)
             num_parallel = reward.shape[0]
             if terminal is False:
@@ -336,8 +360,9 @@ class Recorder(object):
             else:
                 parallel = np.asarray(parallel)
 
-        elif util.is_iterable(x=terminal):
-            terminal = np.asarray([int(t) for t in terminal])
+        elif util.is_iterable(x=terminal) or \
+                (isinstance(terminal, np.ndarray) and terminal.ndim == 1):
+            terminal = np.asarray(terminal).astype(util.np_dtype(dtype='int'))
             num_parallel = terminal.shape[0]
             if reward == 0.0:
                 reward = np.asarray([0.0 for _ in range(num_parallel)])
@@ -412,65 +437,37 @@ class Recorder(object):
                     self.num_episodes += 1
 
         else:
-            # Store values per parallel interaction
-            for p, t, r in zip(parallel.tolist(), terminal.tolist(), reward.tolist()):
-
-                # Buffer inputs
-                self.buffers['terminal'][p].append(t)
-                self.buffers['reward'][p].append(r)
-
-                # Continue if not terminal
-                if t == 0:
-                    continue
+            # Buffer inputs
+            index = self.buffer_index[parallel]
+            self.buffers['terminal'][parallel, index] = terminal
+            self.buffers['reward'][parallel, index] = reward
+            self.buffer_index[parallel] += 1
+
+            # Store values of completed episodes per parallel interaction
+            for p in parallel[terminal > 0].tolist():
                 self.num_episodes += 1
 
-                # Buffered terminal/reward inputs
-                for name in self.states_spec:
-                    self.recorded['states'][name].append(
-                        np.stack(self.buffers['states'][name][p], axis=0)
-                    )
-                    self.buffers['states'][name][p].clear()
-                for name, spec in self.actions_spec.items():
-                    self.recorded['actions'][name].append(
-                        np.stack(self.buffers['actions'][name][p], axis=0)
-                    )
-                    self.buffers['actions'][name][p].clear()
-                self.recorded['terminal'].append(
-                    np.array(self.buffers['terminal'][p], dtype=self.terminal_spec.np_type())
-                )
-                self.buffers['terminal'][p].clear()
-                self.recorded['reward'].append(
-                    np.array(self.buffers['reward'][p], dtype=self.reward_spec.np_type())
-                )
-                self.buffers['reward'][p].clear()
+                # Copy buffered episode, since buffers are reused
+                length = self.buffer_index[p]
+                self.buffer_index[p] = 0
+                function = (lambda x: x[p, :length].copy())
+                for name, buffer in self.buffers['states'].items():
+                    self.recorded['states'][name].append(function(buffer))
+                for name, buffer in self.buffers['actions'].items():
+                    self.recorded['actions'][name].append(function(buffer))
+                self.recorded['terminal'].append(function(self.buffers['terminal']))
+                self.recorded['reward'].append(function(self.buffers['reward']))
 
                 # Check whether recording step
                 if (self.num_episodes - self.recorder.get('start', 0)) \
                         % self.recorder.get('frequency', 1) != 0:
                     continue
 
-                # Manage recorder directory
-                directory = self.recorder['directory']
-                if os.path.isdir(directory):
-                    files = sorted(
-                        f for f in os.listdir(directory)
-                        if os.path.isfile(os.path.join(directory, f))
-                        and os.path.splitext(f)[1] == '.npz'
-                    )
-                else:
-                    os.makedirs(directory)
-                    files = list()
-                max_traces = self.recorder.get('max-traces')
-                if max_traces is not None and len(files) > max_traces - 1:
-                    for filename in files[:-max_traces + 1]:
-                        filename = os.path.join(directory, filename)
-                        os.remove(filename)
-
-                # Write recording file
-                filename = os.path.join(directory, 'trace-{:09d}.npz'.format(self.num_episodes - 1))
-                # time.strftime('%Y%m%d-%H%M%S')
-                kwargs = self.recorded.fmap(function=np.concatenate, cls=ArrayDict).items()
-                np.savez_compressed(file=filename, **dict(kwargs))
+                # Write recorded values on background thread
+                self.trace_writer.write(
+                    index=(self.num_episodes - 1),
+                    trace=self.recorded.fmap(function=list, cls=ListDict)
+                )
 
                 # Clear recorded values
                 for recorded in self.recorded.values():
@@ -481,6 +478,23 @@ class Recorder(object):
         else:
             return 0
 
+    def _grow_buffers(self, capacity):
+        # Double recorder buffer capacity until sufficient
+        new_capacity = self.buffers['terminal'].shape[1]
+        while new_capacity < capacity:
+            new_capacity *= 2
+        if self.max_episode_timesteps is not None:
+            new_capacity = max(min(new_capacity, self.max_episode_timesteps + 1), capacity)
+
+        def function(buffer):
+            grown = np.zeros(
+                shape=((buffer.shape[0], new_capacity) + buffer.shape[2:]), dtype=buffer.dtype
+            )
+            grown[:, :buffer.shape[1]] = buffer
+            return grown
+
+        self.buffers = self.buffers.fmap(function=function)
+
     def _process_states_input(self, states, function_name):
         if self.states_spec.is_singleton() and not isinstance(states, dict) and not (
             util.is_iterable(x=states) and isinstance(states[0], dict)
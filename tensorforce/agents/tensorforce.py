@@ -15,12 +15,12 @@
 
 from collections import OrderedDict
 import os
-from random import shuffle
 
 import numpy as np
 
 from tensorforce import TensorforceError, util
 from tensorforce.agents import Agent
+from tensorforce.agents.traces import TraceDataset
 from tensorforce.core import ArrayDict
 from tensorforce.core.models import TensorforceModel
 
@@ -198,6 +198,19 @@ class TensorforceAgent(Agent):
             reduce calls to TensorFlow for improved performance
             (<span style="color:#00C000"><b>default</b></span>: configuration-specific maximum
             number which can be buffered without affecting performance).</li>
+            <li><b>precompute_bootstrap</b> (<i>bool</i>) &ndash; Whether to store the number of
+            timesteps until the bootstrapped horizon value in memory when timesteps are added,
+            instead of looking up memory successors for every sampled timestep on each update
+            (only applies to "late" horizon value prediction with a non-episode horizon, as used by
+            DQN-style agents, and if the baseline does not depend on previous states)
+            (<span style="color:#00C000"><b>default</b></span>: false).</li>
+            <li><b>async_update</b> (<i>false | int > 0</i>) &ndash; Whether to perform updates
+            asynchronously on a background learner thread instead of as part of `observe()`, with
+            acting based on a copy of the policy which is synchronized after each update, and if
+            so, the maximum number of triggered updates the acting policy may lag behind before
+            `observe()` blocks (adding experience to the memory and saving wait for an update in
+            progress)
+            (<span style="color:#00C000"><b>default</b></span>: false).</li>
             <li><b>enable_int_action_masking</b> (<i>bool</i>) &ndash; Whether int action options
             can be masked via an optional "[ACTION-NAME]_mask" state input
             (<span style="color:#00C000"><b>default</b></span>: true).</li>
@@ -207,6 +220,18 @@ class TensorforceAgent(Agent):
             <li><b>eager_mode</b> (<i>bool</i>) &ndash; Whether to run functions eagerly instead of
             running as a traced graph function, can be helpful for debugging
             (<span style="color:#00C000"><b>default</b></span>: false).</li>
+            <li><b>jit_compile</b> (<i>bool | "act" | "observe" | "update" | iter[string]</i>)
+            &ndash; Whether to XLA-compile the graph functions of the given families, where
+            "observe" includes updates triggered by observe, functions with operations not
+            supported by XLA fall back to the non-compiled graph on their first call, and
+            TensorFlow assertions are not checked in compiled functions (ignored in eager mode)
+            (<span style="color:#00C000"><b>default</b></span>: false).</li>
+            <li><b>mixed_precision</b> (<i>false | "bfloat16" | "float16"</i>) &ndash; Whether
+            dense, convolution and RNN layers compute in the given type, with float32 variables
+            as master weights and float32 layer outputs, so distributions, losses and reward
+            estimation remain float32; "float16" additionally applies dynamic loss scaling in
+            TensorFlow optimizers
+            (<span style="color:#00C000"><b>default</b></span>: false).</li>
             <li><b>tf_log_level</b> (<i>int >= 0</i>) &ndash; TensorFlow log level, additional C++
             logging messages can be enabled by setting os.environ["TF_CPP_MIN_LOG_LEVEL"] = "1"/"2"
             before importing Tensorforce/TensorFlow
@@ -230,6 +255,12 @@ class TensorforceAgent(Agent):
             <li><b>max_hour_frequency</b> (<i>int > 0</i>) &ndash; ignoring max-checkpoints,
             definitely keep a checkpoint in given hour frequency
             (<span style="color:#00C000"><b>default</b></span>: none).</li>
+            <li><b>memory</b> (<i>"checkpoint" | "incremental"</i>) &ndash; whether the memory is
+            part of checkpoints, or excluded and instead saved as append-only log of the memory
+            slots written since the previous save, in a subdirectory of the checkpoint directory
+            (also applies to agent.save() and agent.restore() with formats other than
+            "saved-model"; restore replays the latest log, independent of the checkpoint)
+            (<span style="color:#00C000"><b>default</b></span>: checkpoint).</li>
             </ul>
         summarizer (path | specification): TensorBoard summaries directory, or summarizer
             configuration with the following attributes
@@ -282,8 +313,11 @@ class TensorforceAgent(Agent):
             traces (<span style="color:#00C000"><b>default</b></span>: every episode).</li>
             <li><b>start</b> (<i>int >= 0</i>) &ndash; how many episodes to skip before starting to
             record traces (<span style="color:#00C000"><b>default</b></span>: 0).</li>
-            <li><b>max-traces</b> (<i>int > 0</i>) &ndash; maximum number of traces to keep
-            (<span style="color:#00C000"><b>default</b></span>: all).</li>
+            <li><b>format</b> (<i>"npz" | "hdf5"</i>) &ndash; traces file format, either one
+            npz file per trace or a single chunked HDF5 file
+            (<span style="color:#00C000"><b>default</b></span>: "npz").</li>
+            <li><b>max-traces</b> (<i>int > 0</i>) &ndash; maximum number of traces to keep, only
+            valid for npz format (<span style="color:#00C000"><b>default</b></span>: all).</li>
     """
 
     def __init__(
@@ -624,15 +658,17 @@ class TensorforceAgent(Agent):
             )
 
             # Model.experience()
-            timesteps, episodes = self.model.experience(
-                states=states_batch, internals=internals_batch, auxiliaries=auxiliaries_batch,
-                actions=actions_batch, terminal=terminal_batch, reward=reward_batch
-            )
+            with self.memory_lock:
+                timesteps, episodes = self.model.experience(
+                    states=states_batch, internals=internals_batch, auxiliaries=auxiliaries_batch,
+                    actions=actions_batch, terminal=terminal_batch, reward=reward_batch
+                )
             self.timesteps = timesteps.numpy().item()
             self.episodes = episodes.numpy().item()
 
         if self.model.saver is not None:
-            self.model.save()
+            with self.memory_lock:
+                self.model.save()
 
     def update(self, query=None, **kwargs):
         """
@@ -642,22 +678,37 @@ class TensorforceAgent(Agent):
         for an example application as part of the act-experience-update interface, which is an
         alternative to the act-observe interaction pattern.
         """
-        updates = self.model.update()
-        self.updates = updates.numpy().item()
+        if self.learner is None:
+            updates = self.model.update()
+            self.updates = updates.numpy().item()
+
+        else:
+            # Performed by asynchronous learner
+            self.learner.trigger()
+            self.learner.flush()
+            self.updates = self.model.updates.numpy().item()
 
         if self.model.saver is not None:
-            self.model.save()
+            with self.memory_lock:
+                self.model.save()
 
-    def pretrain(self, directory, num_iterations, num_traces=1, num_updates=1, extension='.npz'):
+    def pretrain(
+        self, directory, num_iterations, num_traces=1, num_updates=1, extension='.npz',
+        num_episodes=None, prefetch=2, cache_directory=None
+    ):
         """
         Simple pretraining approach as a combination of `experience()` and `update`, akin to
         behavioral cloning, using experience traces obtained e.g. via recording agent interactions
         ([see documentation](https://tensorforce.readthedocs.io/en/latest/basics/features.html#record-pretrain)).
 
-        For the given number of iterations, load the given number of trace files (which each contain
-        recorder[frequency] episodes), feed the experience to the agent's internal memory, and
-        subsequently trigger the given number of updates (which will use the experience in the
-        internal memory, fed in this or potentially previous iterations).
+        For the given number of iterations, load the given number of traces (which each contain
+        recorder[frequency] episodes) or episodes, feed the experience to the agent's internal
+        memory, and subsequently trigger the given number of updates (which will use the experience
+        in the internal memory, fed in this or potentially previous iterations).
+
+        Traces are served by a memory-mapped `TraceDataset`, which on first use converts the traces
+        into uncompressed shards plus an index in a cache directory, and gathers the next batches
+        on a background thread while the agent is updated.
 
         See the [record-and-pretrain script](https://github.com/tensorforce/tensorforce/blob/master/examples/record_and_pretrain.py)
         for an example application.
@@ -674,36 +725,31 @@ class TensorforceAgent(Agent):
                 (<span style="color:#00C000"><b>default</b></span>: 1).
             num_updates (int > 0): Number of updates per iteration
                 (<span style="color:#00C000"><b>default</b></span>: 1).
-            extension (str): Traces file extension to filter the given directory for
+            extension (str): Traces file extension to filter the given directory for, unless the
+                directory contains a "traces.h5" file written by the recorder with format "hdf5"
                 (<span style="color:#00C000"><b>default</b></span>: ".npz").
+            num_episodes (int > 0): Number of episodes to load per iteration instead of traces
+                (<span style="color:#00C000"><b>default</b></span>: traces).
+            prefetch (int > 0): Number of iterations for which traces are loaded in advance
+                (<span style="color:#00C000"><b>default</b></span>: 2).
+            cache_directory (path): Directory for the converted traces
+                (<span style="color:#00C000"><b>default</b></span>: subdirectory per traces
+                directory in the user cache directory, see `TraceDataset`).
         """
         if not os.path.isdir(directory):
             raise TensorforceError.value(
                 name='agent.pretrain', argument='directory', value=directory
             )
-        files = sorted(
-            os.path.join(directory, f) for f in os.listdir(directory)
-            if os.path.isfile(os.path.join(directory, f)) and os.path.splitext(f)[1] == extension
+        dataset = TraceDataset(
+            directory=directory, extension=extension, cache_directory=cache_directory
         )
-        indices = list(range(len(files)))
-
-        for _ in range(num_iterations):
-            shuffle(indices)
-            if num_traces is None:
-                selection = indices
-            else:
-                selection = indices[:num_traces]
-
-            batch = None
-            for index in selection:
-                trace = ArrayDict(np.load(files[index]))
-                if batch is None:
-                    batch = trace
-                else:
-                    batch = batch.fmap(
-                        function=(lambda x, y: np.concatenate([x, y], axis=0)), zip_values=(trace,)
-                    )
+        if num_episodes is not None:
+            num_traces = None
 
+        for batch in dataset.batches(
+            num_batches=num_iterations, num_traces=num_traces, num_episodes=num_episodes,
+            prefetch=prefetch
+        ):
             for name, value in batch.pop('auxiliaries', dict()).items():
                 assert name.endswith('/mask')
                 batch['states'][name[:-5] + '_mask'] = value
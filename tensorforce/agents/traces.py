@@ -0,0 +1,454 @@
+# Copyright 2020 Tensorforce Team. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+
+from collections import deque
+import hashlib
+import os
+from queue import Empty, Full, Queue
+from threading import Event, Thread
+
+import h5py
+import numpy as np
+
+from tensorforce import TensorforceError
+from tensorforce.core import ArrayDict
+
+
+class TraceWriter(object):
+    """
+    Writes recorded experience traces on a background thread, so that concatenation, compression
+    and file I/O do not block the act/observe loop.
+
+    Traces are either written as one compressed `trace-XXXXXXXXX.npz` file per trace, or appended
+    to a single chunked HDF5 file `traces.h5` with one extensible dataset per value, plus a
+    `trace-index` dataset containing (trace id, timestep offset, number of timesteps) per trace.
+    For the npz format, the retained trace files are tracked in an index which is initialized
+    once from the directory, instead of rescanning the directory for every trace.
+
+    Args:
+        directory (path): Traces directory
+            (<span style="color:#C00000"><b>required</b></span>).
+        format ("npz" | "hdf5"): Traces file format
+            (<span style="color:#00C000"><b>default</b></span>: "npz").
+        max_traces (int > 0): Maximum number of traces to keep, only valid for npz format
+            (<span style="color:#00C000"><b>default</b></span>: all).
+        max_queue_size (int > 0): Maximum number of traces queued for writing, before `write()`
+            blocks
+            (<span style="color:#00C000"><b>default</b></span>: 8).
+    """
+
+    HDF5_FILENAME = 'traces.h5'
+
+    HDF5_INDEX = 'trace-index'
+
+    def __init__(self, directory, format='npz', max_traces=None, max_queue_size=8):
+        if format not in ('npz', 'hdf5'):
+            raise TensorforceError.value(
+                name='recorder', argument='format', value=format, hint='not in {npz,hdf5}'
+            )
+        if max_traces is not None:
+            if format != 'npz':
+                raise TensorforceError.invalid(
+                    name='recorder', argument='max-traces', condition='format is not npz'
+                )
+            if not isinstance(max_traces, int) or max_traces <= 0:
+                raise TensorforceError.value(
+                    name='recorder', argument='max-traces', value=max_traces, hint='<= 0'
+                )
+
+        self.directory = directory
+        self.format = format
+        self.max_traces = max_traces
+        os.makedirs(self.directory, exist_ok=True)
+
+        if self.format == 'npz':
+            self.files = deque(sorted(
+                f for f in os.listdir(self.directory)
+                if os.path.isfile(os.path.join(self.directory, f))
+                and os.path.splitext(f)[1] == '.npz'
+            ))
+        else:
+            self.filehandle = None
+
+        self.exception = None
+        self.queue = Queue(maxsize=max_queue_size)
+        self.thread = Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def write(self, index, trace):
+        """
+        Queues a trace for writing, blocks if the queue is full.
+
+        Args:
+            index (int): Trace id, usually the episode index of the last episode in the trace
+                (<span style="color:#C00000"><b>required</b></span>).
+            trace (ListDict[list[array]]): Per-episode arrays of the trace, which are concatenated
+                on the writer thread
+                (<span style="color:#C00000"><b>required</b></span>).
+        """
+        self.check()
+        self.queue.put((index, trace))
+
+    def flush(self):
+        """
+        Blocks until all queued traces are written.
+        """
+        self.queue.join()
+        self.check()
+
+    def close(self):
+        """
+        Writes all queued traces and stops the writer thread.
+        """
+        if self.thread is not None:
+            self.queue.put(None)
+            self.thread.join()
+            self.thread = None
+        self.check()
+
+    def check(self):
+        if self.exception is not None:
+            exception = self.exception
+            self.exception = None
+            raise exception
+
+    def run(self):
+        while True:
+            item = self.queue.get()
+            try:
+                if item is None:
+                    break
+                index, trace = item
+                trace = trace.fmap(function=np.concatenate, cls=ArrayDict)
+                if self.format == 'npz':
+                    self.write_npz(index=index, trace=trace)
+                else:
+                    self.write_hdf5(index=index, trace=trace)
+            except BaseException as exception:
+                # Raised on the acting thread by the next write/flush/close call
+                self.exception = exception
+            finally:
+                self.queue.task_done()
+
+        if self.format == 'hdf5' and self.filehandle is not None:
+            self.filehandle.close()
+            self.filehandle = None
+
+    def write_npz(self, index, trace):
+        filename = 'trace-{:09d}.npz'.format(index)
+        np.savez_compressed(file=os.path.join(self.directory, filename), **dict(trace.items()))
+        self.files.append(filename)
+
+        if self.max_traces is not None:
+            while len(self.files) > self.max_traces:
+                os.remove(os.path.join(self.directory, self.files.popleft()))
+
+    def write_hdf5(self, index, trace):
+        if self.filehandle is None:
+            self.filehandle = h5py.File(
+                name=os.path.join(self.directory, self.__class__.HDF5_FILENAME), mode='a'
+            )
+        filehandle = self.filehandle
+
+        if self.__class__.HDF5_INDEX not in filehandle:
+            filehandle.create_dataset(
+                name=self.__class__.HDF5_INDEX, shape=(0, 3), maxshape=(None, 3), dtype='i8',
+                chunks=(1024, 3)
+            )
+        trace_index = filehandle[self.__class__.HDF5_INDEX]
+        if trace_index.shape[0] > 0:
+            _, offset, num_timesteps = trace_index[-1]
+            offset += num_timesteps
+        else:
+            offset = 0
+        num_timesteps = trace['terminal'].shape[0]
+
+        for name, value in trace.items():
+            if name in filehandle:
+                dataset = filehandle[name]
+                if dataset.shape[0] != offset:
+                    raise TensorforceError.unexpected()
+                dataset.resize(offset + num_timesteps, axis=0)
+                dataset[offset:] = value
+            else:
+                if offset != 0:
+                    raise TensorforceError.value(
+                        name='recorder', argument='trace value', value=name,
+                        hint='not in existing traces'
+                    )
+                filehandle.create_dataset(
+                    name=name, data=value, maxshape=((None,) + value.shape[1:]), chunks=True,
+                    compression='gzip'
+                )
+
+        trace_index.resize(trace_index.shape[0] + 1, axis=0)
+        trace_index[-1] = (index, offset, num_timesteps)
+        filehandle.flush()
+
+
+class TraceDataset(object):
+    """
+    Memory-mapped dataset of recorded experience traces, serving shuffled batches of traces or
+    episodes without loading and concatenating all traces in memory.
+
+    On first use, the traces in the given directory, either `trace-XXXXXXXXX.npz` files or the
+    recorder `traces.h5` file, are converted once into uncompressed `.npy` shards per value, plus
+    an index of timestep offsets per trace and per episode, in the cache directory. The cache is
+    rebuilt if the traces in the directory change. Batches are gathered from the
+    memory-mapped shards on a background thread, so disk I/O overlaps with agent updates.
+
+    Args:
+        directory (path): Traces directory
+            (<span style="color:#C00000"><b>required</b></span>).
+        extension (str): Traces file extension to filter the given directory for, unless the
+            directory contains a "traces.h5" file
+            (<span style="color:#00C000"><b>default</b></span>: ".npz").
+        cache_directory (path): Directory for the converted shards and index
+            (<span style="color:#00C000"><b>default</b></span>: subdirectory per traces directory
+            in the user cache directory "$XDG_CACHE_HOME/tensorforce/trace-dataset", by default
+            "~/.cache/tensorforce/trace-dataset").
+    """
+
+    INDEX_FILENAME = 'index.npz'
+
+    def __init__(self, directory, extension='.npz', cache_directory=None):
+        if not os.path.isdir(directory):
+            raise TensorforceError.value(
+                name='TraceDataset', argument='directory', value=directory
+            )
+        self.directory = directory
+        self.extension = extension
+        if cache_directory is None:
+            # Traces directory is left unmodified
+            cache_home = os.environ.get('XDG_CACHE_HOME') or \
+                os.path.join(os.path.expanduser('~'), '.cache')
+            key = hashlib.sha1(os.path.abspath(directory).encode()).hexdigest()[:16]
+            cache_directory = os.path.join(cache_home, 'tensorforce', 'trace-dataset', key)
+        self.cache_directory = cache_directory
+
+        signature = self.signature()
+        if len(signature) == 0:
+            raise TensorforceError.value(
+                name='TraceDataset', argument='directory', value=directory, hint='no traces'
+            )
+        index = self.load_index(signature=signature)
+        if index is None:
+            self.build(signature=signature)
+            index = self.load_index(signature=signature)
+        self.names, self.traces, self.episodes = index
+
+        self.values = [
+            np.load(self.shard_filename(n), mmap_mode='r') for n in range(len(self.names))
+        ]
+
+    def signature(self):
+        filename = os.path.join(self.directory, TraceWriter.HDF5_FILENAME)
+        if os.path.isfile(filename):
+            self.files = [filename]
+        else:
+            self.files = sorted(
+                os.path.join(self.directory, f) for f in os.listdir(self.directory)
+                if os.path.isfile(os.path.join(self.directory, f))
+                and os.path.splitext(f)[1] == self.extension
+            )
+        return np.asarray([
+            '{}:{}'.format(os.path.basename(f), os.path.getsize(f)) for f in self.files
+        ])
+
+    def shard_filename(self, index):
+        return os.path.join(self.cache_directory, 'value-{:03d}.npy'.format(index))
+
+    def load_index(self, signature):
+        filename = os.path.join(self.cache_directory, self.__class__.INDEX_FILENAME)
+        if not os.path.isfile(filename):
+            return None
+        with np.load(filename) as index:
+            if index['signature'].shape != signature.shape or \
+                    not (index['signature'] == signature).all():
+                return None
+            return index['names'].tolist(), index['traces'], index['episodes']
+
+    def read_traces(self):
+        # Yields (name, array) lists per trace
+        if len(self.files) == 1 and os.path.basename(self.files[0]) == TraceWriter.HDF5_FILENAME:
+            with h5py.File(name=self.files[0], mode='r') as filehandle:
+                names = list()
+
+                def collect_name(name, value):
+                    if isinstance(value, h5py.Dataset) and name != TraceWriter.HDF5_INDEX:
+                        names.append(name)
+
+                filehandle.visititems(collect_name)
+                for _, offset, num_timesteps in filehandle[TraceWriter.HDF5_INDEX][:]:
+                    yield [
+                        (name, filehandle[name][offset: offset + num_timesteps])
+                        for name in names
+                    ]
+
+        else:
+            for filename in self.files:
+                with np.load(filename) as trace:
+                    yield [(name, trace[name]) for name in sorted(trace.files)]
+
+    def build(self, signature):
+        os.makedirs(self.cache_directory, exist_ok=True)
+
+        # First pass: trace lengths and value specifications, without keeping traces in memory
+        names = None
+        specs = None
+        lengths = list()
+        for trace in self.read_traces():
+            if names is None:
+                names = [name for name, _ in trace]
+                specs = [(value.shape[1:], value.dtype) for _, value in trace]
+            elif [name for name, _ in trace] != names:
+                raise TensorforceError.value(
+                    name='TraceDataset', argument='trace values', value=[n for n, _ in trace],
+                    hint='inconsistent with first trace'
+                )
+            lengths.append(dict(trace)['terminal'].shape[0])
+        offsets = np.cumsum([0] + lengths)
+
+        # Second pass: write values into uncompressed shards, and index episode boundaries
+        shards = [
+            np.lib.format.open_memmap(
+                filename=self.shard_filename(n), mode='w+', dtype=dtype,
+                shape=((int(offsets[-1]),) + shape)
+            ) for n, (shape, dtype) in enumerate(specs)
+        ]
+        episodes = list()
+        for offset, trace in zip(offsets, self.read_traces()):
+            for shard, (name, value) in zip(shards, trace):
+                shard[offset: offset + value.shape[0]] = value
+                if name == 'terminal':
+                    ends = np.nonzero(value)[0] + 1
+                    if ends.shape[0] == 0 or ends[-1] != value.shape[0]:
+                        ends = np.append(ends, value.shape[0])
+                    starts = np.concatenate([[0], ends[:-1]])
+                    episodes.extend(zip(offset + starts, ends - starts))
+        for shard in shards:
+            shard.flush()
+        del shards
+
+        # Index is written last, so an interrupted build is rebuilt next time
+        filename = os.path.join(self.cache_directory, self.__class__.INDEX_FILENAME)
+        with open(filename + '.tmp', 'wb') as filehandle:
+            np.savez(
+                filehandle, signature=signature, names=np.asarray(names),
+                traces=np.stack([offsets[:-1], np.asarray(lengths)], axis=1).astype(np.int64),
+                episodes=np.asarray(episodes, dtype=np.int64).reshape(-1, 2)
+            )
+        os.replace(filename + '.tmp', filename)
+
+    @property
+    def num_traces(self):
+        return self.traces.shape[0]
+
+    @property
+    def num_episodes(self):
+        return self.episodes.shape[0]
+
+    def gather(self, ranges):
+        """
+        Gathers the given timestep ranges from the memory-mapped values.
+
+        Args:
+            ranges (int array[n, 2]): Timestep offset and length per range
+                (<span style="color:#C00000"><b>required</b></span>).
+
+        Returns:
+            ArrayDict: Concatenated values.
+        """
+        batch = ArrayDict()
+        for name, value in zip(self.names, self.values):
+            batch[name] = np.concatenate(
+                [value[offset: offset + length] for offset, length in ranges], axis=0
+            )
+        return batch
+
+    def batches(self, num_batches, num_traces=None, num_episodes=None, prefetch=2):
+        """
+        Yields batches of shuffled traces or episodes, gathered on a background thread. Every
+        trace/episode is served once per pass over the dataset, in a new random order each pass.
+
+        Args:
+            num_batches (int > 0): Number of batches
+                (<span style="color:#C00000"><b>required</b></span>).
+            num_traces (int > 0): Number of traces per batch, or all traces
+                (<span style="color:#00C000"><b>default</b></span>: all, unless num_episodes).
+            num_episodes (int > 0): Number of episodes per batch instead of traces
+                (<span style="color:#00C000"><b>default</b></span>: traces).
+            prefetch (int > 0): Number of batches gathered in advance
+                (<span style="color:#00C000"><b>default</b></span>: 2).
+
+        Returns:
+            iter[ArrayDict]: Batches.
+        """
+        if num_traces is not None and num_episodes is not None:
+            raise TensorforceError.invalid(
+                name='TraceDataset.batches', argument='num_traces', condition='num_episodes given'
+            )
+        elif num_episodes is not None:
+            ranges = self.episodes
+            batch_size = min(num_episodes, ranges.shape[0])
+        elif num_traces is not None:
+            ranges = self.traces
+            batch_size = min(num_traces, ranges.shape[0])
+        else:
+            ranges = self.traces
+            batch_size = ranges.shape[0]
+
+        queue = Queue(maxsize=prefetch)
+        stop = Event()
+
+        def produce():
+            try:
+                permutation = np.zeros(shape=(0,), dtype=np.int64)
+                for _ in range(num_batches):
+                    if permutation.shape[0] < batch_size:
+                        permutation = np.concatenate([
+                            permutation, np.random.permutation(ranges.shape[0])
+                        ])
+                    # Sorted selection for sequential reads from the memory-mapped shards
+                    selection = np.sort(permutation[:batch_size])
+                    permutation = permutation[batch_size:]
+                    item = (True, self.gather(ranges=ranges[selection]))
+                    while not stop.is_set():
+                        try:
+                            queue.put(item, timeout=0.1)
+                            break
+                        except Full:
+                            pass
+                    if stop.is_set():
+                        return
+            except BaseException as exception:
+                queue.put((False, exception))
+
+        thread = Thread(target=produce, daemon=True)
+        thread.start()
+        try:
+            for _ in range(num_batches):
+                success, batch = queue.get()
+                if not success:
+                    raise batch
+                yield batch
+        finally:
+            stop.set()
+            try:
+                while True:
+                    queue.get_nowait()
+            except Empty:
+                pass
+            thread.join()
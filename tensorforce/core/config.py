@@ -20,16 +20,23 @@ class TensorforceConfig(object):
 
     def __init__(
         self, *,
+        async_update=False,
         buffer_observe=False,
         create_debug_assertions=False,
         create_tf_assertions=True,
         device=None,
         eager_mode=False,
         enable_int_action_masking=True,
+        jit_compile=False,
+        mixed_precision=False,
         name='agent',
+        precompute_bootstrap=False,
         seed=None,
         tf_log_level=40
     ):
+        assert async_update is False or isinstance(async_update, int) and async_update >= 1
+        super().__setattr__('async_update', async_update)
+
         assert buffer_observe is False or buffer_observe == 'episode' or \
             isinstance(buffer_observe, int) and buffer_observe >= 1
         if buffer_observe is False:
@@ -48,12 +55,29 @@ class TensorforceConfig(object):
         assert isinstance(enable_int_action_masking, bool)
         super().__setattr__('enable_int_action_masking', enable_int_action_masking)
 
+        if jit_compile is False:
+            jit_compile = frozenset()
+        elif jit_compile is True:
+            jit_compile = frozenset(('act', 'observe', 'update'))
+        elif isinstance(jit_compile, str):
+            jit_compile = frozenset((jit_compile,))
+        else:
+            jit_compile = frozenset(jit_compile)
+        assert jit_compile <= {'act', 'observe', 'update'}
+        super().__setattr__('jit_compile', jit_compile)
+
+        assert mixed_precision is False or mixed_precision in ('bfloat16', 'float16')
+        super().__setattr__('mixed_precision', mixed_precision)
+
         assert device is None or isinstance(device, str)  # more specific?
         super().__setattr__('device', device)
 
         assert isinstance(name, str)
         super().__setattr__('name', name)
 
+        assert isinstance(precompute_bootstrap, bool)
+        super().__setattr__('precompute_bootstrap', precompute_bootstrap)
+
         assert seed is None or isinstance(seed, int)
         super().__setattr__('seed', seed)
 
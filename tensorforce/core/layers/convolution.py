@@ -112,8 +112,8 @@ class Conv1d(TransformationBase):
     @tf_function(num_args=1)
     def apply(self, *, x):
         x = tf.nn.conv1d(
-            input=x, filters=self.weights, stride=self.stride, padding=self.padding.upper(),
-            dilations=self.dilation
+            input=self.compute_cast(x=x), filters=self.compute_cast(x=self.weights),
+            stride=self.stride, padding=self.padding.upper(), dilations=self.dilation
         )
 
         return super().apply(x=x)
@@ -233,8 +233,8 @@ class Conv2d(TransformationBase):
     @tf_function(num_args=1)
     def apply(self, *, x):
         x = tf.nn.conv2d(
-            input=x, filters=self.weights, strides=self.stride, padding=self.padding.upper(),
-            dilations=self.dilation
+            input=self.compute_cast(x=x), filters=self.compute_cast(x=self.weights),
+            strides=self.stride, padding=self.padding.upper(), dilations=self.dilation
         )
 
         return super().apply(x=x)
@@ -345,8 +345,9 @@ class Conv1dTranspose(TransformationBase):
             tf_util.constant(value=self.output_shape, dtype='int')
         ], axis=0)
         x = tf.nn.conv1d_transpose(
-            input=x, filters=self.weights, output_shape=tf_util.int32(x=output_shape),
-            strides=self.stride, padding=self.padding.upper(), dilations=self.dilation
+            input=self.compute_cast(x=x), filters=self.compute_cast(x=self.weights),
+            output_shape=tf_util.int32(x=output_shape), strides=self.stride,
+            padding=self.padding.upper(), dilations=self.dilation
         )
 
         return super().apply(x=x)
@@ -493,8 +494,9 @@ class Conv2dTranspose(TransformationBase):
             tf_util.constant(value=self.output_shape, dtype='int')
         ], axis=0)
         x = tf.nn.conv2d_transpose(
-            input=x, filters=self.weights, output_shape=tf_util.int32(x=output_shape),
-            strides=self.stride, padding=self.padding.upper(), dilations=self.dilation
+            input=self.compute_cast(x=x), filters=self.compute_cast(x=self.weights),
+            output_shape=tf_util.int32(x=output_shape), strides=self.stride,
+            padding=self.padding.upper(), dilations=self.dilation
         )
 
         return super().apply(x=x)
@@ -89,6 +89,6 @@ class Dense(TransformationBase):
 
     @tf_function(num_args=1)
     def apply(self, *, x):
-        x = tf.matmul(a=x, b=self.weights)
+        x = tf.matmul(a=self.compute_cast(x=x), b=self.compute_cast(x=self.weights))
 
         return super().apply(x=x)
@@ -699,6 +699,12 @@ class TransformationBase(Layer):
 
         self.vars_trainable = vars_trainable
 
+        # Mixed-precision compute type, variables remain float32 master weights
+        if self.config.mixed_precision is False:
+            self.compute_dtype = None
+        else:
+            self.compute_dtype = tf.dtypes.as_dtype(self.config.mixed_precision)
+
     def initialize(self):
         super().initialize()
 
@@ -716,8 +722,18 @@ class TransformationBase(Layer):
         else:
             self.bias = None
 
+    def compute_cast(self, *, x):
+        # Cast to mixed-precision compute type, if specified
+        if self.compute_dtype is None:
+            return x
+        else:
+            return tf.cast(x=x, dtype=self.compute_dtype)
+
     @tf_function(num_args=1)
     def apply(self, *, x):
+        # Back from mixed-precision compute type
+        x = tf_util.cast(x=x, dtype='float')
+
         if self.bias is not None:
             x = tf.nn.bias_add(value=x, bias=self.bias)
 
@@ -66,6 +66,10 @@ class Rnn(TemporalLayer, TransformationBase):
             l2_regularization=l2_regularization, name=name, input_spec=input_spec
         )
 
+        if self.compute_dtype is not None:
+            # Keras mixed-precision policy: float32 variables, computation in compute type
+            kwargs['dtype'] = 'mixed_' + self.compute_dtype.name
+
         self.cell_type = cell
         if self.cell_type == 'gru':
             self.cell = tf.keras.layers.GRUCell(
@@ -146,8 +150,13 @@ class Rnn(TemporalLayer, TransformationBase):
 
     @tf_function(num_args=2)
     def iterative_apply(self, *, x, internals):
-        x = tf_util.float32(x=x)
-        state = tf_util.float32(x=internals['state'])
+        if self.compute_dtype is None:
+            x = tf_util.float32(x=x)
+            state = tf_util.float32(x=internals['state'])
+        else:
+            # Keras only casts the inputs, not the states
+            x = self.compute_cast(x=x)
+            state = self.compute_cast(x=internals['state'])
 
         if self.cell_type == 'gru':
             state = (state,)
@@ -16,12 +16,22 @@
 from tensorforce.core.memories.memory import Memory
 from tensorforce.core.memories.queue import Queue
 
-# from tensorforce.core.memories.prioritized_replay import PrioritizedReplay
+from tensorforce.core.memories.prioritized_replay import PrioritizedReplay
 from tensorforce.core.memories.recent import Recent
 from tensorforce.core.memories.replay import Replay
 
+from tensorforce.core.memories.sharded_replay import ShardedReplay
 
-memory_modules = dict(default=Replay, recent=Recent, replay=Replay)
+from tensorforce.core.memories.tiered_replay import TieredReplay
 
 
-__all__ = ['Memory', 'memory_modules', 'Queue', 'Recent', 'Replay']
+memory_modules = dict(
+    default=Replay, prioritized_replay=PrioritizedReplay, recent=Recent, replay=Replay,
+    sharded_replay=ShardedReplay, tiered_replay=TieredReplay
+)
+
+
+__all__ = [
+    'Memory', 'memory_modules', 'PrioritizedReplay', 'Queue', 'Recent', 'Replay',
+    'ShardedReplay', 'TieredReplay'
+]
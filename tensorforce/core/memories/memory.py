@@ -40,7 +40,10 @@ class Memory(Module):
 
     def input_signature(self, *, function):
         if function == 'enqueue':
-            return self.values_spec.signature(batched=True)
+            signature = self.values_spec.signature(batched=True)
+            # Parallel interaction of timesteps, or -1 if not from a parallel interaction
+            signature['parallel'] = TensorSpec(type='int', shape=()).signature(batched=False)
+            return signature
 
         elif function == 'predecessors':
             return SignatureDict(
@@ -148,8 +151,11 @@ class Memory(Module):
         else:
             return super().output_signature(function=function)
 
-    @tf_function(num_args=6)
-    def enqueue(self, *, states, internals, auxiliaries, actions, terminal, reward):
+    @tf_function(num_args=8, optional=1)
+    def enqueue(
+        self, *, states, internals, auxiliaries, actions, terminal, reward, parallel,
+        bootstrap_horizon=None
+    ):
         raise NotImplementedError
 
     @tf_function(num_args=1)
@@ -171,3 +177,9 @@ class Memory(Module):
     @tf_function(num_args=1)
     def retrieve_episodes(self, *, n):
         raise NotImplementedError
+
+    def save_log(self, *, directory):
+        raise NotImplementedError
+
+    def restore_log(self, *, directory):
+        raise NotImplementedError
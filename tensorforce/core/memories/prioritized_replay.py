@@ -0,0 +1,346 @@
+# Copyright 2020 Tensorforce Team. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+
+import numpy as np
+import tensorflow as tf
+
+from tensorforce import TensorforceError
+from tensorforce.core import parameter_modules, SignatureDict, TensorSpec, tf_function, tf_util
+from tensorforce.core.memories import Queue
+
+
+class PrioritizedReplay(Queue):
+    """
+    Prioritized replay memory which retrieves experiences proportional to their priority
+    (specification key: `prioritized_replay`), see
+    [Schaul et al., 2015](https://arxiv.org/abs/1511.05952).
+
+    Priorities are stored in a sum-tree and a min-tree over the memory capacity, so sampling and
+    updating priorities is O(log capacity) per timestep, vectorized over the batch. Timesteps are
+    retrieved via stratified sampling over timesteps with valid horizons, new timesteps are added
+    with the maximum priority so far, and priorities of the retrieved timesteps are set to the
+    absolute per-instance TD error of the objective, as computed as part of the update. The
+    policy objective loss is weighted by the normalized importance sampling weights of the
+    retrieved timesteps. Only supports timestep-based updates.
+
+    Args:
+        capacity (int > 0): Memory capacity
+            (<span style="color:#00C000"><b>default</b></span>: minimum capacity).
+        storage ("compact" | dict[value -> "compact" | storage type]): Storage type per value
+            name, see `Queue`
+            (<span style="color:#00C000"><b>default</b></span>: specification types).
+        frame_stack (dict[state -> int > 1 | dict]): Stacked-frame states to store as single
+            frames, see `Queue`
+            (<span style="color:#00C000"><b>default</b></span>: no stacked-frame states).
+        alpha (float >= 0.0): Prioritization exponent, 0.0 corresponds to uniform sampling
+            (<span style="color:#00C000"><b>default</b></span>: 0.6).
+        beta (parameter, 0.0 <= float <= 1.0): Importance sampling exponent, 1.0 fully
+            compensates for the non-uniform sampling
+            (<span style="color:#00C000"><b>default</b></span>: 0.4).
+        epsilon (float > 0.0): Constant added to priorities, so every timestep can be retrieved
+            (<span style="color:#00C000"><b>default</b></span>: 1e-6).
+        device (string): Device name
+            (<span style="color:#00C000"><b>default</b></span>: CPU:0).
+        name (string): <span style="color:#0000C0"><b>internal use</b></span>.
+        values_spec (specification): <span style="color:#0000C0"><b>internal use</b></span>.
+        min_capacity (int >= 0): <span style="color:#0000C0"><b>internal use</b></span>.
+    """
+
+    def __init__(
+        self, capacity=None, *, storage=None, frame_stack=None, alpha=0.6, beta=0.4, epsilon=1e-6,
+        device='CPU:0', name=None, values_spec=None, min_capacity=None
+    ):
+        super().__init__(
+            capacity=capacity, storage=storage, frame_stack=frame_stack, device=device, name=name,
+            values_spec=values_spec, min_capacity=min_capacity
+        )
+
+        if not isinstance(alpha, (int, float)) or alpha < 0.0:
+            raise TensorforceError.value(
+                name='prioritized_replay', argument='alpha', value=alpha, hint='< 0.0'
+            )
+        self.alpha = float(alpha)
+        self.beta = self.submodule(
+            name='beta', module=beta, modules=parameter_modules, dtype='float', min_value=0.0,
+            max_value=1.0
+        )
+        if not isinstance(epsilon, (int, float)) or epsilon <= 0.0:
+            raise TensorforceError.value(
+                name='prioritized_replay', argument='epsilon', value=epsilon, hint='<= 0.0'
+            )
+        self.epsilon = float(epsilon)
+
+        # Tree leaves for capacity rounded up to the next power of two
+        self.tree_depth = max(int(np.ceil(np.log2(self.capacity))), 1)
+        self.tree_size = 1 << self.tree_depth
+
+    def input_signature(self, *, function):
+        if function == 'importance_weights':
+            return SignatureDict(indices=TensorSpec(type='int', shape=()).signature(batched=True))
+
+        elif function == 'update_priorities':
+            return SignatureDict(
+                indices=TensorSpec(type='int', shape=()).signature(batched=True),
+                priorities=TensorSpec(type='float', shape=()).signature(batched=True)
+            )
+
+        else:
+            return super().input_signature(function=function)
+
+    def output_signature(self, *, function):
+        if function == 'importance_weights':
+            return SignatureDict(
+                singleton=TensorSpec(type='float', shape=()).signature(batched=True)
+            )
+
+        elif function == 'update_priorities':
+            return SignatureDict(
+                singleton=TensorSpec(type='bool', shape=()).signature(batched=False)
+            )
+
+        else:
+            return super().output_signature(function=function)
+
+    def initialize(self):
+        super().initialize()
+
+        # Sum-tree and min-tree of priorities, root at index 1 and leaves at tree_size + index
+        spec = TensorSpec(type='float', shape=(2 * self.tree_size,))
+        self.sum_tree = self.variable(
+            name='sum-tree', spec=spec, initializer='zeros', is_trainable=False, is_saved=True
+        )
+        initializer = np.full(
+            shape=(2 * self.tree_size,), fill_value=np.finfo(spec.np_type()).max,
+            dtype=spec.np_type()
+        )
+        self.min_tree = self.variable(
+            name='min-tree', spec=spec, initializer=initializer, is_trainable=False, is_saved=True
+        )
+
+        # Maximum priority so far, assigned to new timesteps
+        self.max_priority = self.variable(
+            name='max-priority', spec=TensorSpec(type='float'), initializer='ones',
+            is_trainable=False, is_saved=True
+        )
+
+    def log_state_variables(self):
+        variables = super().log_state_variables()
+        variables['max-priority'] = self.max_priority
+        return variables
+
+    def log_values(self, *, indices):
+        # Only sum-tree leaves are logged, inner nodes and min-tree are rebuilt on restore
+        values = super().log_values(indices=indices)
+        nodes = indices + self.tree_size
+        values['priorities'] = tf.gather(params=self.sum_tree, indices=nodes).numpy()
+        return values
+
+    def restore_log_values(self, *, segments):
+        super().restore_log_values(segments=segments)
+
+        leaves = slice(self.tree_size, self.tree_size + self.capacity)
+        sum_tree = np.zeros_like(self.sum_tree.numpy())
+        sum_tree[leaves] = self.sum_tree.numpy()[leaves]
+        for segment in segments:
+            sum_tree[segment['indices'] + self.tree_size] = segment['priorities']
+
+        # Priorities are positive, so zero leaves correspond to slots not written yet
+        min_tree = np.full_like(sum_tree, fill_value=np.finfo(sum_tree.dtype).max)
+        min_tree[leaves] = np.where(sum_tree[leaves] > 0.0, sum_tree[leaves], min_tree[leaves])
+
+        # Parent nodes, level by level up to the root
+        size = self.tree_size
+        while size > 1:
+            size //= 2
+            sum_tree[size: 2 * size] = sum_tree[2 * size: 4 * size: 2] + \
+                sum_tree[2 * size + 1: 4 * size: 2]
+            min_tree[size: 2 * size] = np.minimum(
+                min_tree[2 * size: 4 * size: 2], min_tree[2 * size + 1: 4 * size: 2]
+            )
+
+        self.sum_tree.assign(value=sum_tree, read_value=False)
+        self.min_tree.assign(value=min_tree, read_value=False)
+
+    def update_trees(self, *, indices, priorities):
+        two = tf_util.constant(value=2, dtype='int')
+        nodes = indices + tf_util.constant(value=self.tree_size, dtype='int')
+
+        # Leaves
+        assignments = [
+            self.sum_tree.scatter_update(
+                sparse_delta=tf.IndexedSlices(values=priorities, indices=nodes)
+            ),
+            self.min_tree.scatter_update(
+                sparse_delta=tf.IndexedSlices(values=priorities, indices=nodes)
+            )
+        ]
+
+        # Parent nodes, level by level up to the root
+        for _ in range(self.tree_depth):
+            with tf.control_dependencies(control_inputs=assignments):
+                nodes = tf.math.floordiv(x=nodes, y=two)
+                children = tf.stack(values=(two * nodes, two * nodes + 1), axis=1)
+                sums = tf.math.reduce_sum(
+                    input_tensor=tf.gather(params=self.sum_tree, indices=children), axis=1
+                )
+                mins = tf.math.reduce_min(
+                    input_tensor=tf.gather(params=self.min_tree, indices=children), axis=1
+                )
+                assignments = [
+                    self.sum_tree.scatter_update(
+                        sparse_delta=tf.IndexedSlices(values=sums, indices=nodes)
+                    ),
+                    self.min_tree.scatter_update(
+                        sparse_delta=tf.IndexedSlices(values=mins, indices=nodes)
+                    )
+                ]
+
+        return assignments
+
+    def prefix_sums(self, *, indices):
+        # Sum of priorities before index, by adding left siblings on the path from leaf to root
+        one = tf_util.constant(value=1, dtype='int')
+        two = tf_util.constant(value=2, dtype='int')
+        nodes = indices + tf_util.constant(value=self.tree_size, dtype='int')
+        sums = tf_util.zeros(shape=tf.shape(input=indices), dtype='float')
+        for _ in range(self.tree_depth):
+            is_right = tf.math.equal(x=tf.math.mod(x=nodes, y=two), y=one)
+            left_sums = tf.gather(params=self.sum_tree, indices=(nodes - one))
+            sums += tf.where(condition=is_right, x=left_sums, y=tf.zeros_like(input=left_sums))
+            nodes = tf.math.floordiv(x=nodes, y=two)
+        return sums
+
+    @tf_function(num_args=8, optional=1)
+    def enqueue(
+        self, *, states, internals, auxiliaries, actions, terminal, reward, parallel,
+        bootstrap_horizon=None
+    ):
+        zero = tf_util.constant(value=0, dtype='int')
+        capacity = tf_util.constant(value=self.capacity, dtype='int')
+        num_timesteps = tf_util.cast(x=tf.shape(input=terminal)[0], dtype='int')
+
+        enqueued = super().enqueue(
+            states=states, internals=internals, auxiliaries=auxiliaries, actions=actions,
+            terminal=terminal, reward=reward, parallel=parallel, bootstrap_horizon=bootstrap_horizon
+        )
+
+        # New timesteps with maximum priority
+        with tf.control_dependencies(control_inputs=(enqueued,)):
+            indices = tf.range(start=(self.buffer_index - num_timesteps), limit=self.buffer_index)
+            indices = tf.math.mod(x=indices, y=capacity)
+            priorities = tf.fill(dims=(num_timesteps,), value=self.max_priority)
+            assignments = self.update_trees(indices=indices, priorities=priorities)
+
+        with tf.control_dependencies(control_inputs=assignments):
+            return zero < zero
+
+    @tf_function(num_args=3)
+    def retrieve_timesteps(self, *, n, past_horizon, future_horizon):
+        one = tf_util.constant(value=1, dtype='int')
+        two = tf_util.constant(value=2, dtype='int')
+        capacity = tf_util.constant(value=self.capacity, dtype='int')
+
+        # Check whether memory contains at least one valid timestep
+        num_timesteps = tf.math.minimum(x=self.buffer_index, y=capacity)
+        num_timesteps -= (past_horizon + future_horizon)
+        num_timesteps = tf.math.maximum(x=num_timesteps, y=self.episode_count)
+
+        # Check whether memory contains at least one timestep
+        assertions = list()
+        if self.config.create_tf_assertions:
+            assertions.append(tf.debugging.assert_greater_equal(x=num_timesteps, y=one))
+
+        with tf.control_dependencies(control_inputs=assertions):
+            n = tf.math.minimum(x=n, y=num_timesteps)
+
+            # Priority mass of timesteps with valid horizons, which form the (possibly wrapped)
+            # slot range from start to end, so invalid timesteps are never sampled
+            total = self.sum_tree[1]
+            start = tf.math.mod(
+                x=(self.buffer_index - future_horizon - num_timesteps), y=capacity
+            )
+            end = start + num_timesteps
+            is_wrapped = tf.math.greater_equal(x=end, y=capacity)
+            prefix_sums = self.prefix_sums(
+                indices=tf.stack(values=(start, tf.math.mod(x=end, y=capacity)))
+            )
+            valid_total = tf.where(
+                condition=is_wrapped, x=(total - prefix_sums[0] + prefix_sums[1]),
+                y=(prefix_sums[1] - prefix_sums[0])
+            )
+
+            # Stratified sampling: one priority mass per equal-sized segment of the valid total,
+            # offset by the priority mass before start (modulo total if wrapped)
+            segment = valid_total / tf_util.cast(x=n, dtype='float')
+            offsets = tf_util.cast(x=tf.range(n), dtype='float') + tf.random.uniform(
+                shape=(n,), dtype=tf_util.get_dtype(type='float')
+            )
+            masses = prefix_sums[0] + tf.math.minimum(x=(offsets * segment), y=valid_total)
+            masses = tf.where(
+                condition=tf.math.greater_equal(x=masses, y=total), x=(masses - total), y=masses
+            )
+
+            # Descend sum-tree
+            nodes = tf.ones_like(input=masses, dtype=tf_util.get_dtype(type='int'))
+            for _ in range(self.tree_depth):
+                nodes = two * nodes
+                left_sums = tf.gather(params=self.sum_tree, indices=nodes)
+                is_right = tf.math.greater(x=masses, y=left_sums)
+                masses = tf.where(condition=is_right, x=(masses - left_sums), y=masses)
+                nodes = tf.where(condition=is_right, x=(nodes + one), y=nodes)
+            indices = nodes - tf_util.constant(value=self.tree_size, dtype='int')
+
+            # Restrict to timesteps with valid horizons in case of rounding errors at range bounds
+            ages = tf.math.mod(x=(self.buffer_index - one - indices), y=capacity)
+            ages = tf.clip_by_value(
+                t=ages, clip_value_min=future_horizon,
+                clip_value_max=(future_horizon + num_timesteps - one)
+            )
+            indices = tf.math.mod(x=(self.buffer_index - one - ages), y=capacity)
+
+        return indices
+
+    @tf_function(num_args=1)
+    def importance_weights(self, *, indices):
+        # Normalized by maximum weight, which corresponds to minimum priority:
+        # (N * P(i))^-beta / (N * min P)^-beta
+        nodes = indices + tf_util.constant(value=self.tree_size, dtype='int')
+        priorities = tf.gather(params=self.sum_tree, indices=nodes)
+        return tf.math.pow(x=(priorities / self.min_tree[1]), y=(-self.beta.value()))
+
+    @tf_function(num_args=2)
+    def update_priorities(self, *, indices, priorities):
+        zero = tf_util.constant(value=0, dtype='int')
+        epsilon = tf_util.constant(value=self.epsilon, dtype='float')
+        alpha = tf_util.constant(value=self.alpha, dtype='float')
+
+        priorities = tf.math.pow(x=(tf.math.abs(x=priorities) + epsilon), y=alpha)
+        assignment = self.max_priority.assign(
+            value=tf.math.maximum(
+                x=self.max_priority, y=tf.math.reduce_max(input_tensor=priorities)
+            ), read_value=False
+        )
+        with tf.control_dependencies(control_inputs=(assignment,)):
+            assignments = self.update_trees(indices=indices, priorities=priorities)
+
+        # Priorities of slots possibly older than previous memory log segment
+        sparse_delta = tf.IndexedSlices(
+            values=tf.ones_like(input=indices, dtype=tf_util.get_dtype(type='bool')),
+            indices=indices
+        )
+        assignments.append(self.log_modified.scatter_update(sparse_delta=sparse_delta))
+
+        with tf.control_dependencies(control_inputs=assignments):
+            return zero < zero
@@ -13,6 +13,8 @@
 # limitations under the License.
 # ==============================================================================
 
+import os
+
 import numpy as np
 import tensorflow as tf
 
@@ -25,9 +27,33 @@ class Queue(Memory):
     """
     Base class for memories organized as a queue / circular buffer.
 
+    Values can be stored in a more compact type than their specification type, which is
+    converted on `enqueue` and converted back on `retrieve`/`predecessors`/`successors`. Storage
+    types: "uint8" for bounded float values (quantized to 256 levels between min and max value)
+    or int values with at most 256 values, "int8"/"int16"/"int32" for int values with
+    correspondingly few values, "float16" for float values.
+
+    States which consist of stacked frames, like the output of the `sequence` preprocessing layer
+    or frame-stacking environment wrappers, can be stored as single frames: only the newest frame
+    of each timestep is stored, and stacks are reconstructed on retrieval from the frames of the
+    previous timesteps within the episode. Like the `sequence` layer, positions before the start
+    of an episode are filled with its first frame (for the oldest, partially overwritten episode,
+    with its oldest retained frame).
+
     Args:
         capacity (int > 0): Memory capacity
             (<span style="color:#00C000"><b>default</b></span>: minimum capacity).
+        storage ("compact" | dict[value -> "compact" | storage type]): Storage type per value
+            name like "states/image", "actions" or "reward", where a name prefix like "states"
+            applies to all corresponding values; "compact" chooses "uint8" for bounded float
+            states, "float16" for other float values, and the smallest sufficient int type for
+            int values with known number of values and terminal
+            (<span style="color:#00C000"><b>default</b></span>: specification types).
+        frame_stack (dict[state -> int > 1 | dict]): Stacked-frame states, given by value name
+            like "states/image" or "states" for a single state, to store as single frames, with
+            either the stack length for frames concatenated along the last axis, or a dict with
+            keys `length`, `axis` and `concatenate` as for the `sequence` layer
+            (<span style="color:#00C000"><b>default</b></span>: no stacked-frame states).
         device (string): Device name
             (<span style="color:#00C000"><b>default</b></span>: CPU:0).
         name (string): <span style="color:#0000C0"><b>internal use</b></span>.
@@ -35,9 +61,14 @@ class Queue(Memory):
         min_capacity (int >= 0): <span style="color:#0000C0"><b>internal use</b></span>.
     """
 
+    STORAGE_TYPES = dict(
+        float16=tf.float16, int8=tf.int8, int16=tf.int16, int32=tf.int32, uint8=tf.uint8
+    )
+
     # (requires capacity as first argument)
     def __init__(
-        self, capacity=None, *, device='CPU:0', name=None, values_spec=None, min_capacity=None
+        self, capacity=None, *, storage=None, frame_stack=None, device='CPU:0', name=None,
+        values_spec=None, min_capacity=None
     ):
         super().__init__(
             device=device, name=name, values_spec=values_spec, min_capacity=min_capacity
@@ -58,21 +89,299 @@ class Queue(Memory):
         else:
             self.capacity = capacity
 
+        # Stack length, axis, whether concatenated, and stacked shape, per stacked-frame state
+        if frame_stack is not None and not isinstance(frame_stack, dict):
+            raise TensorforceError.type(
+                name='memory', argument='frame_stack', dtype=type(frame_stack)
+            )
+        self.frame_stacks = dict()
+        if frame_stack is not None:
+            for name, stack in frame_stack.items():
+                self.add_frame_stack(name=name, stack=stack)
+
+        # Storage type, specification type, plus offset and scale for quantized values, per value
+        if storage is not None and storage != 'compact' and not isinstance(storage, dict):
+            raise TensorforceError.type(name='memory', argument='storage', dtype=type(storage))
+        self.storage = dict()
+        if storage is not None and self.values_spec is not None:
+            self.values_spec.fmap(
+                function=(lambda n, spec: self.add_storage(name=n, spec=spec, storage=storage)),
+                cls=list, with_names=True
+            )
+
+        # Previous buffer index, number of slots since snapshot and next segment, per log directory
+        self.log_states = dict()
+
+    def add_frame_stack(self, *, name, stack):
+        if name != 'states' and not name.startswith('states/'):
+            raise TensorforceError.value(
+                name='memory', argument='frame_stack', value=name, hint='not a state'
+            )
+        spec = self.values_spec[name]
+        if not isinstance(spec, TensorSpec):
+            spec = spec.singleton()
+        if isinstance(stack, int):
+            stack = dict(length=stack)
+        elif not isinstance(stack, dict):
+            raise TensorforceError.type(
+                name='memory', argument=('frame_stack[' + name + ']'), dtype=type(stack)
+            )
+        length = stack.get('length')
+        axis = stack.get('axis', -1)
+        concatenate = stack.get('concatenate', True)
+        if not isinstance(length, int) or length <= 1:
+            raise TensorforceError.value(
+                name='memory', argument=('frame_stack[' + name + '].length'), value=length,
+                hint='<= 1'
+            )
+        if axis < 0:
+            axis += spec.rank
+        if not 0 <= axis < spec.rank or (concatenate and spec.shape[axis] % length != 0) or \
+                (not concatenate and spec.shape[axis] != length):
+            raise TensorforceError.invalid(
+                name='memory', argument=('frame_stack[' + name + ']'),
+                condition=('state shape ' + str(spec.shape))
+            )
+        self.frame_stacks[name] = (length, axis, concatenate, spec.shape)
+
+    def frame_spec(self, *, name, spec):
+        # Specification of a single frame of a stacked-frame state
+        length, axis, concatenate, shape = self.frame_stacks[name]
+        if concatenate:
+            shape = shape[:axis] + (shape[axis] // length,) + shape[axis + 1:]
+        else:
+            shape = shape[:axis] + shape[axis + 1:]
+        return TensorSpec(type=spec.type, shape=shape)
+
+    def newest_frame(self, *, name, value, batched=True):
+        length, axis, concatenate, shape = self.frame_stacks[name]
+        if concatenate:
+            size = shape[axis] // length
+            indices = list(range(size * (length - 1), size * length))
+        else:
+            indices = length - 1
+        if batched:
+            axis += 1
+        if isinstance(value, np.ndarray):
+            return np.take(a=value, indices=indices, axis=axis)
+        else:
+            return tf.gather(params=value, indices=indices, axis=axis)
+
+    def add_storage(self, *, name, spec, storage):
+        if storage == 'compact':
+            storage_type = 'compact'
+        else:
+            # Most specific name prefix
+            storage_type = None
+            for prefix in sorted(storage, key=len):
+                if name == prefix or name.startswith(prefix + '/'):
+                    storage_type = storage[prefix]
+
+        if storage_type is None:
+            return
+
+        elif storage_type == 'compact':
+            if spec.type == 'float':
+                if name.startswith('states') and spec.min_value is not None and \
+                        spec.max_value is not None and \
+                        np.all(np.isfinite(spec.max_value - spec.min_value)):
+                    storage_type = 'uint8'
+                else:
+                    storage_type = 'float16'
+            elif spec.type == 'int':
+                if name == 'terminal':
+                    storage_type = 'int8'
+                elif spec.num_values is None:
+                    return
+                elif spec.num_values <= 128:
+                    storage_type = 'int8'
+                elif spec.num_values <= 32768:
+                    storage_type = 'int16'
+                elif spec.num_values <= 2147483648:
+                    storage_type = 'int32'
+                else:
+                    return
+            else:
+                return
+
+        elif storage_type not in self.__class__.STORAGE_TYPES:
+            raise TensorforceError.value(
+                name='memory', argument='storage', value=storage_type,
+                hint=('for ' + name)
+            )
+
+        elif spec.type == 'float':
+            if storage_type == 'uint8':
+                if spec.min_value is None or spec.max_value is None or \
+                        not np.all(np.isfinite(spec.max_value - spec.min_value)):
+                    raise TensorforceError.invalid(
+                        name='memory', argument='storage', condition=(name + ' is not bounded')
+                    )
+            elif storage_type != 'float16':
+                raise TensorforceError.value(
+                    name='memory', argument='storage', value=storage_type,
+                    hint=('for float ' + name)
+                )
+
+        elif spec.type == 'int':
+            if storage_type == 'float16':
+                raise TensorforceError.value(
+                    name='memory', argument='storage', value=storage_type,
+                    hint=('for int ' + name)
+                )
+            if spec.num_values is not None:
+                max_num_values = dict(uint8=256, int8=128, int16=32768, int32=2147483648)
+                if spec.num_values > max_num_values[storage_type]:
+                    raise TensorforceError.invalid(
+                        name='memory', argument='storage',
+                        condition=(name + ' num_values > ' + str(max_num_values[storage_type]))
+                    )
+
+        else:
+            raise TensorforceError.value(
+                name='memory', argument='storage', value=storage_type, hint=('for bool ' + name)
+            )
+
+        if spec.type == 'float' and storage_type == 'uint8':
+            offset = np.asarray(spec.min_value, dtype=spec.np_type())
+            scale = (np.asarray(spec.max_value, dtype=spec.np_type()) - offset) / 255.0
+            if name in self.frame_stacks and offset.ndim > 0:
+                offset = self.newest_frame(name=name, value=offset, batched=False)
+                scale = self.newest_frame(name=name, value=scale, batched=False)
+            self.storage[name] = (
+                self.__class__.STORAGE_TYPES[storage_type], spec.tf_type(), offset, scale
+            )
+        else:
+            self.storage[name] = (
+                self.__class__.STORAGE_TYPES[storage_type], spec.tf_type(), None, None
+            )
+
+    def encode(self, *, name, value):
+        if name not in self.storage:
+            return value
+        dtype, _, offset, scale = self.storage[name]
+        if offset is None:
+            return tf.cast(x=value, dtype=dtype)
+        # Quantize to nearest of 256 levels between min and max value
+        offset = tf_util.constant(value=offset, dtype='float')
+        scale = tf_util.constant(value=scale, dtype='float')
+        value = tf.math.round(x=((value - offset) / scale))
+        value = tf.clip_by_value(t=value, clip_value_min=0.0, clip_value_max=255.0)
+        return tf.cast(x=value, dtype=dtype)
+
+    def decode(self, *, name, value):
+        if name not in self.storage:
+            return value
+        _, dtype, offset, scale = self.storage[name]
+        if offset is None:
+            return tf.cast(x=value, dtype=dtype)
+        offset = tf_util.constant(value=offset, dtype='float')
+        scale = tf_util.constant(value=scale, dtype='float')
+        return tf.cast(x=value, dtype=dtype) * scale + offset
+
+    def num_predecessors(self, *, indices):
+        # Number of retained predecessors within the same episode
+        one = tf_util.constant(value=1, dtype='int')
+        capacity = tf_util.constant(value=self.capacity, dtype='int')
+        num_timesteps = tf.math.minimum(x=self.buffer_index, y=capacity)
+        ages = tf.math.mod(x=(self.buffer_index - one - indices), y=capacity)
+        starts = tf.gather(params=self.episode_starts, indices=indices)
+        return tf.math.minimum(
+            x=tf.math.mod(x=(indices - starts), y=capacity), y=(num_timesteps - one - ages)
+        )
+
+    def num_successors(self, *, indices):
+        # Number of successors within the same episode, via terminal indices sorted by age
+        zero = tf_util.constant(value=0, dtype='int')
+        one = tf_util.constant(value=1, dtype='int')
+        capacity = tf_util.constant(value=self.capacity, dtype='int')
+        ages = tf.math.mod(x=(self.buffer_index - one - indices), y=capacity)
+        terminals = self.gather_terminals(positions=tf.range(self.episode_count + one))
+        terminal_ages = tf.math.mod(x=(self.buffer_index - one - terminals), y=capacity)
+        # Youngest terminal not younger than index, if any, otherwise most recent timestep
+        positions = tf.searchsorted(
+            sorted_sequence=tf.expand_dims(input=-terminal_ages, axis=0),
+            values=tf.expand_dims(input=-ages, axis=0), side='left',
+            out_type=tf_util.get_dtype(type='int')
+        )
+        positions = tf.squeeze(input=positions, axis=0)
+        terminal_ages = tf.concat(values=(terminal_ages, [zero]), axis=0)
+        return ages - tf.gather(params=terminal_ages, indices=positions)
+
+    def successor_indices(self, *, indices, offsets):
+        # Buffer indices the given number of timesteps after indices
+        capacity = tf_util.constant(value=self.capacity, dtype='int')
+        return tf.math.mod(x=(indices + offsets), y=capacity)
+
+    def terminal_positions(self, *, positions):
+        # Positions in circular terminal indices buffer, relative to oldest terminal index
+        num_terminals = tf_util.constant(value=(self.capacity + 1), dtype='int')
+        return tf.math.mod(x=(self.terminal_start + positions), y=num_terminals)
+
+    def gather_terminals(self, *, positions):
+        # Terminal indices sorted by age, oldest (terminal before oldest episode) at position 0
+        return tf.gather(
+            params=self.terminal_indices, indices=self.terminal_positions(positions=positions)
+        )
+
+    def gather(self, *, name, indices, buffer=None):
+        if buffer is None:
+            buffer = self.buffers[name]
+        if name not in self.frame_stacks:
+            return self.decode(
+                name=name, value=self.gather_buffer(name=name, buffer=buffer, indices=indices)
+            )
+
+        capacity = tf_util.constant(value=self.capacity, dtype='int')
+        length, axis, concatenate, shape = self.frame_stacks[name]
+
+        # Frame indices of previous timesteps, repeating the first frame of the episode
+        offsets = tf.range(start=(length - 1), limit=-1, delta=-1, dtype=indices.dtype)
+        offsets = tf.math.minimum(
+            x=tf.expand_dims(input=offsets, axis=0),
+            y=tf.expand_dims(input=self.num_predecessors(indices=indices), axis=1)
+        )
+        frame_indices = tf.math.mod(x=(tf.expand_dims(input=indices, axis=1) - offsets), y=capacity)
+
+        # Move stack axis from after batch axis to given axis, and concatenate if required
+        frames = self.gather_buffer(name=name, buffer=buffer, indices=frame_indices)
+        frames = self.decode(name=name, value=frames)
+        rank = len(shape) + (2 if concatenate else 1)
+        perm = (0,) + tuple(range(2, axis + 2)) + (1,) + tuple(range(axis + 2, rank))
+        frames = tf.transpose(a=frames, perm=perm)
+        if concatenate:
+            frames = tf.reshape(tensor=frames, shape=((-1,) + shape))
+        return frames
+
+    def gather_buffer(self, *, name, buffer, indices):
+        return tf.gather(params=buffer, indices=indices)
+
+    def scatter_buffer(self, *, name, buffer, indices, value):
+        sparse_delta = tf.IndexedSlices(values=value, indices=indices)
+        return buffer.scatter_update(sparse_delta=sparse_delta)
+
+    def buffer_variable(self, *, name, spec):
+        spec = TensorSpec(type=spec.tf_type(), shape=((self.capacity,) + spec.shape))
+        if name == 'terminal':
+            initializer = np.zeros(shape=(self.capacity,), dtype=spec.np_type())
+            initializer[-1] = 1
+        else:
+            initializer = 'zeros'
+        return self.variable(
+            name=(name + '-buffer'), spec=spec, initializer=initializer, is_trainable=False,
+            is_saved=True
+        )
+
     def initialize(self):
         super().initialize()
 
         # Value buffers
         def function(name, spec):
-            spec = TensorSpec(type=spec.type, shape=((self.capacity,) + spec.shape))
-            if name == 'terminal':
-                initializer = np.zeros(shape=(self.capacity,), dtype=spec.np_type())
-                initializer[-1] = 1
-            else:
-                initializer = 'zeros'
-            return self.variable(
-                name=(name + '-buffer'), spec=spec, initializer=initializer, is_trainable=False,
-                is_saved=True
-            )
+            if name in self.frame_stacks:
+                spec = self.frame_spec(name=name, spec=spec)
+            if name in self.storage:
+                spec = TensorSpec(type=self.storage[name][0], shape=spec.shape)
+            return self.buffer_variable(name=name, spec=spec)
 
         self.buffers = self.values_spec.fmap(function=function, cls=VariableDict, with_names=True)
 
@@ -83,7 +392,8 @@ class Queue(Memory):
         )
 
         # Terminal indices
-        # (oldest episode terminals first, initially the only terminal is last index)
+        # (circular buffer starting with oldest episode terminals at terminal start, initially the
+        # only terminal is last index)
         initializer = np.zeros(shape=(self.capacity + 1,), dtype=util.np_dtype(dtype='int'))
         initializer[0] = self.capacity - 1
         self.terminal_indices = self.variable(
@@ -91,12 +401,30 @@ class Queue(Memory):
             initializer=initializer, is_trainable=False, is_saved=True
         )
 
+        # Terminal start (position of oldest terminal index)
+        self.terminal_start = self.variable(
+            name='terminal-start', spec=TensorSpec(type='int'), initializer='zeros',
+            is_trainable=False, is_saved=True
+        )
+
         # Episode count
         self.episode_count = self.variable(
             name='episode-count', spec=TensorSpec(type='int'), initializer='zeros',
             is_trainable=False, is_saved=True
         )
 
+        # Episode start index per buffer index
+        self.episode_starts = self.variable(
+            name='episode-starts', spec=TensorSpec(type='int', shape=(self.capacity,)),
+            initializer='zeros', is_trainable=False, is_saved=True
+        )
+
+        # Whether buffer slot was modified in-place since previous memory log segment
+        self.log_modified = self.variable(
+            name='log-modified', spec=TensorSpec(type='bool', shape=(self.capacity,)),
+            initializer=False, is_trainable=False, is_saved=False
+        )
+
     @tf_function(num_args=0)
     def reset(self):
         zero = tf_util.constant(value=0, dtype='int')
@@ -109,14 +437,40 @@ class Queue(Memory):
             # Replace last observation terminal marker with abort terminal
             dependencies = list()
             two = tf_util.constant(value=2, dtype='int')
-            sparse_delta = tf.IndexedSlices(values=two, indices=last_index)
+            sparse_delta = tf.IndexedSlices(
+                values=self.encode(name='terminal', value=two), indices=last_index
+            )
             dependencies.append(self.buffers['terminal'].scatter_update(sparse_delta=sparse_delta))
-            sparse_delta = tf.IndexedSlices(values=last_index, indices=(self.episode_count + one))
+            sparse_delta = tf.IndexedSlices(
+                values=last_index,
+                indices=self.terminal_positions(positions=(self.episode_count + one))
+            )
             dependencies.append(self.terminal_indices.scatter_update(sparse_delta=sparse_delta))
+            indices = tf.expand_dims(last_index, axis=0)
+            if 'bootstrap_horizon' in self.buffers:
+                # Bootstrap horizons of aborted episode cannot extend beyond abort terminal
+                num_timesteps = self.num_predecessors(indices=indices)
+                remaining = tf.range(num_timesteps[0] + one)
+                indices = tf.math.mod(x=(last_index - remaining), y=capacity)
+                bootstrap_horizon = tf.math.minimum(
+                    x=self.gather(name='bootstrap_horizon', indices=indices), y=remaining
+                )
+                dependencies.append(self.scatter_buffer(
+                    name='bootstrap_horizon', buffer=self.buffers['bootstrap_horizon'],
+                    indices=indices, value=self.encode(
+                        name='bootstrap_horizon', value=bootstrap_horizon
+                    )
+                ))
+            # Slots possibly older than previous memory log segment
+            sparse_delta = tf.IndexedSlices(
+                values=tf.ones_like(input=indices, dtype=tf_util.get_dtype(type='bool')),
+                indices=indices
+            )
+            dependencies.append(self.log_modified.scatter_update(sparse_delta=sparse_delta))
             with tf.control_dependencies(control_inputs=dependencies):
                 return self.episode_count.assign_add(delta=one, read_value=False)
 
-        last_terminal = tf.gather(params=self.buffers['terminal'], indices=last_index)
+        last_terminal = self.gather(name='terminal', indices=last_index)
         is_incorrect = tf.math.equal(x=last_terminal, y=three)
         corrected = tf.cond(pred=is_incorrect, true_fn=correct_terminal, false_fn=tf.no_op)
 
@@ -127,8 +481,13 @@ class Queue(Memory):
                 assertions.append(tf.debugging.assert_equal(
                     x=tf.reduce_all(
                         input_tensor=tf.gather(
-                            params=tf.math.greater(x=self.buffers['terminal'], y=zero),
-                            indices=self.terminal_indices[:self.episode_count + one]
+                            params=tf.math.greater(
+                                x=self.decode(name='terminal', value=self.buffers['terminal']),
+                                y=zero
+                            ),
+                            indices=self.gather_terminals(
+                                positions=tf.range(self.episode_count + one)
+                            )
                         )
                     ),
                     y=tf_util.constant(value=True, dtype='bool'),
@@ -145,8 +504,11 @@ class Queue(Memory):
         with tf.control_dependencies(control_inputs=assertions):
             return one < zero
 
-    @tf_function(num_args=6)
-    def enqueue(self, *, states, internals, auxiliaries, actions, terminal, reward):
+    @tf_function(num_args=8, optional=1)
+    def enqueue(
+        self, *, states, internals, auxiliaries, actions, terminal, reward, parallel,
+        bootstrap_horizon=None
+    ):
         zero = tf_util.constant(value=0, dtype='int')
         one = tf_util.constant(value=1, dtype='int')
         three = tf_util.constant(value=3, dtype='int')
@@ -157,12 +519,14 @@ class Queue(Memory):
 
         def correct_terminal():
             # Remove last observation terminal marker
-            sparse_delta = tf.IndexedSlices(values=zero, indices=last_index)
+            sparse_delta = tf.IndexedSlices(
+                values=self.encode(name='terminal', value=zero), indices=last_index
+            )
             assignment = self.buffers['terminal'].scatter_update(sparse_delta=sparse_delta)
             with tf.control_dependencies(control_inputs=(assignment,)):
                 return last_index < zero
 
-        last_terminal = tf.gather(params=self.buffers['terminal'], indices=last_index)
+        last_terminal = self.gather(name='terminal', indices=last_index)
         is_incorrect = tf.math.equal(x=last_terminal, y=three)
         corrected = tf.cond(pred=is_incorrect, true_fn=correct_terminal, false_fn=tf.no_op)
 
@@ -190,8 +554,13 @@ class Queue(Memory):
                 assertions.append(tf.debugging.assert_equal(
                     x=tf.reduce_all(
                         input_tensor=tf.gather(
-                            params=tf.math.greater(x=self.buffers['terminal'], y=zero),
-                            indices=self.terminal_indices[:self.episode_count + one]
+                            params=tf.math.greater(
+                                x=self.decode(name='terminal', value=self.buffers['terminal']),
+                                y=zero
+                            ),
+                            indices=self.gather_terminals(
+                                positions=tf.range(self.episode_count + one)
+                            )
                         )
                     ),
                     y=tf_util.constant(value=True, dtype='bool'),
@@ -214,31 +583,41 @@ class Queue(Memory):
 
             # Count number of overwritten episodes
             num_episodes = tf.math.count_nonzero(
-                input=tf.gather(params=self.buffers['terminal'], indices=overwritten_indices),
+                input=self.gather(name='terminal', indices=overwritten_indices),
                 axis=0, dtype=tf_util.get_dtype(type='int')
             )
 
-            # Shift remaining terminal indices accordingly
-            index = self.episode_count + one
+            # Remove overwritten terminal indices by moving terminal start (circular buffer)
             assertions = list()
             if self.config.create_tf_assertions:
                 assertions.append(tf.debugging.assert_greater_equal(
-                    x=index, y=num_episodes, message="Memory episode overwriting check."
+                    x=(self.episode_count + one), y=num_episodes,
+                    message="Memory episode overwriting check."
                 ))
 
         with tf.control_dependencies(control_inputs=assertions):
-            sparse_delta = tf.IndexedSlices(
-                values=self.terminal_indices[num_episodes: index],
-                indices=tf.range(index - num_episodes)
+            assignment = self.terminal_start.assign(
+                value=self.terminal_positions(positions=num_episodes), read_value=False
             )
-            assignment = self.terminal_indices.scatter_update(sparse_delta=sparse_delta)
 
         # Decrement episode count accordingly
         with tf.control_dependencies(control_inputs=(assignment,)):
             assignment = self.episode_count.assign_sub(delta=num_episodes, read_value=False)
 
-        # Write new observations
+        # Episode start of new timesteps, continuing the episode of the last timestep if not
+        # terminal (terminal marker already removed)
         with tf.control_dependencies(control_inputs=(assignment,)):
+            is_new_episode = tf.math.greater(
+                x=self.gather(name='terminal', indices=last_index), y=zero
+            )
+            episode_start = tf.where(
+                condition=is_new_episode, x=tf.math.mod(x=self.buffer_index, y=capacity),
+                y=tf.gather(params=self.episode_starts, indices=last_index)
+            )
+            episode_starts = tf.fill(dims=(num_timesteps,), value=episode_start)
+
+        # Write new observations
+        with tf.control_dependencies(control_inputs=(episode_starts,)):
             # Add last observation terminal marker
             corrected_terminal = tf.where(
                 condition=tf.math.equal(x=terminal[-1:], y=zero), x=three, y=terminal[-1:]
@@ -248,14 +627,22 @@ class Queue(Memory):
                 states=states, internals=internals, auxiliaries=auxiliaries, actions=actions,
                 terminal=corrected_terminal, reward=reward
             )
+            if bootstrap_horizon is not None:
+                values['bootstrap_horizon'] = bootstrap_horizon
             indices = tf.range(start=self.buffer_index, limit=(self.buffer_index + num_timesteps))
             indices = tf.math.mod(x=indices, y=capacity)
 
-            def function(buffer, value):
-                sparse_delta = tf.IndexedSlices(values=value, indices=indices)
-                return buffer.scatter_update(sparse_delta=sparse_delta)
+            def function(name, buffer, value):
+                if name in self.frame_stacks:
+                    value = self.newest_frame(name=name, value=value)
+                value = self.encode(name=name, value=value)
+                return self.scatter_buffer(name=name, buffer=buffer, indices=indices, value=value)
 
-            assignments = self.buffers.fmap(function=function, cls=list, zip_values=values)
+            assignments = self.buffers.fmap(
+                function=function, cls=list, with_names=True, zip_values=values
+            )
+            sparse_delta = tf.IndexedSlices(values=episode_starts, indices=indices)
+            assignments.append(self.episode_starts.scatter_update(sparse_delta=sparse_delta))
 
         # Increment buffer index
         with tf.control_dependencies(control_inputs=assignments):
@@ -273,8 +660,9 @@ class Queue(Memory):
             )
             start = self.episode_count + one
             sparse_delta = tf.IndexedSlices(
-                values=new_terminal_indices,
-                indices=tf.range(start=start, limit=(start + num_new_episodes))
+                values=new_terminal_indices, indices=self.terminal_positions(
+                    positions=tf.range(start=start, limit=(start + num_new_episodes))
+                )
             )
             assignment = self.terminal_indices.scatter_update(sparse_delta=sparse_delta)
 
@@ -286,8 +674,8 @@ class Queue(Memory):
     @tf_function(num_args=1)
     def retrieve(self, *, indices, values):
         assert isinstance(values, tuple)
-        function = (lambda x: tf.gather(params=x, indices=indices))
-        return self.buffers[values].fmap(function=function, cls=TensorDict)
+        function = (lambda name, buffer: self.gather(name=name, indices=indices, buffer=buffer))
+        return self.buffers[values].fmap(function=function, cls=TensorDict, with_names=True)
 
     @tf_function(num_args=2)
     def predecessors(self, *, indices, horizon, sequence_values, initial_values):
@@ -298,35 +686,12 @@ class Queue(Memory):
         one = tf_util.constant(value=1, dtype='int')
         capacity = tf_util.constant(value=self.capacity, dtype='int')
 
-        def body(lengths, predecessor_indices, mask):
-            previous_index = tf.math.mod(x=(predecessor_indices[:, :1] - one), y=capacity)
-            predecessor_indices = tf.concat(values=(previous_index, predecessor_indices), axis=1)
-            previous_terminal = tf.gather(params=self.buffers['terminal'], indices=previous_index)
-            is_not_terminal = tf.math.logical_and(
-                x=tf.math.logical_not(x=tf.math.greater(x=previous_terminal, y=zero)),
-                y=mask[:, :1]
-            )
-            mask = tf.concat(values=(is_not_terminal, mask), axis=1)
-            is_not_terminal = tf.squeeze(input=is_not_terminal, axis=1)
-            zeros = tf.zeros_like(input=is_not_terminal, dtype=tf_util.get_dtype(type='int'))
-            ones = tf.ones_like(input=is_not_terminal, dtype=tf_util.get_dtype(type='int'))
-            lengths += tf.where(condition=is_not_terminal, x=ones, y=zeros)
-            return lengths, predecessor_indices, mask
-
-        lengths = tf.ones_like(input=indices, dtype=tf_util.get_dtype(type='int'))
-        predecessor_indices = tf.expand_dims(input=indices, axis=1)
-        mask = tf.ones_like(input=predecessor_indices, dtype=tf_util.get_dtype(type='bool'))
-        shape = tf.TensorShape(dims=((None, None)))
-
-        lengths, predecessor_indices, mask = tf.while_loop(
-            cond=tf_util.always_true, body=body, loop_vars=(lengths, predecessor_indices, mask),
-            shape_invariants=(lengths.get_shape(), shape, shape),
-            maximum_iterations=tf_util.int32(x=horizon)
-        )
-
-        predecessor_indices = tf.reshape(tensor=predecessor_indices, shape=(-1,))
-        mask = tf.reshape(tensor=mask, shape=(-1,))
-        predecessor_indices = tf.boolean_mask(tensor=predecessor_indices, mask=mask, axis=0)
+        # Predecessor index ranges within the same episode, up to horizon
+        lengths = tf.math.minimum(x=self.num_predecessors(indices=indices), y=horizon) + one
+        predecessor_indices = tf.ragged.range(
+            starts=(indices - lengths + one), limits=(indices + one)
+        ).flat_values
+        predecessor_indices = tf.math.mod(x=predecessor_indices, y=capacity)
 
         assertions = list()
         if self.config.create_tf_assertions:
@@ -336,13 +701,21 @@ class Queue(Memory):
             ))
 
         with tf.control_dependencies(control_inputs=assertions):
-            function = (lambda buffer: tf.gather(params=buffer, indices=predecessor_indices))
-            sequence_values = self.buffers[sequence_values].fmap(function=function, cls=TensorDict)
+            function = (lambda name, buffer: self.gather(
+                name=name, indices=predecessor_indices, buffer=buffer
+            ))
+            sequence_values = self.buffers[sequence_values].fmap(
+                function=function, cls=TensorDict, with_names=True
+            )
 
             starts = tf.math.cumsum(x=lengths, exclusive=True)
-            initial_indices = tf.gather(params=predecessor_indices, indices=starts)
-            function = (lambda buffer: tf.gather(params=buffer, indices=initial_indices))
-            initial_values = self.buffers[initial_values].fmap(function=function, cls=TensorDict)
+            initial_indices = tf.math.mod(x=(indices - lengths + one), y=capacity)
+            function = (lambda name, buffer: self.gather(
+                name=name, indices=initial_indices, buffer=buffer
+            ))
+            initial_values = self.buffers[initial_values].fmap(
+                function=function, cls=TensorDict, with_names=True
+            )
 
         if len(sequence_values) == 0:
             if len(initial_values) == 0:
@@ -365,36 +738,10 @@ class Queue(Memory):
         one = tf_util.constant(value=1, dtype='int')
         capacity = tf_util.constant(value=self.capacity, dtype='int')
 
-        def body(lengths, successor_indices, mask):
-            current_index = successor_indices[:, -1:]
-            current_terminal = tf.gather(params=self.buffers['terminal'], indices=current_index)
-            is_not_terminal = tf.math.logical_and(
-                x=tf.math.logical_not(x=tf.math.greater(x=current_terminal, y=zero)),
-                y=mask[:, -1:]
-            )
-            next_index = tf.math.mod(x=(current_index + one), y=capacity)
-            successor_indices = tf.concat(values=(successor_indices, next_index), axis=1)
-            mask = tf.concat(values=(mask, is_not_terminal), axis=1)
-            is_not_terminal = tf.squeeze(input=is_not_terminal, axis=1)
-            zeros = tf.zeros_like(input=is_not_terminal, dtype=tf_util.get_dtype(type='int'))
-            ones = tf.ones_like(input=is_not_terminal, dtype=tf_util.get_dtype(type='int'))
-            lengths += tf.where(condition=is_not_terminal, x=ones, y=zeros)
-            return lengths, successor_indices, mask
-
-        lengths = tf.ones_like(input=indices, dtype=tf_util.get_dtype(type='int'))
-        successor_indices = tf.expand_dims(input=indices, axis=1)
-        mask = tf.ones_like(input=successor_indices, dtype=tf_util.get_dtype(type='bool'))
-        shape = tf.TensorShape(dims=((None, None)))
-
-        lengths, successor_indices, mask = tf.while_loop(
-            cond=tf_util.always_true, body=body, loop_vars=(lengths, successor_indices, mask),
-            shape_invariants=(lengths.get_shape(), shape, shape),
-            maximum_iterations=tf_util.int32(x=horizon)
-        )
-
-        successor_indices = tf.reshape(tensor=successor_indices, shape=(-1,))
-        mask = tf.reshape(tensor=mask, shape=(-1,))
-        successor_indices = tf.boolean_mask(tensor=successor_indices, mask=mask, axis=0)
+        # Successor index ranges within the same episode, up to horizon
+        lengths = tf.math.minimum(x=self.num_successors(indices=indices), y=horizon) + one
+        successor_indices = tf.ragged.range(starts=indices, limits=(indices + lengths)).flat_values
+        successor_indices = tf.math.mod(x=successor_indices, y=capacity)
 
         assertions = list()
         if self.config.create_tf_assertions:
@@ -404,14 +751,21 @@ class Queue(Memory):
             ))
 
         with tf.control_dependencies(control_inputs=assertions):
-            function = (lambda buffer: tf.gather(params=buffer, indices=successor_indices))
-            sequence_values = self.buffers[sequence_values].fmap(function=function, cls=TensorDict)
+            function = (lambda name, buffer: self.gather(
+                name=name, indices=successor_indices, buffer=buffer
+            ))
+            sequence_values = self.buffers[sequence_values].fmap(
+                function=function, cls=TensorDict, with_names=True
+            )
 
             starts = tf.math.cumsum(x=lengths, exclusive=True)
-            ends = tf.math.cumsum(x=lengths) - one
-            final_indices = tf.gather(params=successor_indices, indices=ends)
-            function = (lambda buffer: tf.gather(params=buffer, indices=final_indices))
-            final_values = self.buffers[final_values].fmap(function=function, cls=TensorDict)
+            final_indices = tf.math.mod(x=(indices + lengths - one), y=capacity)
+            function = (lambda name, buffer: self.gather(
+                name=name, indices=final_indices, buffer=buffer
+            ))
+            final_values = self.buffers[final_values].fmap(
+                function=function, cls=TensorDict, with_names=True
+            )
 
         if len(sequence_values) == 0:
             if len(final_values) == 0:
@@ -424,3 +778,123 @@ class Queue(Memory):
 
         else:
             return tf.stack(values=(starts, lengths), axis=1), sequence_values, final_values
+
+    def log_variables(self):
+        # Variables indexed by buffer slot, logged incrementally
+        variables = {'buffer/' + name: buffer for name, buffer in self.buffers.items()}
+        variables['episode-starts'] = self.episode_starts
+        return variables
+
+    def log_state_variables(self):
+        # Variables logged entirely as part of every log segment
+        return {
+            'buffer-index': self.buffer_index, 'episode-count': self.episode_count,
+            'terminal-indices': self.terminal_indices, 'terminal-start': self.terminal_start
+        }
+
+    def log_directory(self, *, directory):
+        return os.path.join(directory, self.full_name.replace('/', '.') + '-log')
+
+    def save_log(self, *, directory):
+        """
+        Appends a segment with the buffer slots written or modified in-place since the previous
+        segment to the append-only memory log in the given directory, or a full snapshot if there
+        is no previous segment from this memory, if the entire buffer was overwritten, or if the
+        log since the last snapshot exceeds twice the capacity (in which case older segments are
+        removed).
+
+        Returns:
+            Path of the log segment.
+        """
+        directory = self.log_directory(directory=directory)
+        os.makedirs(directory, exist_ok=True)
+
+        # Buffer index at previous segment, number of logged slots since last snapshot, and
+        # number of next segment
+        buffer_index = self.buffer_index.numpy().item()
+        logged_index, num_slots, segment = self.log_states.get(directory, (None, None, 0))
+
+        # Slot before previous buffer index included, since the last observation terminal marker
+        # is corrected in-place, plus older slots modified in-place, for instance bootstrap
+        # horizons of an aborted episode
+        modified = np.flatnonzero(self.log_modified.numpy())
+        if logged_index is None or logged_index > buffer_index or \
+                buffer_index - logged_index + 1 >= self.capacity:
+            is_snapshot = True
+        else:
+            indices = np.arange(max(logged_index - 1, 0), buffer_index) % self.capacity
+            indices = np.union1d(indices, modified)
+            is_snapshot = num_slots + indices.shape[0] > 2 * self.capacity
+        if is_snapshot:
+            indices = np.arange(self.capacity)
+            num_slots = 0
+        num_slots += indices.shape[0]
+
+        values = self.log_values(indices=indices)
+
+        # Write to temporary file first, so segments are never partially written
+        path = os.path.join(directory, 'segment-{:08d}.npz'.format(segment))
+        with open(path + '.tmp', 'wb') as filehandle:
+            np.savez(filehandle, snapshot=is_snapshot, indices=indices, **values)
+        os.replace(path + '.tmp', path)
+        self.log_modified.assign(value=tf.zeros_like(input=self.log_modified), read_value=False)
+
+        if is_snapshot:
+            for filename in os.listdir(directory):
+                if filename.startswith('segment-') and filename < os.path.basename(path):
+                    os.remove(os.path.join(directory, filename))
+
+        self.log_states[directory] = (buffer_index, num_slots, segment + 1)
+        return path
+
+    def restore_log(self, *, directory):
+        """
+        Restores the memory by replaying the memory log in the given directory from its latest
+        snapshot, if a log exists.
+
+        Returns:
+            True if a log was restored.
+        """
+        directory = self.log_directory(directory=directory)
+        if not os.path.isdir(directory):
+            return False
+        filenames = sorted(
+            filename for filename in os.listdir(directory)
+            if filename.startswith('segment-') and filename.endswith('.npz')
+        )
+        segments = [np.load(file=os.path.join(directory, filename)) for filename in filenames]
+        snapshots = [n for n, segment in enumerate(segments) if segment['snapshot'].item()]
+        if len(snapshots) == 0:
+            return False
+        segments = segments[snapshots[-1]:]
+        num_slots = sum(segment['indices'].shape[0] for segment in segments)
+        self.restore_log_values(segments=segments)
+        self.log_modified.assign(value=tf.zeros_like(input=self.log_modified), read_value=False)
+
+        segment = int(filenames[-1][len('segment-'):-len('.npz')]) + 1
+        self.log_states[directory] = (self.buffer_index.numpy().item(), num_slots, segment)
+        return True
+
+    def log_values(self, *, indices):
+        # Values of log variables at the given buffer slots, plus log state variables
+        values = {
+            name: tf.gather(params=variable, indices=indices).numpy()
+            for name, variable in self.log_variables().items()
+        }
+        values.update(
+            (name, variable.numpy()) for name, variable in self.log_state_variables().items()
+        )
+        return values
+
+    def restore_log_values(self, *, segments):
+        # Replays log segments in order, starting with a snapshot
+        variables = self.log_variables()
+        values = {name: variable.numpy() for name, variable in variables.items()}
+        for segment in segments:
+            indices = segment['indices']
+            for name, value in values.items():
+                value[indices] = segment[name]
+        for name, variable in variables.items():
+            variable.assign(value=values[name], read_value=False)
+        for name, variable in self.log_state_variables().items():
+            variable.assign(value=segments[-1][name], read_value=False)
@@ -26,6 +26,12 @@ class Recent(Queue):
     Args:
         capacity (int > 0): Memory capacity
             (<span style="color:#00C000"><b>default</b></span>: minimum capacity).
+        storage ("compact" | dict[value -> "compact" | storage type]): Storage type per value
+            name, see `Queue`
+            (<span style="color:#00C000"><b>default</b></span>: specification types).
+        frame_stack (dict[state -> int > 1 | dict]): Stacked-frame states to store as single
+            frames, see `Queue`
+            (<span style="color:#00C000"><b>default</b></span>: no stacked-frame states).
         device (string): Device name
             (<span style="color:#00C000"><b>default</b></span>: CPU:0).
         name (string): <span style="color:#0000C0"><b>internal use</b></span>.
@@ -72,8 +78,8 @@ class Recent(Queue):
             n = tf.math.minimum(x=n, y=self.episode_count)
 
             # (Increment terminal of previous episode)
-            start = self.terminal_indices[self.episode_count - n] + one
-            limit = self.terminal_indices[self.episode_count] + one
+            start = self.gather_terminals(positions=(self.episode_count - n)) + one
+            limit = self.gather_terminals(positions=self.episode_count) + one
 
             # Correct limit index if smaller than start index
             limit = limit + tf.where(condition=(limit < start), x=capacity, y=zero)
@@ -15,7 +15,8 @@
 
 import tensorflow as tf
 
-from tensorforce.core import tf_function, tf_util
+from tensorforce import TensorforceError
+from tensorforce.core import TensorSpec, tf_function, tf_util
 from tensorforce.core.memories import Queue
 
 
@@ -23,9 +24,30 @@ class Replay(Queue):
     """
     Replay memory which randomly retrieves experiences (specification key: `replay`).
 
+    By default, the memory retains the most recent experiences and retrieves timesteps uniformly,
+    so long episodes contribute proportionally more timesteps. With `sampling="episodes"`,
+    timesteps are retrieved by first sampling an episode uniformly, then a timestep uniformly
+    within the episode. With `retention="reservoir"`, once the memory is full, each new episode
+    is only stored with probability capacity / number of timesteps seen so far (decided at its
+    first timestep, per parallel interaction), so the retained episodes span an increasingly long
+    history instead of only the most recent timesteps. Episodes are still stored contiguously and
+    overwrite the oldest episodes, as required for horizon-based retrieval.
+
     Args:
         capacity (int > 0): Memory capacity
             (<span style="color:#00C000"><b>default</b></span>: minimum capacity).
+        storage ("compact" | dict[value -> "compact" | storage type]): Storage type per value
+            name, see `Queue`
+            (<span style="color:#00C000"><b>default</b></span>: specification types).
+        frame_stack (dict[state -> int > 1 | dict]): Stacked-frame states to store as single
+            frames, see `Queue`
+            (<span style="color:#00C000"><b>default</b></span>: no stacked-frame states).
+        sampling ("uniform" | "episodes"): Whether to retrieve timesteps uniformly, or uniformly
+            within uniformly sampled episodes
+            (<span style="color:#00C000"><b>default</b></span>: "uniform").
+        retention ("fifo" | "reservoir"): Whether to always store new episodes, or to store new
+            episodes with reservoir sampling probability once the memory is full
+            (<span style="color:#00C000"><b>default</b></span>: "fifo").
         device (string): Device name
             (<span style="color:#00C000"><b>default</b></span>: CPU:0).
         name (string): <span style="color:#0000C0"><b>internal use</b></span>.
@@ -33,8 +55,137 @@ class Replay(Queue):
         min_capacity (int >= 0): <span style="color:#0000C0"><b>internal use</b></span>.
     """
 
+    # (requires capacity as first argument)
+    def __init__(
+        self, capacity=None, *, storage=None, frame_stack=None, sampling='uniform',
+        retention='fifo', device='CPU:0', name=None, values_spec=None, min_capacity=None
+    ):
+        super().__init__(
+            capacity=capacity, storage=storage, frame_stack=frame_stack, device=device, name=name,
+            values_spec=values_spec, min_capacity=min_capacity
+        )
+
+        if sampling not in ('uniform', 'episodes'):
+            raise TensorforceError.value(
+                name='replay', argument='sampling', value=sampling,
+                hint='not in {uniform,episodes}'
+            )
+        self.sampling = sampling
+
+        if retention not in ('fifo', 'reservoir'):
+            raise TensorforceError.value(
+                name='replay', argument='retention', value=retention,
+                hint='not in {fifo,reservoir}'
+            )
+        self.retention = retention
+
+    def initialize(self):
+        super().initialize()
+
+        if self.retention == 'reservoir':
+            # Number of timesteps seen, including timesteps which were not stored
+            self.num_seen = self.variable(
+                name='num-seen', spec=TensorSpec(type='int'), initializer='zeros',
+                is_trainable=False, is_saved=True
+            )
+
+            # Whether the current episode per parallel interaction (plus one for experience) is
+            # stored (1), not stored (-1), or not yet decided (0)
+            self.episode_stored = self.variable(
+                name='episode-stored',
+                spec=TensorSpec(type='int', shape=(self.root.parallel_interactions + 1,)),
+                initializer='zeros', is_trainable=False, is_saved=True
+            )
+
+    def log_state_variables(self):
+        variables = super().log_state_variables()
+        if self.retention == 'reservoir':
+            variables['num-seen'] = self.num_seen
+            variables['episode-stored'] = self.episode_stored
+        return variables
+
+    @tf_function(num_args=0)
+    def reset(self):
+        reset = super().reset()
+
+        if self.retention == 'reservoir':
+            # Aborted episodes are decided anew
+            with tf.control_dependencies(control_inputs=(reset,)):
+                assignment = self.episode_stored.assign(
+                    value=tf.zeros_like(input=self.episode_stored), read_value=False
+                )
+            with tf.control_dependencies(control_inputs=(assignment,)):
+                reset = tf.identity(input=reset)
+
+        return reset
+
+    @tf_function(num_args=8, optional=1)
+    def enqueue(
+        self, *, states, internals, auxiliaries, actions, terminal, reward, parallel,
+        bootstrap_horizon=None
+    ):
+        if self.retention == 'fifo':
+            return super().enqueue(
+                states=states, internals=internals, auxiliaries=auxiliaries, actions=actions,
+                terminal=terminal, reward=reward, parallel=parallel,
+                bootstrap_horizon=bootstrap_horizon
+            )
+
+        zero = tf_util.constant(value=0, dtype='int')
+        one = tf_util.constant(value=1, dtype='int')
+        capacity = tf_util.constant(value=self.capacity, dtype='int')
+        num_timesteps = tf_util.cast(x=tf.shape(input=terminal)[0], dtype='int')
+
+        # Experience (negative parallel) uses the last slot
+        parallel = tf.where(
+            condition=(parallel < zero),
+            x=tf_util.constant(value=self.root.parallel_interactions, dtype='int'), y=parallel
+        )
+
+        # Decide whether to store an episode at its first timesteps, with probability
+        # capacity / number of timesteps seen (always while the memory is not full)
+        stored = tf.gather(params=self.episode_stored, indices=parallel)
+        probability = tf_util.cast(x=capacity, dtype='float') / tf_util.cast(
+            x=tf.math.maximum(x=self.num_seen, y=one), dtype='float'
+        )
+        is_stored = tf.math.less(
+            x=tf.random.uniform(shape=(), dtype=tf_util.get_dtype(type='float')), y=probability
+        )
+        stored = tf.where(
+            condition=tf.math.equal(x=stored, y=zero),
+            x=tf.where(condition=is_stored, x=one, y=-one), y=stored
+        )
+
+        def enqueue():
+            enqueued = super(Replay, self).enqueue(
+                states=states, internals=internals, auxiliaries=auxiliaries, actions=actions,
+                terminal=terminal, reward=reward, parallel=parallel,
+                bootstrap_horizon=bootstrap_horizon
+            )
+            with tf.control_dependencies(control_inputs=(enqueued,)):
+                return tf.identity(input=enqueued)
+
+        enqueued = tf.cond(
+            pred=tf.math.equal(x=stored, y=one), true_fn=enqueue,
+            false_fn=(lambda: tf_util.constant(value=False, dtype='bool'))
+        )
+
+        # Episode is decided anew after its terminal
+        with tf.control_dependencies(control_inputs=(enqueued,)):
+            is_terminal = tf.math.reduce_any(input_tensor=tf.math.greater(x=terminal, y=zero))
+            stored = tf.where(condition=is_terminal, x=zero, y=stored)
+            sparse_delta = tf.IndexedSlices(values=stored, indices=parallel)
+            assignments = [
+                self.episode_stored.scatter_update(sparse_delta=sparse_delta),
+                self.num_seen.assign_add(delta=num_timesteps, read_value=False)
+            ]
+
+        with tf.control_dependencies(control_inputs=assignments):
+            return zero < zero
+
     @tf_function(num_args=3)
     def retrieve_timesteps(self, *, n, past_horizon, future_horizon):
+        zero = tf_util.constant(value=0, dtype='int')
         one = tf_util.constant(value=1, dtype='int')
         capacity = tf_util.constant(value=self.capacity, dtype='int')
 
@@ -51,12 +202,51 @@ class Replay(Queue):
         # Randomly sampled timestep indices
         with tf.control_dependencies(control_inputs=assertions):
             n = tf.math.minimum(x=n, y=num_timesteps)
-            indices = tf.random.uniform(
-                shape=(n,), maxval=num_timesteps, dtype=tf_util.get_dtype(type='int')
-            )
-            indices = tf.math.mod(
-                x=(self.buffer_index - one - indices - future_horizon), y=capacity
-            )
+
+            if self.sampling == 'uniform':
+                ages = tf.random.uniform(
+                    shape=(n,), maxval=num_timesteps, dtype=tf_util.get_dtype(type='int')
+                )
+                ages += future_horizon
+
+            else:
+                # Age ranges of episodes ending at terminal indices (oldest episode possibly
+                # partially overwritten), plus timesteps of the current episode, restricted to
+                # valid timesteps
+                num_stored = tf.math.minimum(x=self.buffer_index, y=capacity)
+                terminals = self.gather_terminals(positions=tf.range(self.episode_count + one))
+                terminal_ages = tf.math.mod(x=(self.buffer_index - one - terminals), y=capacity)
+                starts = tf.math.maximum(
+                    x=tf.concat(values=(terminal_ages, [zero]), axis=0), y=future_horizon
+                )
+                limits = tf.math.minimum(
+                    x=tf.concat(values=([num_stored], terminal_ages), axis=0),
+                    y=(future_horizon + num_timesteps)
+                )
+                lengths = tf.math.maximum(x=(limits - starts), y=zero)
+
+                # Uniformly sampled non-empty episodes
+                is_nonempty = tf_util.cast(x=(lengths > zero), dtype='int')
+                num_episodes = tf.math.reduce_sum(input_tensor=is_nonempty)
+                num_episodes = tf.math.maximum(x=num_episodes, y=one)
+                episodes = tf.random.uniform(
+                    shape=(n,), maxval=num_episodes, dtype=tf_util.get_dtype(type='int')
+                )
+                episodes = tf.searchsorted(
+                    sorted_sequence=tf.math.cumsum(x=is_nonempty), values=episodes, side='right',
+                    out_type=tf_util.get_dtype(type='int')
+                )
+
+                # Uniformly sampled timesteps within episodes
+                lengths = tf.gather(params=lengths, indices=episodes)
+                offsets = tf_util.cast(
+                    x=(tf.random.uniform(shape=(n,), dtype=tf_util.get_dtype(type='float')) *
+                       tf_util.cast(x=lengths, dtype='float')), dtype='int'
+                )
+                offsets = tf.math.minimum(x=offsets, y=(lengths - one))
+                ages = tf.gather(params=starts, indices=episodes) + offsets
+
+            indices = tf.math.mod(x=(self.buffer_index - one - ages), y=capacity)
 
         return indices
 
@@ -79,8 +269,8 @@ class Replay(Queue):
             )
 
             # (Increment terminal of previous episode)
-            starts = tf.gather(params=self.terminal_indices, indices=random_indices) + one
-            limits = tf.gather(params=self.terminal_indices, indices=(random_indices + one)) + one
+            starts = self.gather_terminals(positions=random_indices) + one
+            limits = self.gather_terminals(positions=(random_indices + one)) + one
 
             # Correct limit index if smaller than start index
             limits = limits + tf.where(condition=(limits < starts), x=capacity, y=zero)
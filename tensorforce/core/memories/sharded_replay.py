@@ -0,0 +1,381 @@
+# Copyright 2020 Tensorforce Team. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+
+import tensorflow as tf
+
+from tensorforce import TensorforceError
+from tensorforce.core import ModuleDict, TensorDict, tf_function, tf_util
+from tensorforce.core.memories import Memory, Replay
+
+
+class ShardedReplay(Memory):
+    """
+    Replay memory split into shards which randomly retrieves experiences across shards
+    (specification key: `sharded_replay`).
+
+    Each shard is a replay memory with its own circular buffers, buffer index, terminal indices
+    and episode count, and each parallel interaction is assigned to one shard, so timesteps of
+    different parallel interactions are added independently of each other and shards can be
+    placed on different devices. Timesteps added via `experience()` are assigned to the shard
+    with the fewest timesteps added so far. Timesteps and episodes are retrieved uniformly across
+    all shards, so each shard contributes in proportion to its number of timesteps or episodes.
+    Buffer indices of shard `n` are given by `n * shard_capacity + index`.
+
+    Args:
+        capacity (int > 0): Memory capacity, divided equally among shards, each of which needs
+            to hold at least the minimum capacity
+            (<span style="color:#00C000"><b>default</b></span>: number of shards times minimum
+            capacity).
+        num_shards (int > 0): Number of shards, parallel interaction `i` is assigned to shard
+            `i % num_shards`
+            (<span style="color:#00C000"><b>default</b></span>: number of parallel
+            interactions).
+        storage ("compact" | dict[value -> "compact" | storage type]): Storage type per value
+            name, see `Queue`
+            (<span style="color:#00C000"><b>default</b></span>: specification types).
+        frame_stack (dict[state -> int > 1 | dict]): Stacked-frame states to store as single
+            frames, see `Queue`
+            (<span style="color:#00C000"><b>default</b></span>: no stacked-frame states).
+        devices (list[string]): Device name per shard
+            (<span style="color:#00C000"><b>default</b></span>: memory device for all shards).
+        device (string): Device name
+            (<span style="color:#00C000"><b>default</b></span>: CPU:0).
+        name (string): <span style="color:#0000C0"><b>internal use</b></span>.
+        values_spec (specification): <span style="color:#0000C0"><b>internal use</b></span>.
+        min_capacity (int >= 0): <span style="color:#0000C0"><b>internal use</b></span>.
+    """
+
+    # (requires capacity as first argument)
+    def __init__(
+        self, capacity=None, *, num_shards=None, storage=None, frame_stack=None, devices=None,
+        device='CPU:0', name=None, values_spec=None, min_capacity=None
+    ):
+        super().__init__(
+            device=device, name=name, values_spec=values_spec, min_capacity=min_capacity
+        )
+
+        if num_shards is None:
+            self.num_shards = self.root.parallel_interactions
+        elif not isinstance(num_shards, int) or num_shards < 1:
+            raise TensorforceError.value(
+                name='sharded_replay', argument='num_shards', value=num_shards, hint='< 1'
+            )
+        else:
+            self.num_shards = num_shards
+
+        if capacity is None:
+            if self.min_capacity is None:
+                raise TensorforceError.required(
+                    name='memory', argument='capacity', condition='unknown minimum capacity'
+                )
+            self.shard_capacity = self.min_capacity
+        else:
+            self.shard_capacity = capacity // self.num_shards
+        self.capacity = self.num_shards * self.shard_capacity
+
+        if devices is None:
+            devices = [None for _ in range(self.num_shards)]
+        elif not isinstance(devices, (list, tuple)):
+            raise TensorforceError.type(
+                name='sharded_replay', argument='devices', dtype=type(devices)
+            )
+        elif len(devices) != self.num_shards:
+            raise TensorforceError.value(
+                name='sharded_replay', argument='devices', value=devices,
+                hint='length not equal to number of shards'
+            )
+
+        # (shards check minimum capacity)
+        self.shards = ModuleDict()
+        for n, shard_device in enumerate(devices):
+            self.shards['shard' + str(n)] = self.submodule(
+                name=('shard' + str(n)), module=Replay, is_trainable=False,
+                capacity=self.shard_capacity, storage=storage, frame_stack=frame_stack,
+                device=shard_device, values_spec=values_spec, min_capacity=min_capacity
+            )
+
+    def partition(self, *, indices):
+        # Positions within indices and shard buffer indices, per shard
+        shard_capacity = tf_util.constant(value=self.shard_capacity, dtype='int')
+        partitions = tf_util.int32(x=tf.math.floordiv(x=indices, y=shard_capacity))
+        positions = tf.dynamic_partition(
+            data=tf.range(tf.shape(input=indices)[0]), partitions=partitions,
+            num_partitions=self.num_shards
+        )
+        shard_indices = tf.dynamic_partition(
+            data=tf.math.mod(x=indices, y=shard_capacity), partitions=partitions,
+            num_partitions=self.num_shards
+        )
+        return positions, shard_indices
+
+    def sample_shards(self, *, counts, n):
+        # Uniformly sampled items across shards, given number of items per shard, as pairs of
+        # shard and item index within shard
+        cumulative_counts = tf.math.cumsum(x=counts)
+        samples = tf.random.uniform(
+            shape=(n,), maxval=cumulative_counts[-1], dtype=tf_util.get_dtype(type='int')
+        )
+        shards = tf.searchsorted(
+            sorted_sequence=tf.expand_dims(input=cumulative_counts, axis=0),
+            values=tf.expand_dims(input=samples, axis=0), side='right',
+            out_type=tf_util.get_dtype(type='int')
+        )
+        shards = tf.squeeze(input=shards, axis=0)
+        samples -= tf.gather(params=(cumulative_counts - counts), indices=shards)
+        return shards, samples
+
+    def successor_indices(self, *, indices, offsets):
+        # Buffer indices the given number of timesteps after indices, within the same shard
+        shard_capacity = tf_util.constant(value=self.shard_capacity, dtype='int')
+        shard_starts = indices - tf.math.mod(x=indices, y=shard_capacity)
+        return shard_starts + tf.math.mod(x=(indices + offsets), y=shard_capacity)
+
+    @tf_function(num_args=0)
+    def reset(self):
+        zero = tf_util.constant(value=0, dtype='int')
+        one = tf_util.constant(value=1, dtype='int')
+        resets = [shard.reset() for shard in self.shards.values()]
+        with tf.control_dependencies(control_inputs=resets):
+            return one < zero
+
+    @tf_function(num_args=8, optional=1)
+    def enqueue(
+        self, *, states, internals, auxiliaries, actions, terminal, reward, parallel,
+        bootstrap_horizon=None
+    ):
+        zero = tf_util.constant(value=0, dtype='int')
+        num_shards = tf_util.constant(value=self.num_shards, dtype='int')
+
+        # Shard of parallel interaction, otherwise shard with fewest timesteps added so far
+        buffer_indices = tf.stack(values=[shard.buffer_index for shard in self.shards.values()])
+        shard = tf.where(
+            condition=tf.math.greater_equal(x=parallel, y=zero),
+            x=tf.math.mod(x=parallel, y=num_shards),
+            y=tf.math.argmin(input=buffer_indices, output_type=tf_util.get_dtype(type='int'))
+        )
+
+        values = dict(
+            states=states, internals=internals, auxiliaries=auxiliaries, actions=actions,
+            terminal=terminal, reward=reward, parallel=parallel
+        )
+        if bootstrap_horizon is not None:
+            values['bootstrap_horizon'] = bootstrap_horizon
+
+        def enqueue_shard(shard):
+            return (lambda: shard.enqueue(**values))
+
+        branch_fns = [enqueue_shard(shard=shard) for shard in self.shards.values()]
+        return tf.switch_case(branch_index=tf_util.int32(x=shard), branch_fns=branch_fns)
+
+    @tf_function(num_args=1)
+    def retrieve(self, *, indices, values):
+        assert isinstance(values, tuple)
+        positions, shard_indices = self.partition(indices=indices)
+        shard_values = [
+            shard.retrieve(indices=_indices, values=values)
+            for shard, _indices in zip(self.shards.values(), shard_indices)
+        ]
+        function = (lambda *xs: tf.dynamic_stitch(indices=positions, data=xs))
+        return shard_values[0].fmap(function=function, cls=TensorDict, zip_values=shard_values[1:])
+
+    def shard_sequences(self, *, function, indices, horizon, sequence_values, boundary_values):
+        # Applies successors/predecessors per shard, and combines results in order of indices
+        zero = tf_util.constant(value=0, dtype='int')
+        positions, shard_indices = self.partition(indices=indices)
+        if function == 'successors':
+            boundary_argument = 'final_values'
+        else:
+            boundary_argument = 'initial_values'
+
+        lengths = list()
+        sequence_starts = list()
+        sequences = list()
+        boundaries = list()
+        offset = zero
+        for shard, _indices in zip(self.shards.values(), shard_indices):
+            results = getattr(shard, function)(
+                indices=_indices, horizon=horizon, sequence_values=sequence_values,
+                **{boundary_argument: boundary_values}
+            )
+            if len(sequence_values) == 0:
+                if len(boundary_values) == 0:
+                    lengths.append(results)
+                else:
+                    lengths.append(results[0])
+                    boundaries.append(results[1])
+            else:
+                lengths.append(results[0][:, 1])
+                # Sequence values of shards are concatenated
+                sequence_starts.append(results[0][:, 0] + offset)
+                offset += tf.math.reduce_sum(input_tensor=results[0][:, 1])
+                sequences.append(results[1])
+                if len(boundary_values) > 0:
+                    boundaries.append(results[2])
+
+        lengths = tf.dynamic_stitch(indices=positions, data=lengths)
+        function = (lambda *xs: tf.dynamic_stitch(indices=positions, data=xs))
+        if len(boundary_values) > 0:
+            boundaries = boundaries[0].fmap(
+                function=function, cls=TensorDict, zip_values=boundaries[1:]
+            )
+
+        if len(sequence_values) == 0:
+            if len(boundary_values) == 0:
+                return lengths
+            else:
+                return lengths, boundaries
+
+        # Sequence values reordered according to indices
+        sequence_starts = tf.dynamic_stitch(indices=positions, data=sequence_starts)
+        sequence_indices = tf.ragged.range(
+            starts=sequence_starts, limits=(sequence_starts + lengths)
+        ).flat_values
+        function = (lambda *xs: tf.gather(
+            params=tf.concat(values=xs, axis=0), indices=sequence_indices
+        ))
+        sequences = sequences[0].fmap(function=function, cls=TensorDict, zip_values=sequences[1:])
+        starts = tf.math.cumsum(x=lengths, exclusive=True)
+        starts_lengths = tf.stack(values=(starts, lengths), axis=1)
+
+        if len(boundary_values) == 0:
+            return starts_lengths, sequences
+        else:
+            return starts_lengths, sequences, boundaries
+
+    @tf_function(num_args=2)
+    def successors(self, *, indices, horizon, sequence_values, final_values):
+        assert isinstance(sequence_values, tuple)
+        assert isinstance(final_values, tuple)
+        return self.shard_sequences(
+            function='successors', indices=indices, horizon=horizon,
+            sequence_values=sequence_values, boundary_values=final_values
+        )
+
+    @tf_function(num_args=2)
+    def predecessors(self, *, indices, horizon, sequence_values, initial_values):
+        assert isinstance(sequence_values, tuple)
+        assert isinstance(initial_values, tuple)
+        return self.shard_sequences(
+            function='predecessors', indices=indices, horizon=horizon,
+            sequence_values=sequence_values, boundary_values=initial_values
+        )
+
+    @tf_function(num_args=3)
+    def retrieve_timesteps(self, *, n, past_horizon, future_horizon):
+        zero = tf_util.constant(value=0, dtype='int')
+        one = tf_util.constant(value=1, dtype='int')
+        shard_capacity = tf_util.constant(value=self.shard_capacity, dtype='int')
+
+        # Number of valid timesteps per shard, where shards with fewer timesteps than the horizons
+        # are skipped unless all are, in which case episode counts are used as for replay memory
+        buffer_indices = tf.stack(values=[shard.buffer_index for shard in self.shards.values()])
+        episode_counts = tf.stack(values=[shard.episode_count for shard in self.shards.values()])
+        num_timesteps = tf.math.minimum(x=buffer_indices, y=shard_capacity)
+        num_timesteps -= (past_horizon + future_horizon)
+        num_timesteps = tf.math.maximum(x=num_timesteps, y=zero)
+        num_timesteps = tf.where(
+            condition=tf.math.greater(x=tf.math.reduce_sum(input_tensor=num_timesteps), y=zero),
+            x=num_timesteps, y=tf.math.maximum(x=num_timesteps, y=episode_counts)
+        )
+
+        # Check whether memory contains at least one valid timestep
+        assertions = list()
+        if self.config.create_tf_assertions:
+            assertions.append(tf.debugging.assert_greater_equal(
+                x=tf.math.reduce_sum(input_tensor=num_timesteps), y=one
+            ))
+
+        # Randomly sampled timestep indices across shards
+        with tf.control_dependencies(control_inputs=assertions):
+            n = tf.math.minimum(x=n, y=tf.math.reduce_sum(input_tensor=num_timesteps))
+            shards, indices = self.sample_shards(counts=num_timesteps, n=n)
+            indices = tf.math.mod(
+                x=(tf.gather(params=buffer_indices, indices=shards) - one - indices -
+                   future_horizon),
+                y=shard_capacity
+            )
+
+        return shards * shard_capacity + indices
+
+    @tf_function(num_args=1)
+    def retrieve_episodes(self, *, n):
+        zero = tf_util.constant(value=0, dtype='int')
+        one = tf_util.constant(value=1, dtype='int')
+        shard_capacity = tf_util.constant(value=self.shard_capacity, dtype='int')
+
+        num_terminals = tf_util.constant(value=(self.shard_capacity + 1), dtype='int')
+        episode_counts = tf.stack(values=[shard.episode_count for shard in self.shards.values()])
+        terminal_indices = tf.stack(
+            values=[shard.terminal_indices for shard in self.shards.values()]
+        )
+        terminal_starts = tf.stack(
+            values=[shard.terminal_start for shard in self.shards.values()]
+        )
+
+        # Check whether memory contains at least one episode
+        assertions = list()
+        if self.config.create_tf_assertions:
+            assertions.append(tf.debugging.assert_greater_equal(
+                x=tf.math.reduce_sum(input_tensor=episode_counts), y=one
+            ))
+
+        # Get start and limit indices for randomly sampled n episodes across shards
+        with tf.control_dependencies(control_inputs=assertions):
+            n = tf.math.minimum(x=n, y=tf.math.reduce_sum(input_tensor=episode_counts))
+            shards, random_indices = self.sample_shards(counts=episode_counts, n=n)
+
+            # Positions in circular terminal indices buffers of shards
+            positions = tf.math.mod(
+                x=(tf.gather(params=terminal_starts, indices=shards) + random_indices),
+                y=num_terminals
+            )
+
+            # (Increment terminal of previous episode)
+            starts = tf.gather_nd(
+                params=terminal_indices, indices=tf.stack(values=(shards, positions), axis=1)
+            ) + one
+            positions = tf.math.mod(x=(positions + one), y=num_terminals)
+            limits = tf.gather_nd(
+                params=terminal_indices, indices=tf.stack(values=(shards, positions), axis=1)
+            ) + one
+
+            # Correct limit index if smaller than start index
+            limits = limits + tf.where(condition=(limits < starts), x=shard_capacity, y=zero)
+
+            # Random episode indices ranges
+            indices = tf.ragged.range(starts=starts, limits=limits)
+            shards = tf.repeat(input=shards, repeats=indices.row_lengths())
+            indices = tf.math.mod(x=indices.values, y=shard_capacity)
+
+        return shards * shard_capacity + indices
+
+    def save_log(self, *, directory):
+        """
+        Appends a segment to the memory log of each shard, see `Queue.save_log`.
+
+        Returns:
+            Paths of the log segments.
+        """
+        return [shard.save_log(directory=directory) for shard in self.shards.values()]
+
+    def restore_log(self, *, directory):
+        """
+        Restores all shards from their memory logs, see `Queue.restore_log`.
+
+        Returns:
+            True if the logs of all shards were restored.
+        """
+        restored = [shard.restore_log(directory=directory) for shard in self.shards.values()]
+        return all(restored)
@@ -0,0 +1,339 @@
+# Copyright 2020 Tensorforce Team. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+
+from concurrent.futures import ThreadPoolExecutor
+import os
+
+import numpy as np
+import tensorflow as tf
+
+from tensorforce import TensorforceError
+from tensorforce.core import TensorSpec, tf_function, tf_util
+from tensorforce.core.memories import Replay
+
+
+class TieredReplay(Replay):
+    """
+    Replay memory with a hot in-memory tier for the most recent experiences and a cold tier of
+    memory-mapped files on local disk, for capacities beyond memory (specification key:
+    `tiered_replay`).
+
+    All values except terminal (and bootstrap horizon) are written through to the cold tier, while
+    only the most recent `hot_capacity` timesteps are additionally kept as variables, so only
+    terminal and episode bookkeeping is part of checkpoints, and the cold files in `directory`
+    have to be kept alongside. Retrieved indices are served from the hot tier where possible, and
+    from the cold tier via one batched read per value otherwise. Timestep indices are sampled one
+    update ahead, and the cold rows of the next batch including past/future horizon are read by a
+    background thread while the current update runs (sampled indices which became invalid in the
+    meantime are resampled and read directly).
+
+    Args:
+        capacity (int > 0): Memory capacity
+            (<span style="color:#00C000"><b>default</b></span>: minimum capacity).
+        directory (path): Directory for memory-mapped cold tier files, reused if existing
+            (<span style="color:#C00000"><b>required</b></span>).
+        hot_capacity (int > 0): Capacity of in-memory hot tier
+            (<span style="color:#00C000"><b>default</b></span>: 1/16 of capacity, at least
+            minimum capacity).
+        storage ("compact" | dict[value -> "compact" | storage type]): Storage type per value
+            name, see `Queue`
+            (<span style="color:#00C000"><b>default</b></span>: specification types).
+        frame_stack (dict[state -> int > 1 | dict]): Stacked-frame states to store as single
+            frames, see `Queue`
+            (<span style="color:#00C000"><b>default</b></span>: no stacked-frame states).
+        device (string): Device name
+            (<span style="color:#00C000"><b>default</b></span>: CPU:0).
+        name (string): <span style="color:#0000C0"><b>internal use</b></span>.
+        values_spec (specification): <span style="color:#0000C0"><b>internal use</b></span>.
+        min_capacity (int >= 0): <span style="color:#0000C0"><b>internal use</b></span>.
+    """
+
+    # Small per-timestep values which are only kept in memory
+    MEMORY_VALUES = ('terminal', 'bootstrap_horizon')
+
+    def __init__(
+        self, capacity=None, *, directory=None, hot_capacity=None, storage=None, frame_stack=None,
+        device='CPU:0', name=None, values_spec=None, min_capacity=None
+    ):
+        super().__init__(
+            capacity=capacity, storage=storage, frame_stack=frame_stack, device=device, name=name,
+            values_spec=values_spec, min_capacity=min_capacity
+        )
+
+        if directory is None:
+            raise TensorforceError.required(name='tiered_replay', argument='directory')
+        self.directory = directory
+
+        if hot_capacity is None:
+            self.hot_capacity = min(
+                max(self.capacity // 16, self.min_capacity or 1), self.capacity
+            )
+        elif not isinstance(hot_capacity, int) or hot_capacity <= 0 or \
+                hot_capacity > self.capacity:
+            raise TensorforceError.value(
+                name='tiered_replay', argument='hot_capacity', value=hot_capacity,
+                hint='not in (0, capacity]'
+            )
+        else:
+            self.hot_capacity = hot_capacity
+
+        self.cold_storage = ColdStorage(
+            directory=directory, capacity=self.capacity, seed=self.config.seed
+        )
+
+    def buffer_variable(self, *, name, spec):
+        if name in self.__class__.MEMORY_VALUES:
+            return super().buffer_variable(name=name, spec=spec)
+
+        self.cold_storage.add(
+            name=name, shape=spec.shape, dtype=spec.tf_type().as_numpy_dtype,
+            filename='{}-{}.npy'.format(self.name, name.replace('/', '_'))
+        )
+        # Hot tier is a cache of the cold tier, hence not saved
+        spec = TensorSpec(type=spec.tf_type(), shape=((self.hot_capacity,) + spec.shape))
+        return self.variable(
+            name=(name + '-hot-buffer'), spec=spec, initializer='zeros', is_trainable=False,
+            is_saved=False
+        )
+
+    def initialize(self):
+        super().initialize()
+
+        # Number of timesteps written to hot tier (reset on restore, then served from cold tier)
+        self.hot_count = self.variable(
+            name='hot-count', spec=TensorSpec(type='int'), initializer='zeros',
+            is_trainable=False, is_saved=False
+        )
+
+    def log_variables(self):
+        # Cold tier files are written through, so only values kept in memory are logged
+        variables = super().log_variables()
+        return {
+            name: variable for name, variable in variables.items()
+            if not name.startswith('buffer/') or name[7:] in self.__class__.MEMORY_VALUES
+        }
+
+    def save_log(self, *, directory):
+        self.cold_storage.flush()
+        return super().save_log(directory=directory)
+
+    def restore_log(self, *, directory):
+        if not super().restore_log(directory=directory):
+            return False
+        self.hot_count.assign(value=0, read_value=False)
+        return True
+
+    def gather_buffer(self, *, name, buffer, indices):
+        if name in self.__class__.MEMORY_VALUES:
+            return super().gather_buffer(name=name, buffer=buffer, indices=indices)
+
+        one = tf_util.constant(value=1, dtype='int')
+        capacity = tf_util.constant(value=self.capacity, dtype='int')
+        hot_capacity = tf_util.constant(value=self.hot_capacity, dtype='int')
+        shape = tf.shape(input=indices)
+        indices = tf.reshape(tensor=indices, shape=(-1,))
+
+        # Absolute positions, and whether in hot tier
+        positions = self.buffer_index - one - tf.math.mod(
+            x=(self.buffer_index - one - indices), y=capacity
+        )
+        num_hot = tf.math.minimum(x=self.hot_count, y=hot_capacity)
+        is_hot = tf.math.greater(x=positions, y=(self.buffer_index - one - num_hot))
+        values = tf.gather(params=buffer, indices=tf.math.mod(x=positions, y=hot_capacity))
+
+        # Batched cold tier read
+        is_cold = tf.math.logical_not(x=is_hot)
+        cold_values = tf.numpy_function(
+            func=(lambda i, p: self.cold_storage.read(name=name, indices=i, positions=p)),
+            inp=(
+                tf.boolean_mask(tensor=indices, mask=is_cold),
+                tf.boolean_mask(tensor=positions, mask=is_cold)
+            ), Tout=buffer.dtype
+        )
+        cold_values.set_shape(shape=((None,) + tuple(buffer.shape[1:])))
+        values = tf.tensor_scatter_nd_update(
+            tensor=values, indices=tf.where(condition=is_cold), updates=cold_values
+        )
+
+        return tf.reshape(
+            tensor=values, shape=tf.concat(values=(shape, tf.shape(input=buffer)[1:]), axis=0)
+        )
+
+    def scatter_buffer(self, *, name, buffer, indices, value):
+        if name in self.__class__.MEMORY_VALUES:
+            return super().scatter_buffer(name=name, buffer=buffer, indices=indices, value=value)
+
+        capacity = tf_util.constant(value=self.capacity, dtype='int')
+        hot_capacity = tf_util.constant(value=self.hot_capacity, dtype='int')
+
+        # Write through to cold tier
+        written = tf.numpy_function(
+            func=(lambda i, v: self.cold_storage.write(name=name, indices=i, values=v)),
+            inp=(indices, value), Tout=tf_util.get_dtype(type='bool')
+        )
+
+        # Indices are the next slots starting at buffer index
+        positions = self.buffer_index + tf.math.mod(x=(indices - self.buffer_index), y=capacity)
+        sparse_delta = tf.IndexedSlices(
+            values=value, indices=tf.math.mod(x=positions, y=hot_capacity)
+        )
+        with tf.control_dependencies(control_inputs=(written,)):
+            return buffer.scatter_update(sparse_delta=sparse_delta)
+
+    @tf_function(num_args=8, optional=1)
+    def enqueue(
+        self, *, states, internals, auxiliaries, actions, terminal, reward, parallel,
+        bootstrap_horizon=None
+    ):
+        num_timesteps = tf_util.cast(x=tf.shape(input=terminal)[0], dtype='int')
+
+        enqueued = super().enqueue(
+            states=states, internals=internals, auxiliaries=auxiliaries, actions=actions,
+            terminal=terminal, reward=reward, parallel=parallel, bootstrap_horizon=bootstrap_horizon
+        )
+
+        with tf.control_dependencies(control_inputs=(enqueued,)):
+            assignment = self.hot_count.assign_add(delta=num_timesteps, read_value=False)
+
+        with tf.control_dependencies(control_inputs=(assignment,)):
+            return tf_util.identity(input=enqueued)
+
+    @tf_function(num_args=3)
+    def retrieve_timesteps(self, *, n, past_horizon, future_horizon):
+        one = tf_util.constant(value=1, dtype='int')
+        capacity = tf_util.constant(value=self.capacity, dtype='int')
+
+        # Check whether memory contains at least one valid timestep
+        num_timesteps = tf.math.minimum(x=self.buffer_index, y=capacity)
+        num_timesteps -= (past_horizon + future_horizon)
+        num_timesteps = tf.math.maximum(x=num_timesteps, y=self.episode_count)
+
+        # Check whether memory contains at least one timestep
+        assertions = list()
+        if self.config.create_tf_assertions:
+            assertions.append(tf.debugging.assert_greater_equal(x=num_timesteps, y=one))
+
+        # Randomly sampled timestep indices, one update ahead to prefetch cold tier rows
+        with tf.control_dependencies(control_inputs=assertions):
+            n = tf.math.minimum(x=n, y=num_timesteps)
+            indices = tf.numpy_function(
+                func=self.cold_storage.sample,
+                inp=(n, past_horizon, future_horizon, num_timesteps, self.buffer_index),
+                Tout=tf_util.get_dtype(type='int')
+            )
+            indices.set_shape(shape=(None,))
+
+        return indices
+
+
+class ColdStorage(object):
+    """
+    Memory-mapped cold tier files, plus timestep sampling with background prefetching.
+    """
+
+    def __init__(self, directory, capacity, seed=None):
+        self.directory = directory
+        self.capacity = capacity
+        # Sampling based on agent seed, independent of global NumPy random state
+        self.random = np.random.RandomState(seed=seed)
+        self.arrays = dict()
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.next_positions = None
+        self.prefetched = None
+        self.staged = dict()
+
+    def add(self, name, shape, dtype, filename):
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, filename)
+        shape = (self.capacity,) + tuple(shape)
+        array = None
+        if os.path.isfile(path):
+            array = np.lib.format.open_memmap(filename=path, mode='r+')
+            if array.shape != shape or array.dtype != dtype:
+                array = None
+        if array is None:
+            array = np.lib.format.open_memmap(filename=path, mode='w+', dtype=dtype, shape=shape)
+        self.arrays[name] = array
+
+    def flush(self):
+        for array in self.arrays.values():
+            array.flush()
+
+    def write(self, name, indices, values):
+        self.arrays[name][indices] = values
+        return np.asarray(True)
+
+    def read(self, name, indices, positions):
+        array = self.arrays[name]
+        values = np.empty(shape=((indices.shape[0],) + array.shape[1:]), dtype=array.dtype)
+        # Rows prefetched for the current batch
+        staged_positions, staged_values = self.staged.get(name, (None, None))
+        if staged_positions is not None and staged_positions.shape[0] > 0:
+            staged = np.minimum(
+                np.searchsorted(staged_positions, positions), staged_positions.shape[0] - 1
+            )
+            is_staged = (staged_positions[staged] == positions)
+            values[is_staged] = staged_values[staged[is_staged]]
+            is_read = np.logical_not(is_staged)
+        else:
+            is_read = np.ones_like(indices, dtype=np.bool_)
+        # Remaining rows read in sorted order
+        if is_read.any():
+            read_indices = indices[is_read]
+            order = np.argsort(read_indices)
+            rows = np.empty(shape=((read_indices.shape[0],) + array.shape[1:]), dtype=array.dtype)
+            rows[order] = array[read_indices[order]]
+            values[is_read] = rows
+        return values
+
+    def sample(self, n, past_horizon, future_horizon, num_timesteps, buffer_index):
+        # Previously sampled positions, resampled if not valid anymore
+        max_age = future_horizon + num_timesteps
+        if self.next_positions is not None and self.next_positions.shape[0] == n:
+            ages = buffer_index - 1 - self.next_positions
+            is_invalid = np.logical_or(ages < future_horizon, ages >= max_age)
+            ages[is_invalid] = self.random.randint(
+                low=future_horizon, high=max_age, size=is_invalid.sum()
+            )
+        else:
+            ages = self.random.randint(low=future_horizon, high=max_age, size=n)
+        positions = buffer_index - 1 - ages
+
+        # Rows of current batch prefetched during the previous update
+        self.staged = self.prefetched.result() if self.prefetched is not None else dict()
+
+        # Sample next positions, and prefetch rows including horizons in the background
+        ages = self.random.randint(low=future_horizon, high=max_age, size=n)
+        self.next_positions = buffer_index - 1 - ages
+        offsets = np.arange(-past_horizon, future_horizon + 1)
+        prefetch_positions = np.unique(
+            np.expand_dims(self.next_positions, axis=1) + np.expand_dims(offsets, axis=0)
+        )
+        prefetch_positions = prefetch_positions[
+            (prefetch_positions >= 0) & (prefetch_positions < buffer_index)
+        ]
+        self.prefetched = self.executor.submit(self.prefetch, prefetch_positions)
+
+        return (positions % self.capacity).astype(np.int64)
+
+    def prefetch(self, positions):
+        indices = positions % self.capacity
+        order = np.argsort(indices)
+        staged = dict()
+        for name, array in self.arrays.items():
+            values = np.empty(shape=((positions.shape[0],) + array.shape[1:]), dtype=array.dtype)
+            values[order] = array[indices[order]]
+            staged[name] = (positions, values)
+        return staged
@@ -22,10 +22,11 @@ import h5py
 import numpy as np
 import tensorflow as tf
 
-from tensorforce import TensorforceError
+from tensorforce import TensorforceError, util
 from tensorforce.core import ArrayDict, Module, SignatureDict, TensorDict, TensorSpec, \
     TensorsSpec, tf_function, tf_util, VariableDict
 from tensorforce.core.layers import Layer
+from tensorforce.core.module import CompiledFunction
 
 
 class Model(Module):
@@ -35,7 +36,8 @@ class Model(Module):
         summarizer, tracking
     ):
         # Initialize global registries
-        setattr(Module, '_MODULE_STACK', list())
+        setattr(Module, '_MODULE_STACK', util.ThreadLocalStack())
+        setattr(Module, '_CONTEXT_STACK', util.ThreadLocalStack())
         setattr(Layer, '_REGISTERED_LAYERS', OrderedDict())
 
         # Tensorforce config
@@ -147,15 +149,20 @@ class Model(Module):
             self.saver = None
         elif not all(key in (
             'directory', 'filename', 'frequency', 'load', 'max_checkpoints', 'max_hour_frequency',
-            'unit'
+            'memory', 'unit'
         ) for key in saver):
             raise TensorforceError.value(
                 name='agent', argument='saver', value=list(saver),
                 hint='not from {directory,filename,frequency,load,max_checkpoints,'
-                     'max_hour_frequency,unit}'
+                     'max_hour_frequency,memory,unit}'
             )
         elif 'directory' not in saver:
             raise TensorforceError.required(name='agent', argument='saver[directory]')
+        elif saver.get('memory', 'checkpoint') not in ('checkpoint', 'incremental'):
+            raise TensorforceError.value(
+                name='agent', argument='saver[memory]', value=saver['memory'],
+                hint='not in {checkpoint,incremental}'
+            )
         else:
             self.saver = dict(saver)
 
@@ -215,6 +222,7 @@ class Model(Module):
         if self.summarizer is not None:
             self.summarizer.close()
         delattr(Module, '_MODULE_STACK')
+        delattr(Module, '_CONTEXT_STACK')
         delattr(Layer, '_REGISTERED_LAYERS')
 
     def __enter__(self):
@@ -224,13 +232,11 @@ class Model(Module):
         else:
             # Hack: keep non-empty module stack from constructor
             assert len(Module._MODULE_STACK) == 1 and Module._MODULE_STACK[0] is self
-        self.device.__enter__()
-        self.name_scope.__enter__()
+        self.enter_contexts()
         return self
 
     def __exit__(self, etype, exception, traceback):
-        self.name_scope.__exit__(etype, exception, traceback)
-        self.device.__exit__(etype, exception, traceback)
+        self.exit_contexts(etype=etype, exception=exception, traceback=traceback)
         popped = Module._MODULE_STACK.pop()
         assert popped is self
         assert self.is_initialized is not None
@@ -405,6 +411,16 @@ class Model(Module):
     def get_savedmodel_trackables(self):
         return dict()
 
+    def jit_compile(self, *, function):
+        if function == 'act' or function == 'independent_act':
+            return 'act' in self.config.jit_compile
+
+        elif function == 'observe':
+            return 'observe' in self.config.jit_compile
+
+        else:
+            return super().jit_compile(function=function)
+
     def input_signature(self, *, function):
         if function == 'act':
             return SignatureDict(
@@ -836,6 +852,8 @@ class Model(Module):
             assert hasattr(self, '_independent_act_graphs')
             assert len(self._independent_act_graphs) == 1
             independent_act = next(iter(self._independent_act_graphs.values()))
+            if isinstance(independent_act, CompiledFunction):
+                independent_act = independent_act.graph
 
             trackables = self.get_savedmodel_trackables()
             assert 'act' not in trackables and 'initial_internals' not in trackables
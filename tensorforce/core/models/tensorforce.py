@@ -20,6 +20,7 @@ import tensorflow as tf
 from tensorforce import TensorforceError
 from tensorforce.core import ModuleDict, memory_modules, optimizer_modules, parameter_modules, \
     SignatureDict, TensorDict, TensorSpec, TensorsSpec, tf_function, tf_util, VariableDict
+from tensorforce.core.memories import PrioritizedReplay
 from tensorforce.core.models import Model
 from tensorforce.core.networks import Preprocessor
 from tensorforce.core.objectives import objective_modules
@@ -376,6 +377,17 @@ class TensorforceModel(Model):
         self.initial_internals['policy'] = self.policy.internals_init()
         self.objective.internals_spec = self.policy.internals_spec
 
+        # Acting policy, a copy of the policy which is synchronized after each asynchronous update
+        if self.config.async_update is False:
+            self.acting_policy = self.policy
+        else:
+            self.acting_policy = self.submodule(
+                name='acting_policy', module=policy, modules=policy_modules,
+                default_module=default_module, is_trainable=False, is_saved=False,
+                states_spec=self.processed_states_spec, auxiliaries_spec=self.auxiliaries_spec,
+                actions_spec=self.actions_spec
+            )
+
         if not self.entropy_regularization.is_constant(value=0.0) and \
                 not isinstance(self.policy, StochasticPolicy):
             raise TensorforceError.invalid(
@@ -430,6 +442,59 @@ class TensorforceModel(Model):
                 raise TensorforceError.exists(name='value name', value=name)
             self.value_names.add(name)
 
+        # Memory
+        values_spec = TensorsSpec(
+            states=self.processed_states_spec, internals=self.internals_spec,
+            auxiliaries=self.auxiliaries_spec, actions=self.actions_spec,
+            terminal=self.terminal_spec, reward=self.reward_spec
+        )
+        # Number of timesteps until bootstrapped horizon value, stored on enqueue
+        self.precompute_bootstrap = (
+            self.config.precompute_bootstrap and self.predict_horizon_values == 'late' and
+            self.reward_horizon != 'episode' and
+            self.baseline.max_past_horizon(on_policy=False) == 0
+        )
+        if self.precompute_bootstrap:
+            values_spec['bootstrap_horizon'] = TensorSpec(type='int', shape=())
+        if self.update_unit == 'timesteps':
+            max_past_horizon = max(
+                self.policy.max_past_horizon(on_policy=False),
+                self.baseline.max_past_horizon(on_policy=False)
+            )
+            min_capacity = self.update_batch_size.max_value() + 1 + max_past_horizon
+            if self.reward_horizon == 'episode':
+                min_capacity += self.max_episode_timesteps
+            else:
+                min_capacity += self.reward_horizon.max_value()
+            if self.max_episode_timesteps is not None:
+                min_capacity = max(min_capacity, self.max_episode_timesteps)
+        elif self.update_unit == 'episodes':
+            if self.max_episode_timesteps is None:
+                min_capacity = None
+            else:
+                min_capacity = (self.update_batch_size.max_value() + 1) * self.max_episode_timesteps
+        else:
+            assert False
+        if self.config.buffer_observe == 'episode':
+            if self.max_episode_timesteps is not None:
+                min_capacity = max(min_capacity, 2 * self.max_episode_timesteps)
+        elif isinstance(self.config.buffer_observe, int):
+            if min_capacity is None:
+                min_capacity = 2 * self.config.buffer_observe
+            else:
+                min_capacity = max(min_capacity, 2 * self.config.buffer_observe)
+
+        self.memory = self.submodule(
+            name='memory', module=memory, modules=memory_modules, is_trainable=False,
+            is_saved=(self.saver is None or self.saver.get('memory', 'checkpoint') == 'checkpoint'),
+            values_spec=values_spec, min_capacity=min_capacity
+        )
+        self.is_prioritized = isinstance(self.memory, PrioritizedReplay)
+        if self.is_prioritized and self.update_unit != 'timesteps':
+            raise TensorforceError.invalid(
+                name='agent', argument='memory', condition='update unit is not timesteps'
+            )
+
         # Optimizers
         if baseline_optimizer is None:
             self.baseline_loss_weight = None
@@ -473,50 +538,15 @@ class TensorforceModel(Model):
             )
         else:
             arguments_spec['reference'] = self.objective.reference_spec()
+        if self.is_prioritized:
+            # Importance sampling weights and memory indices of prioritized replay
+            arguments_spec['weights'] = TensorSpec(type='float', shape=())
+            arguments_spec['indices'] = TensorSpec(type='int', shape=())
         self.optimizer = self.submodule(
             name='policy_optimizer', module=optimizer, modules=optimizer_modules,
             arguments_spec=arguments_spec
         )
 
-        # Memory
-        values_spec = TensorsSpec(
-            states=self.processed_states_spec, internals=self.internals_spec,
-            auxiliaries=self.auxiliaries_spec, actions=self.actions_spec,
-            terminal=self.terminal_spec, reward=self.reward_spec
-        )
-        if self.update_unit == 'timesteps':
-            max_past_horizon = max(
-                self.policy.max_past_horizon(on_policy=False),
-                self.baseline.max_past_horizon(on_policy=False)
-            )
-            min_capacity = self.update_batch_size.max_value() + 1 + max_past_horizon
-            if self.reward_horizon == 'episode':
-                min_capacity += self.max_episode_timesteps
-            else:
-                min_capacity += self.reward_horizon.max_value()
-            if self.max_episode_timesteps is not None:
-                min_capacity = max(min_capacity, self.max_episode_timesteps)
-        elif self.update_unit == 'episodes':
-            if self.max_episode_timesteps is None:
-                min_capacity = None
-            else:
-                min_capacity = (self.update_batch_size.max_value() + 1) * self.max_episode_timesteps
-        else:
-            assert False
-        if self.config.buffer_observe == 'episode':
-            if self.max_episode_timesteps is not None:
-                min_capacity = max(min_capacity, 2 * self.max_episode_timesteps)
-        elif isinstance(self.config.buffer_observe, int):
-            if min_capacity is None:
-                min_capacity = 2 * self.config.buffer_observe
-            else:
-                min_capacity = max(min_capacity, 2 * self.config.buffer_observe)
-
-        self.memory = self.submodule(
-            name='memory', module=memory, modules=memory_modules, is_trainable=False,
-            values_spec=values_spec, min_capacity=min_capacity
-        )
-
         # GAE discount
         gae_discount = reward_estimation.get('gae_discount')
         if gae_discount is None:
@@ -543,6 +573,17 @@ class TensorforceModel(Model):
             min_value=0.0, max_value=1.0
         )
 
+    @property
+    def trainable_variables(self):
+        # Acting policy variables are synchronized, not trained
+        variables = super().trainable_variables
+        if self.acting_policy is not self.policy:
+            acting_variables = {variable.ref() for variable in self.acting_policy.variables}
+            variables = tuple(
+                variable for variable in variables if variable.ref() not in acting_variables
+            )
+        return variables
+
     def initialize(self):
         super().initialize()
 
@@ -670,7 +711,7 @@ class TensorforceModel(Model):
 
     def get_savedmodel_trackables(self):
         trackables = super().get_savedmodel_trackables()
-        for name, trackable in self.policy.get_savedmodel_trackables().items():
+        for name, trackable in self.acting_policy.get_savedmodel_trackables().items():
             assert name not in trackables
             trackables[name] = trackable
         if self.separate_baseline and len(self.internals_spec['baseline']) > 0:
@@ -679,6 +720,36 @@ class TensorforceModel(Model):
                 trackables[name] = trackable
         return trackables
 
+    def save(self, *, directory=None, filename=None, format='checkpoint', append=None):
+        path = super().save(directory=directory, filename=filename, format=format, append=append)
+
+        # Incremental memory log, unless periodic saver skipped the checkpoint
+        if not self.memory.is_saved and format != 'saved-model' and path is not None:
+            if directory is None:
+                directory = self.saver_directory
+            self.memory.save_log(directory=directory)
+
+        return path
+
+    def restore(self, *, directory=None, filename=None, format='checkpoint'):
+        if not self.memory.is_saved and format != 'saved-model':
+            if directory is None and self.saver is not None:
+                self.memory.restore_log(directory=self.saver_directory)
+            elif directory is not None:
+                self.memory.restore_log(directory=directory)
+
+        return super().restore(directory=directory, filename=filename, format=format)
+
+    def jit_compile(self, *, function):
+        if function == 'experience':
+            return 'observe' in self.config.jit_compile
+
+        elif function == 'update':
+            return 'update' in self.config.jit_compile
+
+        else:
+            return super().jit_compile(function=function)
+
     def input_signature(self, *, function):
         if function == 'baseline_loss':
             if self.separate_baseline:
@@ -715,7 +786,8 @@ class TensorforceModel(Model):
                 auxiliaries=self.auxiliaries_spec.signature(batched=True),
                 actions=self.actions_spec.signature(batched=True),
                 terminal=self.terminal_spec.signature(batched=True),
-                reward=self.reward_spec.signature(batched=True)
+                reward=self.reward_spec.signature(batched=True),
+                parallel=self.parallel_spec.signature(batched=False)
             )
 
         elif function == 'core_update':
@@ -734,7 +806,7 @@ class TensorforceModel(Model):
         elif function == 'loss':
             if self.baseline_objective is not None and self.baseline_loss_weight is not None and \
                     not self.baseline_loss_weight.is_constant(value=0.0):
-                return SignatureDict(
+                signature = SignatureDict(
                     states=self.processed_states_spec.signature(batched=True),
                     horizons=TensorSpec(type='int', shape=(2,)).signature(batched=True),
                     internals=self.internals_spec.signature(batched=True),
@@ -747,7 +819,7 @@ class TensorforceModel(Model):
                     )
                 )
             elif self.baseline_optimizer is None:
-                return SignatureDict(
+                signature = SignatureDict(
                     states=self.processed_states_spec.signature(batched=True),
                     horizons=TensorSpec(type='int', shape=(2,)).signature(batched=True),
                     internals=self.internals_spec.signature(batched=True),
@@ -757,7 +829,7 @@ class TensorforceModel(Model):
                     reference=self.objective.reference_spec().signature(batched=True)
                 )
             else:
-                return SignatureDict(
+                signature = SignatureDict(
                     states=self.processed_states_spec.signature(batched=True),
                     horizons=TensorSpec(type='int', shape=(2,)).signature(batched=True),
                     internals=self.internals_spec['policy'].signature(batched=True),
@@ -766,6 +838,10 @@ class TensorforceModel(Model):
                     reward=self.reward_spec.signature(batched=True),
                     reference=self.objective.reference_spec().signature(batched=True)
                 )
+            if self.is_prioritized:
+                signature['weights'] = TensorSpec(type='float', shape=()).signature(batched=True)
+                signature['indices'] = TensorSpec(type='int', shape=()).signature(batched=True)
+            return signature
 
         elif function == 'regularize':
             return SignatureDict(
@@ -778,6 +854,9 @@ class TensorforceModel(Model):
         elif function == 'update':
             return SignatureDict()
 
+        elif function == 'synchronize_acting_policy':
+            return SignatureDict()
+
         else:
             return super().input_signature(function=function)
 
@@ -813,6 +892,11 @@ class TensorforceModel(Model):
                 singleton=TensorSpec(type='int', shape=()).signature(batched=False)
             )
 
+        elif function == 'synchronize_acting_policy':
+            return SignatureDict(
+                singleton=TensorSpec(type='bool', shape=()).signature(batched=False)
+            )
+
         else:
             return super().output_signature(function=function)
 
@@ -824,12 +908,29 @@ class TensorforceModel(Model):
         if self.circular_buffer:
             operations.append(self.buffer_start.assign(value=zeros, read_value=False))
         operations.append(self.memory.reset())
+        operations.extend(self.acting_policy_assignments())
 
         # TODO: Synchronization optimizer initial sync?
 
         with tf.control_dependencies(control_inputs=operations):
             return super().reset()
 
+    @tf_function(num_args=0)
+    def synchronize_acting_policy(self):
+        assignments = self.acting_policy_assignments()
+
+        with tf.control_dependencies(control_inputs=assignments):
+            return tf_util.constant(value=False, dtype='bool')
+
+    def acting_policy_assignments(self):
+        # Copy policy variables to acting policy
+        if self.acting_policy is self.policy:
+            return list()
+        return [
+            target.assign(value=source, read_value=False)
+            for source, target in zip(self.policy.variables, self.acting_policy.variables)
+        ]
+
     @tf_function(num_args=6)
     def experience(self, *, states, internals, auxiliaries, actions, terminal, reward):
         true = tf_util.constant(value=True, dtype='bool')
@@ -905,10 +1006,11 @@ class TensorforceModel(Model):
                     x=reward, deterministic=true, independent=False
                 )
 
-            # Core experience
+            # Core experience (not from a parallel interaction)
             experienced = self.core_experience(
                 states=states, internals=internals, auxiliaries=auxiliaries, actions=actions,
-                terminal=terminal, reward=reward
+                terminal=terminal, reward=reward,
+                parallel=tf_util.constant(value=-1, dtype='int')
             )
 
         # Increment timestep and episode
@@ -950,7 +1052,7 @@ class TensorforceModel(Model):
                 assertions.append(tf.debugging.assert_equal(x=deterministic, y=false))
 
         # Variable noise
-        if len(self.policy.trainable_variables) > 0 and (
+        if len(self.acting_policy.trainable_variables) > 0 and (
             (not independent and not self.variable_noise.is_constant(value=0.0)) or
             (independent and self.variable_noise.final_value() != 0.0)
         ):
@@ -962,11 +1064,13 @@ class TensorforceModel(Model):
                 variable_noise = self.variable_noise.value()
 
             def no_variable_noise():
-                return [tf.zeros_like(input=var) for var in self.policy.trainable_variables]
+                return [
+                    tf.zeros_like(input=var) for var in self.acting_policy.trainable_variables
+                ]
 
             def apply_variable_noise():
                 variable_noise_tensors = list()
-                for variable in self.policy.trainable_variables:
+                for variable in self.acting_policy.trainable_variables:
                     noise = tf.random.normal(
                         shape=tf_util.shape(x=variable), mean=0.0, stddev=variable_noise,
                         dtype=self.variable_noise.spec.tf_type()
@@ -1003,7 +1107,7 @@ class TensorforceModel(Model):
             lengths = tf_util.ones(shape=(batch_size,), dtype='int')
             horizons = tf.stack(values=(starts, lengths), axis=1)
             next_internals = TensorDict()
-            actions, next_internals['policy'] = self.policy.act(
+            actions, next_internals['policy'] = self.acting_policy.act(
                 states=states, horizons=horizons, internals=internals['policy'],
                 auxiliaries=auxiliaries, deterministic=deterministic, independent=independent
             )
@@ -1030,7 +1134,9 @@ class TensorforceModel(Model):
 
                 def apply_variable_noise():
                     assignments = list()
-                    for var, noise in zip(self.policy.trainable_variables, variable_noise_tensors):
+                    for var, noise in zip(
+                        self.acting_policy.trainable_variables, variable_noise_tensors
+                    ):
                         assignments.append(var.assign_sub(delta=noise, read_value=False))
                     return tf.group(*assignments)
 
@@ -1284,7 +1390,7 @@ class TensorforceModel(Model):
                 # Experience
                 return self.core_experience(
                     states=states, internals=internals, auxiliaries=auxiliaries,
-                    actions=actions, terminal=terminal, reward=reward
+                    actions=actions, terminal=terminal, reward=reward, parallel=parallel
                 )
 
         elif self.reward_horizon == 'episode' or self.parallel_interactions > 1:
@@ -1330,7 +1436,7 @@ class TensorforceModel(Model):
                 # Experience
                 return self.core_experience(
                     states=states, internals=internals, auxiliaries=auxiliaries,
-                    actions=actions, terminal=_terminal, reward=_reward
+                    actions=actions, terminal=_terminal, reward=_reward, parallel=parallel
                 )
 
         else:
@@ -1429,10 +1535,18 @@ class TensorforceModel(Model):
                 actions = self.actions_buffer.fmap(function=function, cls=TensorDict)
                 _terminal = function(self.terminal_buffer)
 
-                experienced = self.memory.enqueue(
-                    states=states, internals=internals, auxiliaries=auxiliaries, actions=actions,
-                    terminal=_terminal, reward=_reward
-                )
+                if self.precompute_bootstrap:
+                    # Complete timesteps are bootstrapped after full horizon
+                    experienced = self.memory.enqueue(
+                        states=states, internals=internals, auxiliaries=auxiliaries,
+                        actions=actions, terminal=_terminal, reward=_reward, parallel=parallel,
+                        bootstrap_horizon=tf.fill(dims=(num_complete,), value=reward_horizon)
+                    )
+                else:
+                    experienced = self.memory.enqueue(
+                        states=states, internals=internals, auxiliaries=auxiliaries,
+                        actions=actions, terminal=_terminal, reward=_reward, parallel=parallel
+                    )
 
                 with tf.control_dependencies(control_inputs=(experienced,)):
                     sparse_delta = tf.IndexedSlices(values=num_complete, indices=parallel)
@@ -1485,7 +1599,7 @@ class TensorforceModel(Model):
                 # Experience
                 experienced = self.core_experience(
                     states=states, internals=internals, auxiliaries=auxiliaries,
-                    actions=actions, terminal=_terminal, reward=_reward
+                    actions=actions, terminal=_terminal, reward=_reward, parallel=parallel
                 )
                 sparse_delta = tf.IndexedSlices(values=zero, indices=parallel)
                 assignment = self.buffer_start.scatter_update(sparse_delta=sparse_delta)
@@ -1583,7 +1697,11 @@ class TensorforceModel(Model):
                 def perform_update():
                     assignment = self.last_update.assign(value=unit, read_value=False)
                     with tf.control_dependencies(control_inputs=(assignment,)):
-                        return self.core_update()
+                        if self.config.async_update is False:
+                            return self.core_update()
+                        else:
+                            # Update is performed by the asynchronous learner
+                            return tf_util.identity(input=true)
 
                 def no_update():
                     return tf_util.constant(value=False, dtype='bool')
@@ -1595,8 +1713,10 @@ class TensorforceModel(Model):
         with tf.control_dependencies(control_inputs=dependencies):
             return tf_util.identity(input=updated)
 
-    @tf_function(num_args=6)
-    def core_experience(self, *, states, internals, auxiliaries, actions, terminal, reward):
+    @tf_function(num_args=7)
+    def core_experience(
+        self, *, states, internals, auxiliaries, actions, terminal, reward, parallel
+    ):
         zero = tf_util.constant(value=0, dtype='int')
         one = tf_util.constant(value=1, dtype='int')
         discount = self.reward_discount.value()
@@ -1776,10 +1896,22 @@ class TensorforceModel(Model):
             # branch_fns = ((lambda: reward), full_episode_horizon, partial_episode_horizon)
             # reward = tf.switch_case(branch_index=branch_index, branch_fns=branch_fns)
 
-        return self.memory.enqueue(
-            states=states, internals=internals, auxiliaries=auxiliaries, actions=actions,
-            terminal=terminal, reward=reward
-        )
+        if self.precompute_bootstrap:
+            # Bootstrapped after full horizon, or at the final timestep
+            bootstrap_horizon = tf.math.minimum(
+                x=reward_horizon, y=(episode_length - one - tf.range(episode_length))
+            )
+            return self.memory.enqueue(
+                states=states, internals=internals, auxiliaries=auxiliaries, actions=actions,
+                terminal=terminal, reward=reward, parallel=parallel,
+                bootstrap_horizon=bootstrap_horizon
+            )
+
+        else:
+            return self.memory.enqueue(
+                states=states, internals=internals, auxiliaries=auxiliaries, actions=actions,
+                terminal=terminal, reward=reward, parallel=parallel
+            )
 
     @tf_function(num_args=0)
     def core_update(self):
@@ -1916,11 +2048,31 @@ class TensorforceModel(Model):
                 _lengths = tf_util.ones(shape=(_batch_size,), dtype='int')
                 _horizons = tf.stack(values=(_starts, _lengths), axis=1)
 
+                if self.precompute_bootstrap:
+                    # Stored number of timesteps until bootstrapped horizon value
+                    bootstrap_horizon = self.memory.retrieve(
+                        indices=indices, values=('bootstrap_horizon',)
+                    )['bootstrap_horizon']
+                    final_indices = self.memory.successor_indices(
+                        indices=indices, offsets=bootstrap_horizon
+                    )
+
+                def final_successors(final_values):
+                    if self.precompute_bootstrap:
+                        final_values = self.memory.retrieve(
+                            indices=final_indices, values=final_values
+                        )
+                        return bootstrap_horizon + one, final_values
+                    else:
+                        return self.memory.successors(
+                            indices=indices, horizon=reward_horizon, sequence_values=(),
+                            final_values=final_values
+                        )
+
                 if self.predict_action_values and self.separate_baseline:
                     # TODO: remove restriction
                     assert self.policy.max_past_horizon(on_policy=False) == 0
-                    final_horizons, _final_values = self.memory.successors(
-                        indices=indices, horizon=reward_horizon, sequence_values=(),
+                    final_horizons, _final_values = final_successors(
                         final_values=('states', 'internals', 'auxiliaries', 'terminal')
                     )
                     _states = _final_values['states']
@@ -1931,8 +2083,7 @@ class TensorforceModel(Model):
                     _baseline_internals = _internals['baseline']
                 elif self.separate_baseline:
                     if len(self.internals_spec['baseline']) > 0:
-                        final_horizons, _final_values = self.memory.successors(
-                            indices=indices, horizon=reward_horizon, sequence_values=(),
+                        final_horizons, _final_values = final_successors(
                             final_values=('states', 'internals/baseline', 'auxiliaries', 'terminal')
                         )
                         _states = _final_values['states']
@@ -1940,8 +2091,7 @@ class TensorforceModel(Model):
                         _auxiliaries = _final_values['auxiliaries']
                         _terminal = _final_values['terminal']
                     else:
-                        final_horizons, _final_values = self.memory.successors(
-                            indices=indices, horizon=reward_horizon, sequence_values=(),
+                        final_horizons, _final_values = final_successors(
                             final_values=('states', 'auxiliaries', 'terminal')
                         )
                         _states = _final_values['states']
@@ -1950,8 +2100,7 @@ class TensorforceModel(Model):
                         _baseline_internals = TensorDict()
                 else:
                     if len(self.internals_spec['policy']) > 0:
-                        final_horizons, _final_values = self.memory.successors(
-                            indices=indices, horizon=reward_horizon, sequence_values=(),
+                        final_horizons, _final_values = final_successors(
                             final_values=('states', 'internals/policy', 'auxiliaries', 'terminal')
                         )
                         _states = _final_values['states']
@@ -1959,8 +2108,7 @@ class TensorforceModel(Model):
                         _auxiliaries = _final_values['auxiliaries']
                         _terminal = _final_values['terminal']
                     else:
-                        final_horizons, _final_values = self.memory.successors(
-                            indices=indices, horizon=reward_horizon, sequence_values=(),
+                        final_horizons, _final_values = final_successors(
                             final_values=('states', 'auxiliaries', 'terminal')
                         )
                         _states = _final_values['states']
@@ -2248,11 +2396,17 @@ class TensorforceModel(Model):
             states=policy_states, horizons=policy_horizons, internals=policy_internals,
             auxiliaries=auxiliaries, actions=actions, reward=reward, reference=reference
         )
+        if self.is_prioritized:
+            policy_arguments['weights'] = self.memory.importance_weights(indices=indices)
+            policy_arguments['indices'] = indices
 
         if self.estimate_advantage and self.advantage_in_loss:
             variables = tuple(self.trainable_variables)
 
-            def fn_loss(*, states, horizons, internals, auxiliaries, actions, reward, reference):
+            def fn_loss(
+                *, states, horizons, internals, auxiliaries, actions, reward, reference,
+                weights=None, indices=None
+            ):
                 assertions = list()
                 if self.config.create_tf_assertions:
                     past_horizon = self.baseline.past_horizon(on_policy=False)
@@ -2296,10 +2450,15 @@ class TensorforceModel(Model):
                                 step='updates'
                             )
 
+                kwargs = dict()
+                if weights is not None:
+                    kwargs['weights'] = weights
+                    kwargs['indices'] = indices
                 with tf.control_dependencies(control_inputs=dependencies):
                     return self.loss(
                         states=states, horizons=horizons, internals=internals,
-                        auxiliaries=auxiliaries, actions=actions, reward=reward, reference=reference
+                        auxiliaries=auxiliaries, actions=actions, reward=reward, reference=reference,
+                        **kwargs
                     )
 
         else:
@@ -2307,7 +2466,8 @@ class TensorforceModel(Model):
             fn_loss = self.loss
 
         def fn_kl_divergence(
-            *, states, horizons, internals, auxiliaries, actions, reward, reference
+            *, states, horizons, internals, auxiliaries, actions, reward, reference, weights=None,
+            indices=None
         ):
             if self.baseline_optimizer is None:
                 internals = internals['policy']
@@ -2433,8 +2593,11 @@ class TensorforceModel(Model):
         with tf.control_dependencies(control_inputs=dependencies):
             return tf_util.identity(input=optimized)
 
-    @tf_function(num_args=7)
-    def loss(self, *, states, horizons, internals, auxiliaries, actions, reward, reference):
+    @tf_function(num_args=9, optional=2)
+    def loss(
+        self, *, states, horizons, internals, auxiliaries, actions, reward, reference, weights=None,
+        indices=None
+    ):
         if self.baseline_optimizer is None:
             policy_internals = internals['policy']
         else:
@@ -2452,8 +2615,17 @@ class TensorforceModel(Model):
             baseline=(self.baseline if self.separate_baseline else None)
         )
 
-        # Objective loss
-        loss = tf.math.reduce_mean(input_tensor=loss, axis=0)
+        # Prioritized replay: new priorities given by per-instance absolute TD error of the
+        # objective, objective loss weighted by importance sampling weights
+        dependencies = list()
+        if weights is not None:
+            priorities = self.objective.td_error(loss=tf.stop_gradient(input=loss))
+            dependencies.append(
+                self.memory.update_priorities(indices=indices, priorities=priorities)
+            )
+            loss = loss * weights
+        with tf.control_dependencies(control_inputs=dependencies):
+            loss = tf.math.reduce_mean(input_tensor=loss, axis=0)
         dependencies = self.summary(
             label='loss', name='losses/policy-objective-loss', data=loss, step='updates'
         )
@@ -16,6 +16,7 @@
 import functools
 import importlib
 import json
+import logging
 import os
 import re
 
@@ -44,27 +45,122 @@ def make_key(*, x):
             raise exc
 
 
+class CompiledFunction(object):
+    """
+    XLA-compiled function graph, which falls back to the non-compiled function graph if compilation
+    fails on the first call, for instance due to operations not supported by XLA. The function is
+    compiled as a whole before any operation is executed, so the failed call has no side effects.
+    """
+
+    # Error messages indicating that the function graph cannot be compiled by XLA, as opposed to
+    # errors of the function itself which are raised as usual
+    COMPILATION_ERRORS = (
+        'Detected unsupported operations when trying to compile graph',
+        'must be a compile-time constant', 'not supported by XLA', 'XLA compilation requires',
+        'not implemented by XLA'
+    )
+
+    def __init__(self, *, function, **kwargs):
+        self.name = function.__qualname__
+        self.graph = tf.function(func=function, experimental_compile=True, **kwargs)
+        self.fallback = functools.partial(tf.function, func=function, **kwargs)
+        self.is_checked = False
+
+    def __call__(self, *args):
+        if self.is_checked or tf.inside_function():
+            # Compilation errors within an outer function graph are raised by the outer call
+            return self.graph(*args)
+
+        try:
+            outputs = self.graph(*args)
+        except (tf.errors.InvalidArgumentError, tf.errors.UnimplementedError) as exc:
+            if not any(error in exc.message for error in self.__class__.COMPILATION_ERRORS):
+                raise
+            logging.warning(
+                "XLA compilation of {} failed, falling back to non-compiled graph: {}".format(
+                    self.name, exc.message.split('\n', 1)[0]
+                )
+            )
+            self.graph = self.fallback()
+            outputs = self.graph(*args)
+        self.is_checked = True
+        return outputs
+
+    def get_concrete_function(self, *args, **kwargs):
+        return self.graph.get_concrete_function(*args, **kwargs)
+
+
 def tf_function(
     *, num_args, optional=0, overwrites_signature=False, is_loop_body=False, dict_interface=False
 ):
 
     def decorator(function):
 
+        def function_graphs(self):
+            # Parameters-to-graph mapping
+            name = function.__name__
+            if not hasattr(self, '_{name}_graphs'.format(name=name)):
+                setattr(self, '_{name}_graphs'.format(name=name), dict())
+                assert function.__qualname__.endswith('.' + name)
+                setattr(self, '_{name}_qualname'.format(name=name), function.__qualname__)
+            return (
+                getattr(self, '_{name}_graphs'.format(name=name)),
+                getattr(self, '_{name}_qualname'.format(name=name))
+            )
+
+        def concrete_function(self, **params_kwargs):
+            # Function graph for the given parameters, created if not yet existing, plus input
+            # and output signature
+            name = function.__name__
+            graphs, qualname = function_graphs(self)
+            input_signature = self.input_signature(function=name)
+            output_signature = self.output_signature(function=name)
+
+            # Graph parameters
+            graph_params = tuple(make_key(x=arg) for arg in params_kwargs.values())
+
+            # Check whether output_signature is parametrized
+            if not isinstance(output_signature, SignatureDict):
+                output_signature = output_signature(**params_kwargs)
+
+            # Function graph
+            if str(graph_params) not in graphs:
+
+                def function_graph(*args):
+                    with self:
+                        # TODO: tf.name_scope instead?
+                        kwargs = input_signature.args_to_kwargs(args=args, from_dict=dict_interface)
+                        args = function(self, **kwargs.to_kwargs(), **params_kwargs)
+                        args = output_signature.kwargs_to_args(kwargs=args, to_dict=dict_interface)
+                    return args
+
+                function_graph.__name__ = name
+                function_graph.__qualname__ = qualname
+
+                if self.jit_compile(function=name):
+                    graphs[str(graph_params)] = CompiledFunction(
+                        function=function_graph,
+                        input_signature=input_signature.to_list(to_dict=dict_interface),
+                        autograph=False
+                    )
+                else:
+                    graphs[str(graph_params)] = tf.function(
+                        func=function_graph,
+                        input_signature=input_signature.to_list(to_dict=dict_interface),
+                        autograph=False
+                        # experimental_implements=None, experimental_autograph_options=None,
+                        # experimental_relax_shapes=False
+                    )
+
+            return graphs[str(graph_params)], input_signature, output_signature
+
         def decorated(self, *args, **kwargs):
             assert len(args) == 0 or len(kwargs) == 0
             assert len(args) == 0 or len(args) == num_args
 
             # Function name and qualname
             name = function.__name__
-            qualname = function.__qualname__
-
-            # Parameters-to-graph mapping
-            if not hasattr(self, '_{name}_graphs'.format(name=name)):
-                setattr(self, '_{name}_graphs'.format(name=name), dict())
-                assert function.__qualname__.endswith('.' + name)
-                setattr(self, '_{name}_qualname'.format(name=name), function.__qualname__)
-            function_graphs = getattr(self, '_{name}_graphs'.format(name=name))
-            qualname = getattr(self, '_{name}_qualname'.format(name=name))
+            _, qualname = function_graphs(self)
 
             # Handle overwriting signature
             if overwrites_signature:
@@ -73,7 +169,6 @@ def tf_function(
 
             # Graph signature
             input_signature = self.input_signature(function=name)
-            output_signature = self.output_signature(function=name)
 
             # Apply raw function if qualname mismatch, which indicates super() call
             if function.__qualname__ != qualname:
@@ -96,36 +191,10 @@ def tf_function(
             params_kwargs = {
                 key: arg for key, arg in kwargs.items() if key not in input_signature
             }
-            graph_params = tuple(make_key(x=arg) for arg in params_kwargs.values())
-
-            # Check whether output_signature is parametrized
-            if not isinstance(output_signature, SignatureDict):
-                output_signature = output_signature(**params_kwargs)
-
-            # Function graph
-            if str(graph_params) not in function_graphs:
-
-                def function_graph(*args):
-                    with self:
-                        # TODO: tf.name_scope instead?
-                        kwargs = input_signature.args_to_kwargs(args=args, from_dict=dict_interface)
-                        args = function(self, **kwargs.to_kwargs(), **params_kwargs)
-                        args = output_signature.kwargs_to_args(kwargs=args, to_dict=dict_interface)
-                    return args
-
-                function_graph.__name__ = name
-                function_graph.__qualname__ = qualname
-
-                function_graphs[str(graph_params)] = tf.function(
-                    func=function_graph,
-                    input_signature=input_signature.to_list(to_dict=dict_interface),
-                    autograph=False
-                    # experimental_implements=None, experimental_autograph_options=None,
-                    # experimental_relax_shapes=False, experimental_compile=None
-                )
 
             # Apply function graph
-            output_args = function_graphs[str(graph_params)](*graph_args)
+            function_graph, _, output_signature = concrete_function(self, **params_kwargs)
+            output_args = function_graph(*graph_args)
             if not is_loop_body:
                 return output_signature.args_to_kwargs(
                     args=output_args, outer_tuple=True, from_dict=dict_interface
@@ -133,6 +202,8 @@ def tf_function(
             else:
                 return output_args
 
+        # Direct access to function graph, bypassing argument conversion
+        decorated.concrete_function = concrete_function
         return decorated
 
     return decorator
@@ -151,9 +222,10 @@ class Module(tf.Module):
     """
 
     _TF_MODULE_IGNORED_PROPERTIES = \
-        tf.Module._TF_MODULE_IGNORED_PROPERTIES | {'_MODULE_STACK', 'parent'}
+        tf.Module._TF_MODULE_IGNORED_PROPERTIES | {'_CONTEXT_STACK', '_MODULE_STACK', 'parent'}
 
     # _MODULE_STACK  # Initialized as part of model.__init__()
+    # _CONTEXT_STACK  # Initialized as part of model.__init__()
 
     def __init__(self, *, device=None, l2_regularization=None, name=None):
         name = name.replace('/', '_')
@@ -178,10 +250,7 @@ class Module(tf.Module):
             self.parent = None
 
         # Device
-        if device is None:
-            self.device = util.NullContext()
-        else:
-            self.device = tf.device(device_name=device)
+        self.device_name = device
 
         # L2 regularization
         if l2_regularization is None:
@@ -245,23 +314,43 @@ class Module(tf.Module):
                 variables.extend(module.saved_variables)
         return variables
 
-    def __enter__(self):
-        Module._MODULE_STACK.append(self)
-        self.device.__enter__()
+    @property
+    def _checkpoint_dependencies(self):
+        # Submodules which are not saved, like a memory with incremental log, are excluded from
+        # TensorFlow checkpoints
+        return [
+            reference for reference in super()._checkpoint_dependencies
+            if not isinstance(reference.ref, Module) or reference.ref.is_saved is not False
+        ]
+
+    def enter_contexts(self):
+        # New device and name scope contexts for every call, since their state is not shared
+        # across threads, like the acting thread and an asynchronous learner thread
+        if self.device_name is None:
+            device = util.NullContext()
+        else:
+            device = tf.device(device_name=self.device_name)
         assert isinstance(self.is_initialized, bool)
         if self.is_initialized:
-            self.name_scope.__enter__()
+            name_scope = tf.name_scope(name=self.name_scope.name)
         else:
-            self._proper_name_scope = tf.name_scope(name=self.name)
-            self._proper_name_scope.__enter__()
+            name_scope = tf.name_scope(name=self.name)
+        device.__enter__()
+        name_scope.__enter__()
+        Module._CONTEXT_STACK.append((device, name_scope))
+
+    def exit_contexts(self, etype, exception, traceback):
+        device, name_scope = Module._CONTEXT_STACK.pop()
+        name_scope.__exit__(etype, exception, traceback)
+        device.__exit__(etype, exception, traceback)
+
+    def __enter__(self):
+        Module._MODULE_STACK.append(self)
+        self.enter_contexts()
         return self
 
     def __exit__(self, etype, exception, traceback):
-        if self.is_initialized:
-            self.name_scope.__exit__(etype, exception, traceback)
-        else:
-            self._proper_name_scope.__exit__(etype, exception, traceback)
-        self.device.__exit__(etype, exception, traceback)
+        self.exit_contexts(etype=etype, exception=exception, traceback=traceback)
         popped = Module._MODULE_STACK.pop()
         assert popped is self
 
@@ -302,6 +391,10 @@ class Module(tf.Module):
             ):
                 raise exc
 
+    def jit_compile(self, *, function):
+        # Whether to XLA-compile the function graph
+        return False
+
     def input_signature(self, *, function):
         if function == 'regularize':
             return SignatureDict()
@@ -624,6 +717,10 @@ class Module(tf.Module):
                 dims=spec.shape, value=tf_util.constant(value=initialization_scale, dtype=spec.type)
             )
 
+        # Storage type different from default type, e.g. for compact memory buffers
+        if initializer.dtype != spec.tf_type():
+            initializer = tf.cast(x=initializer, dtype=spec.tf_type())
+
         # Variable
         variable = tf.Variable(
             initial_value=initializer, trainable=is_trainable, validate_shape=True, name=name,
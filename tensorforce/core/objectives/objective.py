@@ -96,3 +96,8 @@ class Objective(Module):
         baseline=None
     ):
         raise NotImplementedError
+
+    def td_error(self, *, loss):
+        # Per-instance TD error corresponding to per-instance loss, used as prioritized replay
+        # priority (by default, the loss itself)
+        return loss
@@ -162,3 +162,19 @@ class Value(Objective):
             loss = tf.math.reduce_sum(input_tensor=loss, axis=1)
 
         return loss
+
+    def td_error(self, *, loss):
+        # Absolute difference between value estimate and target, recovered from (Huber) loss
+        # (aggregated over actions if not early reduce)
+        two = tf_util.constant(value=2.0, dtype='float')
+        td_error = tf.math.sqrt(x=(two * loss))
+
+        if self.huber_loss is not None:
+            huber_loss = self.huber_loss.value()
+            half = tf_util.constant(value=0.5, dtype='float')
+            td_error = tf.where(
+                condition=tf.math.less_equal(x=td_error, y=huber_loss), x=td_error,
+                y=(loss / huber_loss + half * huber_loss)
+            )
+
+        return td_error
@@ -24,6 +24,7 @@ from tensorforce.core.optimizers.evolutionary import Evolutionary
 from tensorforce.core.optimizers.doublecheck_step import DoublecheckStep
 from tensorforce.core.optimizers.global_optimizer import GlobalOptimizer
 from tensorforce.core.optimizers.linesearch_step import LinesearchStep
+from tensorforce.core.optimizers.minibatch_step import MinibatchStep
 from tensorforce.core.optimizers.multi_step import MultiStep
 from tensorforce.core.optimizers.natural_gradient import NaturalGradient
 from tensorforce.core.optimizers.plus import Plus
@@ -37,9 +38,9 @@ from tensorforce.core.optimizers.optimizer_wrapper import OptimizerWrapper
 optimizer_modules = dict(
     clipping_step=ClippingStep, default=OptimizerWrapper, doublecheck_step=DoublecheckStep,
     evolutionary=Evolutionary, global_optimizer=GlobalOptimizer, linesearch_step=LinesearchStep,
-    multi_step=MultiStep, natural_gradient=NaturalGradient, optimizer_wrapper=OptimizerWrapper,
-    plus=Plus, subsampling_step=SubsamplingStep, synchronization=Synchronization,
-    tf_optimizer=TFOptimizer
+    minibatch_step=MinibatchStep, multi_step=MultiStep, natural_gradient=NaturalGradient,
+    optimizer_wrapper=OptimizerWrapper, plus=Plus, subsampling_step=SubsamplingStep,
+    synchronization=Synchronization, tf_optimizer=TFOptimizer
 )
 
 
@@ -50,6 +51,6 @@ for name, optimizer in tensorflow_optimizers.items():
 
 __all__ = [
     'ClippingStep', 'DoublecheckStep', 'Evolutionary', 'GlobalOptimizer', 'LinesearchStep',
-    'MultiStep', 'NaturalGradient', 'Optimizer', 'optimizer_modules', 'Plus', 'SubsamplingStep',
-    'Synchronization', 'TFOptimizer', 'UpdateModifier', 'UpdateModifierWrapper'
+    'MinibatchStep', 'MultiStep', 'NaturalGradient', 'Optimizer', 'optimizer_modules', 'Plus',
+    'SubsamplingStep', 'Synchronization', 'TFOptimizer', 'UpdateModifier', 'UpdateModifierWrapper'
 ]
@@ -85,4 +85,6 @@ class ClippingStep(UpdateModifier):
                 )
 
         with tf.control_dependencies(control_inputs=dependencies):
-            return [tf_util.identity(input=delta) for delta in clipped_deltas]
+            return self.step_output(
+                deltas=[tf_util.identity(input=delta) for delta in clipped_deltas]
+            )
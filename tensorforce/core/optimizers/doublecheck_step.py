@@ -51,4 +51,8 @@ class DoublecheckStep(UpdateModifier):
                     return [tf.zeros_like(input=delta) for delta in deltas]
 
             is_improvement = (loss_after < loss_before)
-            return tf.cond(pred=is_improvement, true_fn=(lambda: deltas), false_fn=reverse_update)
+            deltas = tf.cond(
+                pred=is_improvement, true_fn=(lambda: deltas), false_fn=reverse_update
+            )
+
+        return self.step_output(deltas=deltas)
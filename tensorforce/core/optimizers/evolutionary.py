@@ -88,10 +88,10 @@ class Evolutionary(Optimizer):
                     with tf.control_dependencies(control_inputs=assignments):
                         return [tf.math.negative(x=delta) for delta in deltas]
 
-                return tf.cond(
+                return self.step_output(deltas=tf.cond(
                     pred=(perturbed_loss < unperturbed_loss), true_fn=(lambda: deltas),
                     false_fn=negate_deltas
-                )
+                ))
 
         else:
             deltas = [tf.zeros_like(input=variable) for variable in variables]
@@ -154,4 +154,6 @@ class Evolutionary(Optimizer):
 
             with tf.control_dependencies(control_inputs=assignments):
                 # Trivial operation to enforce control dependency
-                return [tf_util.identity(input=delta) for delta in deltas]
+                return self.step_output(
+                    deltas=[tf_util.identity(input=delta) for delta in deltas]
+                )
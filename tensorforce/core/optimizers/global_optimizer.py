@@ -61,7 +61,7 @@ class GlobalOptimizer(UpdateModifier):
             # TODO: Update time, episode, etc (like in Synchronization)?
 
         with tf.control_dependencies(control_inputs=assignments):
-            return [
+            return self.step_output(deltas=[
                 local_delta + update_delta
                 for local_delta, update_delta in zip(local_deltas, update_deltas)
-            ]
+            ])
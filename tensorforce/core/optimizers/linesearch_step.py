@@ -48,8 +48,8 @@ class LinesearchStep(UpdateModifier):
             max_iterations=max_iterations, backtracking_factor=backtracking_factor
         )
 
-    def initialize_given_variables(self, *, variables):
-        super().initialize_given_variables(variables=variables)
+    def initialize_given_variables(self, *, variables, returns_deltas=None):
+        super().initialize_given_variables(variables=variables, returns_deltas=returns_deltas)
 
         self.line_search.complete_initialize(
             arguments_spec=self.arguments_spec, values_spec=self.variables_spec
@@ -94,4 +94,8 @@ class LinesearchStep(UpdateModifier):
                 num_nonzero.append(tf.math.count_nonzero(input=delta))
             num_nonzero = tf.math.add_n(inputs=num_nonzero)
 
-            return tf.cond(pred=(num_nonzero == 0), true_fn=(lambda: deltas), false_fn=linesearch)
+            deltas = tf.cond(
+                pred=(num_nonzero == 0), true_fn=(lambda: deltas), false_fn=linesearch
+            )
+
+        return self.step_output(deltas=deltas)
@@ -0,0 +1,165 @@
+# Copyright 2020 Tensorforce Team. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+
+import tensorflow as tf
+
+from tensorforce.core import parameter_modules, tf_function, tf_util
+from tensorforce.core.optimizers import UpdateModifier
+from tensorforce.core.utils import TensorDict
+
+
+class MinibatchStep(UpdateModifier):
+    """
+    Minibatch-step update modifier, which shuffles the batch once per epoch and applies the given
+    optimizer to each of the disjoint contiguous minibatches of the shuffled batch (specification
+    key: `minibatch_step`).
+
+    Args:
+        optimizer (specification): Optimizer configuration
+            (<span style="color:#C00000"><b>required</b></span>).
+        minibatch_size (parameter, int > 0 | 0.0 < float <= 1.0): Absolute/relative number of
+            batch timesteps per minibatch, the last minibatch of an epoch contains the remaining
+            timesteps (<span style="color:#C00000"><b>required</b></span>).
+        num_epochs (parameter, int >= 1): Number of epochs over the batch
+            (<span style="color:#00C000"><b>default</b></span>: 1).
+        name (string): (<span style="color:#0000C0"><b>internal use</b></span>).
+        arguments_spec (specification): <span style="color:#0000C0"><b>internal use</b></span>.
+    """
+
+    # Only accumulates deltas if returned itself
+    requires_deltas = False
+
+    def __init__(
+        self, *, optimizer, minibatch_size, num_epochs=1, name=None, arguments_spec=None
+    ):
+        super().__init__(optimizer=optimizer, name=name, arguments_spec=arguments_spec)
+
+        if isinstance(minibatch_size, int):
+            self.is_size_absolute = True
+            self.minibatch_size = self.submodule(
+                name='minibatch_size', module=minibatch_size, modules=parameter_modules,
+                dtype='int', min_value=1
+            )
+        else:
+            self.is_size_absolute = False
+            self.minibatch_size = self.submodule(
+                name='minibatch_size', module=minibatch_size, modules=parameter_modules,
+                dtype='float', min_value=0.0, max_value=1.0
+            )
+
+        self.num_epochs = self.submodule(
+            name='num_epochs', module=num_epochs, modules=parameter_modules, dtype='int',
+            min_value=1
+        )
+
+    @tf_function(num_args=1)
+    def step(self, *, arguments, variables, **kwargs):
+        zero = tf_util.constant(value=0, dtype='int')
+        one = tf_util.constant(value=1, dtype='int')
+
+        batch_size = tf_util.cast(x=tf.shape(input=arguments['reward'])[0], dtype='int')
+        if self.is_size_absolute:
+            minibatch_size = self.minibatch_size.value()
+        else:
+            minibatch_size = self.minibatch_size.value() * tf_util.cast(x=batch_size, dtype='float')
+            minibatch_size = tf_util.cast(x=minibatch_size, dtype='int')
+        minibatch_size = tf.math.maximum(x=tf.math.minimum(x=minibatch_size, y=batch_size), y=one)
+        num_minibatches = tf.math.floordiv(x=(batch_size + minibatch_size - one), y=minibatch_size)
+        num_epochs = self.num_epochs.value()
+
+        is_sequence = ('states' in arguments and 'horizons' in arguments)
+
+        def shuffled_batch():
+            # Shuffled copy of the batch, gathered once per epoch
+            shuffled_arguments = TensorDict()
+            indices = tf.random.shuffle(value=tf.range(batch_size))
+
+            if is_sequence:
+                horizons = tf.gather(params=arguments['horizons'], indices=indices)
+                starts = horizons[:, 0]
+                lengths = horizons[:, 1]
+                states_indices = tf.ragged.range(starts=starts, limits=(starts + lengths)).values
+                function = (lambda x: tf.gather(params=x, indices=states_indices))
+                shuffled_arguments['states'] = arguments['states'].fmap(function=function)
+                starts = tf.math.cumsum(x=lengths, exclusive=True)
+                shuffled_arguments['horizons'] = tf.stack(values=(starts, lengths), axis=1)
+
+            for name, argument in arguments.items():
+                if name not in shuffled_arguments:
+                    shuffled_arguments[name] = tf.gather(params=argument, indices=indices)
+
+            return shuffled_arguments
+
+        def minibatch(shuffled_arguments, index):
+            # Contiguous slice of the shuffled batch
+            minibatch_arguments = TensorDict()
+            start = index * minibatch_size
+            end = tf.math.minimum(x=(start + minibatch_size), y=batch_size)
+
+            if is_sequence:
+                horizons = shuffled_arguments['horizons'][start: end]
+                states_start = horizons[0, 0]
+                states_end = horizons[-1, 0] + horizons[-1, 1]
+                function = (lambda x: x[states_start: states_end])
+                minibatch_arguments['states'] = shuffled_arguments['states'].fmap(
+                    function=function
+                )
+                minibatch_arguments['horizons'] = horizons - tf.stack(values=(states_start, zero))
+
+            for name, argument in shuffled_arguments.items():
+                if name not in minibatch_arguments:
+                    minibatch_arguments[name] = argument[start: end]
+
+            return minibatch_arguments
+
+        if self.returns_deltas:
+            outputs = tuple(tf.zeros_like(input=variable) for variable in variables)
+
+            def accumulate(outputs, step_output):
+                return tuple(delta1 + delta2 for delta1, delta2 in zip(outputs, step_output))
+
+        else:
+            outputs = (tf_util.constant(value=True, dtype='bool'),)
+
+            def accumulate(outputs, step_output):
+                return (step_output,)
+
+        def epoch(*outputs):
+            with tf.control_dependencies(control_inputs=outputs):
+                shuffled_arguments = shuffled_batch()
+
+            def body(index, *outputs):
+                with tf.control_dependencies(control_inputs=outputs):
+                    step_output = self.optimizer.step(
+                        arguments=minibatch(shuffled_arguments=shuffled_arguments, index=index),
+                        variables=variables, **kwargs
+                    )
+                    return (index + one,) + accumulate(outputs=outputs, step_output=step_output)
+
+            outputs = tf.while_loop(
+                cond=tf_util.always_true, body=body, loop_vars=((zero,) + outputs),
+                maximum_iterations=tf_util.int32(x=num_minibatches)
+            )
+            return tuple(outputs[1:])
+
+        outputs = tf.while_loop(
+            cond=tf_util.always_true, body=epoch, loop_vars=outputs,
+            maximum_iterations=tf_util.int32(x=num_epochs)
+        )
+
+        if self.returns_deltas:
+            return list(outputs)
+        else:
+            return outputs[0]
@@ -33,6 +33,9 @@ class MultiStep(UpdateModifier):
         arguments_spec (specification): <span style="color:#0000C0"><b>internal use</b></span>.
     """
 
+    # Only accumulates deltas if returned itself
+    requires_deltas = False
+
     def __init__(self, *, optimizer, num_steps, name=None, arguments_spec=None):
         super().__init__(optimizer=optimizer, name=name, arguments_spec=arguments_spec)
 
@@ -43,6 +46,24 @@ class MultiStep(UpdateModifier):
 
     @tf_function(num_args=1)
     def step(self, *, arguments, variables, **kwargs):
+        num_steps = self.num_steps.value()
+
+        if not self.returns_deltas:
+
+            def body(updated):
+                with tf.control_dependencies(control_inputs=(updated,)):
+                    updated = self.optimizer.step(
+                        arguments=arguments, variables=variables, **kwargs
+                    )
+                return (updated,)
+
+            updated, = tf.while_loop(
+                cond=tf_util.always_true, body=body,
+                loop_vars=(tf_util.constant(value=True, dtype='bool'),),
+                maximum_iterations=tf_util.int32(x=num_steps)
+            )
+            return updated
+
         deltas = [tf.zeros_like(input=variable) for variable in variables]
 
         def body(*deltas):
@@ -53,7 +74,6 @@ class MultiStep(UpdateModifier):
                 deltas = [delta1 + delta2 for delta1, delta2 in zip(deltas, step_deltas)]
             return deltas
 
-        num_steps = self.num_steps.value()
         deltas = tf.while_loop(
             cond=tf_util.always_true, body=body, loop_vars=deltas,
             maximum_iterations=tf_util.int32(x=num_steps)
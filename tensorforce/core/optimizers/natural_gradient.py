@@ -60,8 +60,8 @@ class NaturalGradient(Optimizer):
 
         self.only_positive_updates = only_positive_updates
 
-    def initialize_given_variables(self, *, variables):
-        super().initialize_given_variables(variables=variables)
+    def initialize_given_variables(self, *, variables, returns_deltas=None):
+        super().initialize_given_variables(variables=variables, returns_deltas=returns_deltas)
 
         self.conjugate_gradient.complete_initialize(
             arguments_spec=self.arguments_spec, values_spec=self.variables_spec
@@ -194,7 +194,9 @@ class NaturalGradient(Optimizer):
         if self.only_positive_updates:
             # Natural gradient step only works if constant > 0 (epsilon to avoid zero division)
             skip_step = constant < (epsilon * learning_rate)
-            return tf.cond(pred=skip_step, true_fn=no_step, false_fn=apply_step)
+            deltas = tf.cond(pred=skip_step, true_fn=no_step, false_fn=apply_step)
 
         else:
-            return apply_step()
+            deltas = apply_step()
+
+        return self.step_output(deltas=deltas)
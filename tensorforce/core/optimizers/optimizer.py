@@ -15,18 +15,27 @@
 
 import tensorflow as tf
 
-from tensorforce.core import Module, SignatureDict, TensorSpec, TensorsSpec, tf_function, tf_util
+from tensorforce.core import Module, SignatureDict, TensorDict, TensorSpec, TensorsSpec, \
+    tf_function, tf_util
 
 
 class Optimizer(Module):
     """
     Base class for optimizers.
 
+    The step function returns the variable deltas only if required by the caller, which is
+    determined on initialization: the top-level optimizer only returns deltas for debug assertions
+    and update-norm summaries, and optimizers with `requires_deltas` make their sub-optimizers
+    return deltas. Otherwise it returns true once the update is applied.
+
     Args:
         name (string): (<span style="color:#0000C0"><b>internal use</b></span>).
         arguments_spec (specification): <span style="color:#0000C0"><b>internal use</b></span>.
     """
 
+    # Whether step uses the deltas returned by sub-optimizers
+    requires_deltas = True
+
     def __init__(self, *, name=None, arguments_spec=None):
         super().__init__(name=name)
 
@@ -34,12 +43,21 @@ class Optimizer(Module):
 
         self.is_initialized_given_variables = False
 
-    def initialize_given_variables(self, *, variables):
+    def initialize_given_variables(self, *, variables, returns_deltas=None):
         assert not self.root.is_initialized and not self.is_initialized_given_variables
 
+        if returns_deltas is None:
+            # Top-level optimizer, deltas only used by update for assertions and summaries
+            returns_deltas = self.config.create_debug_assertions or (
+                self.root.summaries == 'all' or 'update-norm' in self.root.summaries
+            )
+        self.returns_deltas = returns_deltas
+
         for module in self.this_submodules:
             if isinstance(module, Optimizer):
-                module.initialize_given_variables(variables=variables)
+                module.initialize_given_variables(
+                    variables=variables, returns_deltas=(returns_deltas or self.requires_deltas)
+                )
 
         # Replace "/" with "_" to ensure TensorDict is flat
         self.variables_spec = TensorsSpec(((var.name[:-2].replace('/', '_'), TensorSpec(
@@ -56,12 +74,12 @@ class Optimizer(Module):
             return super().input_signature(function=function)
 
     def output_signature(self, *, function):
-        if function == 'step':
+        if function == 'step' and self.returns_deltas:
             return self.variables_spec.fmap(
                 function=(lambda spec: spec.signature(batched=False)), cls=SignatureDict
             )
 
-        elif function == 'update':
+        elif function == 'step' or function == 'update':
             return SignatureDict(
                 singleton=TensorSpec(type='bool', shape=()).signature(batched=False)
             )
@@ -69,6 +87,16 @@ class Optimizer(Module):
         else:
             return super().output_signature(function=function)
 
+    def step_output(self, *, deltas):
+        # Step output after the deltas are applied, either the deltas or true
+        if self.returns_deltas:
+            return deltas
+
+        if isinstance(deltas, TensorDict):
+            deltas = list(deltas.values())
+        with tf.control_dependencies(control_inputs=deltas):
+            return tf_util.identity(input=tf_util.constant(value=True, dtype='bool'))
+
     @tf_function(num_args=1)
     def step(self, *, arguments, variables, **kwargs):
         raise NotImplementedError
@@ -78,12 +106,16 @@ class Optimizer(Module):
         assert self.is_initialized_given_variables
         assert all(variable.dtype.is_floating for variable in variables)
 
-        deltas = self.step(arguments=arguments, variables=variables, **kwargs)
+        if self.returns_deltas:
+            deltas = self.step(arguments=arguments, variables=variables, **kwargs)
+            assertions = list(deltas)
+        else:
+            # Neither debug assertions nor update-norm summary, hence no deltas
+            assertions = [self.step(arguments=arguments, variables=variables, **kwargs)]
 
-        assertions = list(deltas)
         if self.config.create_debug_assertions:
             from tensorforce.core.optimizers import DoublecheckStep, NaturalGradient, \
-                Synchronization, UpdateModifier
+                Synchronization, TFOptimizer, UpdateModifier
             optimizer = self
             while isinstance(optimizer, UpdateModifier):
                 if isinstance(optimizer, DoublecheckStep):
@@ -92,6 +124,17 @@ class Optimizer(Module):
             if not isinstance(optimizer, DoublecheckStep) and (
                 not isinstance(optimizer, NaturalGradient) or not optimizer.only_positive_updates
             ) and (not isinstance(self, Synchronization) or self.sync_frequency is None):
+                # Steps skipped by float16 loss scaling due to non-finite gradients
+                with tf.control_dependencies(control_inputs=deltas):
+                    is_skipped = [
+                        tf.math.logical_not(x=module.is_applied)
+                        for module in ((self,) + tuple(self.submodules))
+                        if isinstance(module, TFOptimizer) and module.loss_scale is not None
+                    ]
+                is_skipped.append(tf.reduce_all(input_tensor=tf.math.equal(
+                    x=arguments['reward'], y=tf_util.constant(value=0.0, dtype='float')
+                )))
+                is_skipped = tf.math.reduce_any(input_tensor=tf.stack(values=is_skipped))
                 for delta, variable in zip(deltas, variables):
                     if '_distribution/mean/linear/' in variable.name:
                         # Gaussian.state_value does not use mean
@@ -104,10 +147,8 @@ class Optimizer(Module):
                         x=tf.math.reduce_all(input_tensor=tf.math.greater(
                             x=tf.math.count_nonzero(input=delta, dtype=tf_util.get_dtype(type='int')),
                             y=tf_util.constant(value=0, dtype='int')
-                        )), y=tf.reduce_all(input_tensor=tf.math.equal(
-                            x=arguments['reward'], y=tf_util.constant(value=0.0, dtype='float')
-                        ))), y=tf_util.constant(value=True, dtype='bool'), message=variable.name
-                    ))
+                        )), y=is_skipped
+                    ), y=tf_util.constant(value=True, dtype='bool'), message=variable.name))
 
         with tf.control_dependencies(control_inputs=assertions):
             dependencies = list()
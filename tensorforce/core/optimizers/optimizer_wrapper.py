@@ -36,6 +36,12 @@ class OptimizerWrapper(UpdateModifier):
         subsampling_fraction (parameter, int > 0 | 0.0 < float <= 1.0): Absolute/relative fraction
             of batch timesteps to subsample
             (<span style="color:#00C000"><b>default</b></span>: no subsampling).
+        minibatch_size (parameter, int > 0 | 0.0 < float <= 1.0): Absolute/relative number of
+            batch timesteps per minibatch, to iterate over disjoint minibatches of the batch
+            shuffled once per epoch, instead of subsampling
+            (<span style="color:#00C000"><b>default</b></span>: no minibatches).
+        num_epochs (parameter, int >= 1): Number of epochs over the batch if minibatch_size
+            (<span style="color:#00C000"><b>default</b></span>: single epoch).
         linesearch_iterations (parameter, int >= 0): Maximum number of line search iterations, using
             a backtracking factor of 0.75
             (<span style="color:#00C000"><b>default</b></span>: no line search).
@@ -44,10 +50,13 @@ class OptimizerWrapper(UpdateModifier):
         arguments_spec (specification): <span style="color:#0000C0"><b>internal use</b></span>.
     """
 
+    # Passes through the step output of the wrapped optimizer
+    requires_deltas = False
+
     def __init__(
         self, optimizer, *, learning_rate=1e-3, clipping_threshold=None, multi_step=1,
-        subsampling_fraction=1.0, linesearch_iterations=0, doublecheck_update=False, name=None,
-        arguments_spec=None,
+        subsampling_fraction=1.0, minibatch_size=None, num_epochs=1, linesearch_iterations=0,
+        doublecheck_update=False, name=None, arguments_spec=None,
         # Deprecated
         optimizing_iterations=None, **kwargs
     ):
@@ -74,7 +83,20 @@ class OptimizerWrapper(UpdateModifier):
                 type='linesearch_step', optimizer=optimizer, max_iterations=linesearch_iterations
             )
 
-        if not isinstance(subsampling_fraction, float) or subsampling_fraction != 1.0:
+        if minibatch_size is not None:
+            if not isinstance(subsampling_fraction, float) or subsampling_fraction != 1.0:
+                raise TensorforceError.invalid(
+                    name='Optimizer', argument='subsampling_fraction', condition='minibatch_size'
+                )
+            optimizer = dict(
+                type='minibatch_step', optimizer=optimizer, minibatch_size=minibatch_size,
+                num_epochs=num_epochs
+            )
+        elif not isinstance(num_epochs, int) or num_epochs > 1:
+            raise TensorforceError.required(
+                name='Optimizer', argument='minibatch_size', condition='num_epochs'
+            )
+        elif not isinstance(subsampling_fraction, float) or subsampling_fraction != 1.0:
             optimizer = dict(
                 type='subsampling_step', optimizer=optimizer, fraction=subsampling_fraction
             )
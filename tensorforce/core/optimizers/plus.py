@@ -33,6 +33,9 @@ class Plus(Optimizer):
         arguments_spec (specification): <span style="color:#0000C0"><b>internal use</b></span>.
     """
 
+    # Only adds deltas if returned itself
+    requires_deltas = False
+
     def __init__(self, *, optimizer1, optimizer2, name=None, arguments_spec=None):
         super().__init__(name=name, arguments_spec=arguments_spec)
 
@@ -49,6 +52,10 @@ class Plus(Optimizer):
     def step(self, *, arguments, **kwargs):
         deltas1 = self.optimizer1.step(arguments=arguments, **kwargs)
 
+        if not self.returns_deltas:
+            with tf.control_dependencies(control_inputs=(deltas1,)):
+                return self.optimizer2.step(arguments=arguments, **kwargs)
+
         with tf.control_dependencies(control_inputs=deltas1):
             deltas2 = self.optimizer2.step(arguments=arguments, **kwargs)
 
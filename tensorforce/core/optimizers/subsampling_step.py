@@ -34,6 +34,9 @@ class SubsamplingStep(UpdateModifier):
         arguments_spec (specification): <span style="color:#0000C0"><b>internal use</b></span>.
     """
 
+    # Passes through the step output of the wrapped optimizer
+    requires_deltas = False
+
     def __init__(self, *, optimizer, fraction, name=None, arguments_spec=None):
         super().__init__(optimizer=optimizer, name=name, arguments_spec=arguments_spec)
 
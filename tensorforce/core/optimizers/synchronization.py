@@ -107,8 +107,10 @@ class Synchronization(Optimizer):
                 return deltas
 
         if self.sync_frequency.is_constant(value=1):
-            return apply_sync()
+            deltas = apply_sync()
 
         else:
             skip_sync = tf.math.greater(x=self.next_sync, y=one)
-            return tf.cond(pred=skip_sync, true_fn=no_sync, false_fn=apply_sync)
+            deltas = tf.cond(pred=skip_sync, true_fn=no_sync, false_fn=apply_sync)
+
+        return self.step_output(deltas=deltas)
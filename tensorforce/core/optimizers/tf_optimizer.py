@@ -17,7 +17,7 @@ from functools import partial
 
 import tensorflow as tf
 
-from tensorforce.core import parameter_modules, tf_function, tf_util
+from tensorforce.core import parameter_modules, TensorSpec, tf_function, tf_util
 from tensorforce.core.optimizers import Optimizer
 
 
@@ -135,8 +135,26 @@ class TFOptimizer(Optimizer):
 
         self.register_summary(label='update-norm', name='unclipped-gradient-norm')
 
-    def initialize_given_variables(self, *, variables):
-        super().initialize_given_variables(variables=variables)
+        # Dynamic loss scaling for float16 mixed precision
+        if self.config.mixed_precision == 'float16':
+            self.loss_scale = self.variable(
+                name='loss-scale', spec=TensorSpec(type='float'), initializer=2.0 ** 15,
+                is_trainable=False, is_saved=True
+            )
+            self.finite_steps = self.variable(
+                name='finite-steps', spec=TensorSpec(type='int'), initializer='zeros',
+                is_trainable=False, is_saved=True
+            )
+            # Whether the most recent step was applied, for debug assertions
+            self.is_applied = self.variable(
+                name='is-applied', spec=TensorSpec(type='bool'), initializer=True,
+                is_trainable=False, is_saved=False
+            )
+        else:
+            self.loss_scale = None
+
+    def initialize_given_variables(self, *, variables, returns_deltas=None):
+        super().initialize_given_variables(variables=variables, returns_deltas=returns_deltas)
 
         try:
             self.tf_optimizer._create_all_weights(var_list=variables)
@@ -146,8 +164,12 @@ class TFOptimizer(Optimizer):
 
     @tf_function(num_args=1)
     def step(self, *, arguments, variables, fn_loss, **kwargs):
-        # Trivial operation to enforce control dependency
-        previous_values = list(tf_util.identity(input=variable) for variable in variables)
+        if self.returns_deltas:
+            # Trivial operation to enforce control dependency
+            previous_values = list(tf_util.identity(input=variable) for variable in variables)
+        else:
+            # No snapshot of variables if deltas are not required
+            previous_values = list()
 
         # Remember variables before update
         with tf.control_dependencies(control_inputs=previous_values):
@@ -156,6 +178,8 @@ class TFOptimizer(Optimizer):
                 for variable in variables:
                     tape.watch(tensor=variable)
                 loss = fn_loss(**arguments.to_kwargs())
+                if self.loss_scale is not None:
+                    loss = loss * self.loss_scale
 
             gradients = tape.gradient(target=loss, sources=variables)  # , output_gradients=initial
 
@@ -166,6 +190,10 @@ class TFOptimizer(Optimizer):
                 if gradients[n] is None:
                     gradients.pop(n)
                     grads_and_vars.pop(n)
+                elif self.loss_scale is not None:
+                    # Non-finite scaled gradients skip the update instead
+                    gradients[n] = gradients[n] / self.loss_scale
+                    grads_and_vars[n] = (gradients[n], grads_and_vars[n][1])
                 elif self.config.create_tf_assertions:
                     assertions.append(tf.debugging.assert_all_finite(
                         x=gradients[n], message="Invalid gradient: contains inf or nan."
@@ -187,9 +215,46 @@ class TFOptimizer(Optimizer):
                 ))
                 grads_and_vars = [(grad, var) for grad, (_, var) in zip(gradients, grads_and_vars)]
 
-            applied = self.tf_optimizer.apply_gradients(grads_and_vars=grads_and_vars)
-            dependencies.append(applied)
+            if self.loss_scale is None:
+                applied = self.tf_optimizer.apply_gradients(grads_and_vars=grads_and_vars)
+                dependencies.append(applied)
+            else:
+                dependencies.extend(self.apply_scaled_gradients(grads_and_vars=grads_and_vars))
 
         # Return deltas after actually having change the variables.
         with tf.control_dependencies(control_inputs=dependencies):
+            if not self.returns_deltas:
+                return tf_util.identity(input=tf_util.constant(value=True, dtype='bool'))
             return [variable - previous for variable, previous in zip(variables, previous_values)]
+
+    def apply_scaled_gradients(self, *, grads_and_vars):
+        # Skip update and halve loss scale if gradients are not finite, double loss scale after
+        # 2000 consecutive finite updates
+        zero = tf_util.constant(value=0, dtype='int')
+        one = tf_util.constant(value=1, dtype='int')
+        is_finite = tf.math.reduce_all(input_tensor=[
+            tf.math.reduce_all(input_tensor=tf.math.is_finite(x=grad)) for grad, _ in grads_and_vars
+        ])
+
+        def apply_gradients():
+            applied = self.tf_optimizer.apply_gradients(grads_and_vars=grads_and_vars)
+            with tf.control_dependencies(control_inputs=(applied,)):
+                return self.finite_steps.assign_add(delta=one, read_value=True)
+
+        def skip_update():
+            return self.finite_steps.assign(value=zero, read_value=True)
+
+        finite_steps = tf.cond(pred=is_finite, true_fn=apply_gradients, false_fn=skip_update)
+
+        increase = tf.math.equal(x=finite_steps, y=2000)
+        loss_scale = tf.where(
+            condition=increase, x=(self.loss_scale * 2.0),
+            y=tf.where(condition=is_finite, x=self.loss_scale, y=(self.loss_scale * 0.5))
+        )
+        loss_scale = tf.math.maximum(x=loss_scale, y=1.0)
+        finite_steps = tf.where(condition=increase, x=zero, y=finite_steps)
+        return (
+            self.loss_scale.assign(value=loss_scale, read_value=False),
+            self.finite_steps.assign(value=finite_steps, read_value=False),
+            self.is_applied.assign(value=is_finite, read_value=False)
+        )
@@ -25,8 +25,9 @@ from tensorforce.core.utils import tf_util
 def _normalize_type(*, dtype):
     dtypes = {
         'bool': 'bool', bool: 'bool', np.bool_: 'bool', tf.bool: 'bool',
-        'int': 'int', int: 'int', np.int16: 'int', np.int32: 'int', np.int64: 'int',
-        tf.int16: 'int', tf.int32: 'int', tf.int64: 'int',
+        'int': 'int', int: 'int', np.int8: 'int', np.int16: 'int', np.int32: 'int',
+        np.int64: 'int', np.uint8: 'int',
+        tf.int8: 'int', tf.int16: 'int', tf.int32: 'int', tf.int64: 'int', tf.uint8: 'int',
         'float': 'float', float: 'float', np.float16: 'float', np.float32: 'float',
         np.float64: 'float',
         tf.float16: 'float', tf.float32: 'float', tf.float64: 'float'
@@ -13,10 +13,13 @@
 # limitations under the License.
 # ==============================================================================
 
-from tensorforce.environments.environment import Environment, RemoteEnvironment
+from tensorforce.environments.environment import Environment, RemoteEnvironment, \
+    VectorEnvironment
 
 from tensorforce.environments.multiprocessing_environment import MultiprocessingEnvironment
+from tensorforce.environments.shared_memory_environment import SharedMemoryEnvironment
 from tensorforce.environments.socket_environment import SocketEnvironment
+from tensorforce.environments.async_remote_environment import AsyncRemoteEnvironment
 
 from tensorforce.environments.arcade_learning_environment import ArcadeLearningEnvironment
 from tensorforce.environments.openai_gym import OpenAIGym
@@ -40,7 +43,8 @@ environments = dict(
 
 
 __all__ = [
-    'ArcadeLearningEnvironment', 'Environment', 'MazeExplorer', 'MultiprocessingEnvironment',
-    'OpenAIGym', 'OpenAIRetro', 'OpenSim', 'PyGameLearningEnvironment', 'RemoteEnvironment',
-    'SocketEnvironment', 'ViZDoom', 'CARLAEnvironment'
+    'ArcadeLearningEnvironment', 'AsyncRemoteEnvironment', 'Environment', 'MazeExplorer',
+    'MultiprocessingEnvironment', 'OpenAIGym', 'OpenAIRetro', 'OpenSim',
+    'PyGameLearningEnvironment', 'RemoteEnvironment', 'SharedMemoryEnvironment',
+    'SocketEnvironment', 'VectorEnvironment', 'ViZDoom', 'CARLAEnvironment'
 ]
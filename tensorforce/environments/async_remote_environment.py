@@ -0,0 +1,145 @@
+# Copyright 2020 Tensorforce Team. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+
+import asyncio
+import struct
+
+from tensorforce import TensorforceError
+from tensorforce.environments import SocketEnvironment
+
+
+class AsyncRemoteEnvironment(SocketEnvironment):
+    """
+    Asyncio-native socket client environment, connecting to a "socket-server" remote environment
+    (specification key: `async-socket-client` remote mode).
+
+    Additionally to the inherited synchronous interface, including the non-blocking
+    `start_reset()`/`start_execute()`/`receive_execute()` functions used by `Runner.run()`, the
+    coroutines `areset()` and `aexecute()` are based on the non-blocking asyncio socket functions
+    of the running event loop, so many remote environments can be in flight on a single event
+    loop without additional threads, see `Runner.arun()`.
+
+    Args:
+        host (str): Socket server hostname or IP address
+            (<span style="color:#C00000"><b>required</b></span>).
+        port (int): Socket server port
+            (<span style="color:#C00000"><b>required</b></span>).
+        blocking (bool): Whether synchronous remote environment calls should be blocking
+            (<span style="color:#00C000"><b>default</b></span>: not blocking).
+    """
+
+    @classmethod
+    async def async_proxy_send(cls, connection, function, kwargs):
+        loop = asyncio.get_event_loop()
+        for buffer in cls.pack_message(obj=(function, kwargs)):
+            if len(buffer) > 0:
+                await loop.sock_sendall(connection, buffer)
+
+    @classmethod
+    async def async_proxy_receive(cls, connection):
+        loop = asyncio.get_event_loop()
+        header = await cls.async_receive_into(
+            loop=loop, connection=connection, buffer=bytearray(cls.HEADER.size)
+        )
+        num_buffers, num_metadata_bytes = cls.unpack_header(header=header)
+        sizes = await cls.async_receive_into(
+            loop=loop, connection=connection, buffer=bytearray(8 * num_buffers)
+        )
+        sizes = struct.unpack('!{}Q'.format(num_buffers), sizes)
+        body = await cls.async_receive_into(
+            loop=loop, connection=connection, buffer=bytearray(num_metadata_bytes + sum(sizes))
+        )
+        success, result = cls.unpack_body(
+            body=body, num_metadata_bytes=num_metadata_bytes, sizes=sizes
+        )
+        return success, result
+
+    @classmethod
+    async def async_receive_into(cls, loop, connection, buffer):
+        view = memoryview(buffer)
+        offset = 0
+        while offset < len(view):
+            num_bytes = await loop.sock_recv_into(connection, view[offset:])
+            if num_bytes == 0:
+                raise TensorforceError(message="Remote socket connection closed unexpectedly.")
+            offset += num_bytes
+        return buffer
+
+    async def async_send(self, function, kwargs):
+        if self._expect_receive is not None:
+            self.close()
+            raise TensorforceError.unexpected()
+        self._expect_receive = function
+
+        try:
+            self._connection.setblocking(False)
+            await self.__class__.async_proxy_send(
+                connection=self._connection, function=function, kwargs=kwargs
+            )
+        except BaseException:
+            self.__class__.proxy_close(connection=self._connection)
+            raise
+
+    async def async_receive(self, function):
+        if self._expect_receive != function:
+            self.close()
+            raise TensorforceError.unexpected()
+        self._expect_receive = None
+
+        try:
+            success, result = await self.__class__.async_proxy_receive(
+                connection=self._connection
+            )
+            self._connection.setblocking(True)
+        except BaseException:
+            self.__class__.proxy_close(connection=self._connection)
+            raise
+
+        if success:
+            return result
+        else:
+            self.__class__.proxy_close(connection=self._connection)
+            etype, value, traceback = result
+            raise TensorforceError(message='\n{}\n{}: {}`'.format(''.join(traceback), etype, value))
+
+    async def areset(self):
+        """
+        Resets the remote environment to start a new episode (coroutine).
+
+        Returns:
+            dict[state]: Dictionary containing initial state(s) and auxiliary information.
+        """
+        self._episode_seconds = 0.0
+        await self.async_send(function='reset', kwargs=dict())
+        states, seconds = await self.async_receive(function='reset')
+        self._episode_seconds += seconds
+        return states
+
+    async def aexecute(self, actions):
+        """
+        Executes the given action(s) and advances the remote environment by one step (coroutine).
+
+        Args:
+            actions (dict[action]): Dictionary containing action(s) to be executed
+                (<span style="color:#C00000"><b>required</b></span>).
+
+        Returns:
+            dict[state], bool | 0 | 1 | 2, float: Dictionary containing next state(s), whether
+            a terminal state is reached or 2 if the episode was aborted, and observed reward.
+        """
+        await self.async_send(function='execute', kwargs=dict(actions=actions))
+        states, terminal, reward, seconds = await self.async_receive(function='execute')
+        self._episode_seconds += seconds
+        return states, int(terminal), reward
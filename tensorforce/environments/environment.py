@@ -13,14 +13,17 @@
 # limitations under the License.
 # ==============================================================================
 
+from collections import OrderedDict
 import importlib
 import json
+from multiprocessing.connection import wait as wait_connections
 import os
 import sys
-from threading import Thread
 import time
 from traceback import format_tb
 
+import numpy as np
+
 from tensorforce import TensorforceError, util
 import tensorforce.environments
 
@@ -48,29 +51,36 @@ class Environment(object):
                 the environment default if defined
                 (<span style="color:#00C000"><b>default</b></span>: environment default, invalid
                 for "socket-client" remote mode).
-            remote ("multiprocessing" | "socket-client" | "socket-server"): Communication mode for
-                remote environment execution of parallelized environment execution, "socket-client"
-                mode requires a corresponding "socket-server" running, and "socket-server" mode
-                runs environment in server communication loop until closed
+            remote ("multiprocessing" | "shared-memory" | "socket-client" | "async-socket-client" |
+                "socket-server"): Communication mode for remote environment execution of
+                parallelized environment execution, "shared-memory" is a multiprocessing mode which
+                transfers states via preallocated shared memory (optional argument `num_slots`),
+                "socket-client" mode requires a corresponding "socket-server" running,
+                "async-socket-client" mode additionally provides asyncio coroutines for
+                `Runner.arun()`, and "socket-server" mode runs environment in server communication
+                loop until closed (optional argument `num_instances` to host multiple environment
+                instances, addressed by "socket-client" argument `environment_id`)
                 (<span style="color:#00C000"><b>default</b></span>: local execution).
             blocking (bool): Whether remote environment calls should be blocking
                 (<span style="color:#00C000"><b>default</b></span>: not blocking, invalid unless
-                "multiprocessing" or "socket-client" remote mode).
+                "multiprocessing", "shared-memory" or "(async-)socket-client" remote mode).
             host (str): Socket server hostname or IP address
-                (<span style="color:#C00000"><b>required</b></span> only for "socket-client" remote
-                mode).
+                (<span style="color:#C00000"><b>required</b></span> only for "(async-)socket-client"
+                remote mode).
             port (int): Socket server port
                 (<span style="color:#C00000"><b>required</b></span> only for "socket-client/server"
                 remote mode).
             kwargs: Additional arguments.
         """
-        if remote not in ('multiprocessing', 'socket-client'):
+        if remote not in (
+            'multiprocessing', 'shared-memory', 'socket-client', 'async-socket-client'
+        ):
             if blocking:
                 raise TensorforceError.invalid(
                     name='Environment.create', argument='blocking',
-                    condition='no multiprocessing/socket-client instance'
+                    condition='no multiprocessing/shared-memory/socket-client instance'
                 )
-        if remote not in ('socket-client', 'socket-server'):
+        if remote not in ('socket-client', 'async-socket-client', 'socket-server'):
             if host is not None:
                 raise TensorforceError.invalid(
                     name='Environment.create', argument='host', condition='no socket instance'
@@ -88,7 +98,15 @@ class Environment(object):
             )
             return environment
 
-        elif remote == 'socket-client':
+        elif remote == 'shared-memory':
+            from tensorforce.environments import SharedMemoryEnvironment
+            environment = SharedMemoryEnvironment(
+                blocking=blocking, environment=environment,
+                max_episode_timesteps=max_episode_timesteps, **kwargs
+            )
+            return environment
+
+        elif remote in ('socket-client', 'async-socket-client'):
             if environment is not None:
                 raise TensorforceError.invalid(
                     name='Environment.create', argument='environment',
@@ -99,13 +117,25 @@ class Environment(object):
                     name='Environment.create', argument='max_episode_timesteps',
                     condition='socket-client instance'
                 )
-            elif len(kwargs) > 0:
+            environment_id = kwargs.pop('environment_id', None)
+            if len(kwargs) > 0:
                 raise TensorforceError.invalid(
                     name='Environment.create', argument='kwargs',
                     condition='socket-client instance'
                 )
-            from tensorforce.environments import SocketEnvironment
-            environment = SocketEnvironment(host=host, port=port, blocking=blocking)
+            if remote == 'async-socket-client':
+                if environment_id is not None:
+                    raise TensorforceError.invalid(
+                        name='Environment.create', argument='environment_id',
+                        condition='async-socket-client instance'
+                    )
+                from tensorforce.environments import AsyncRemoteEnvironment
+                environment = AsyncRemoteEnvironment(host=host, port=port, blocking=blocking)
+            else:
+                from tensorforce.environments import SocketEnvironment
+                environment = SocketEnvironment(
+                    host=host, port=port, blocking=blocking, environment_id=environment_id
+                )
             return environment
 
         elif remote == 'socket-server':
@@ -115,7 +145,7 @@ class Environment(object):
                 **kwargs
             )
 
-        elif isinstance(environment, (EnvironmentWrapper, RemoteEnvironment)):
+        elif isinstance(environment, (EnvironmentWrapper, RemoteEnvironment, VectorEnvironment)):
             if max_episode_timesteps is not None:
                 raise TensorforceError.invalid(
                     name='Environment.create', argument='max_episode_timesteps',
@@ -134,6 +164,11 @@ class Environment(object):
                 name='Environment.create', argument='environment', dtype=type(environment)
             )
 
+        elif isinstance(environment, type) and issubclass(environment, VectorEnvironment):
+            environment = environment(max_episode_timesteps=max_episode_timesteps, **kwargs)
+            assert isinstance(environment, VectorEnvironment)
+            return environment
+
         elif isinstance(environment, Environment):
             return EnvironmentWrapper(
                 environment=environment, max_episode_timesteps=max_episode_timesteps
@@ -411,6 +446,190 @@ class EnvironmentWrapper(Environment):
             return setattr(self._environment, name, value)
 
 
+class VectorEnvironment(Environment):
+    """
+    Vectorized environment which steps multiple environment instances in one call, with states,
+    actions, terminal and reward values stacked along a leading batch dimension, and episodes
+    automatically reset on terminal (i.e. the states returned for a terminal instance are the
+    initial states of its next episode). Natively vectorized environments can subclass this class
+    and implement `num_environments()`, `reset_batch()` and `execute_batch()` directly, otherwise
+    the given environment instances are stepped sequentially. Detected by `Runner`, which then
+    passes the stacked arrays directly to the agent.
+
+    Args:
+        environments (specification | list[specification | Environment object]): Environment
+            specification(s) or object(s), a single specification is repeated
+            `num_environments` times
+            (<span style="color:#C00000"><b>required</b></span> unless native subclass).
+        num_environments (int > 0): Number of environment instances if single specification
+            (<span style="color:#00C000"><b>default</b></span>: length of `environments`).
+        max_episode_timesteps (int > 0): Maximum number of timesteps per episode, overwrites the
+            environment default if defined
+            (<span style="color:#00C000"><b>default</b></span>: environment default).
+    """
+
+    @classmethod
+    def stack_values(cls, values):
+        if isinstance(values[0], dict):
+            return OrderedDict(
+                (name, cls.stack_values(values=[x[name] for x in values])) for name in values[0]
+            )
+        else:
+            return np.stack([np.asarray(x) for x in values], axis=0)
+
+    @classmethod
+    def index_values(cls, values, index):
+        if isinstance(values, dict):
+            return OrderedDict(
+                (name, cls.index_values(values=x, index=index)) for name, x in values.items()
+            )
+        value = values[index]
+        return value.item() if value.shape == () else value
+
+    @classmethod
+    def update_values(cls, values, index, updates):
+        if isinstance(values, dict):
+            return OrderedDict(
+                (name, cls.update_values(values=x, index=index, updates=updates[name]))
+                for name, x in values.items()
+            )
+        values = np.array(values)
+        values[index] = updates
+        return values
+
+    def __init__(self, environments=None, num_environments=None, max_episode_timesteps=None):
+        super().__init__()
+
+        if environments is None:
+            # Native subclass
+            if num_environments is not None:
+                raise TensorforceError.invalid(
+                    name='VectorEnvironment', argument='num_environments',
+                    condition='environments is None'
+                )
+            self._environments = None
+            self._max_episode_timesteps = max_episode_timesteps
+            return
+
+        if num_environments is None:
+            if not util.is_iterable(x=environments):
+                raise TensorforceError.required(
+                    name='VectorEnvironment', argument='num_environments',
+                    condition='single environment specification'
+                )
+        elif util.is_iterable(x=environments):
+            raise TensorforceError.invalid(
+                name='VectorEnvironment', argument='num_environments',
+                condition='environments is iterable'
+            )
+        elif not isinstance(num_environments, int) or num_environments < 1:
+            raise TensorforceError.value(
+                name='VectorEnvironment', argument='num_environments', value=num_environments,
+                hint='< 1'
+            )
+        else:
+            if isinstance(environments, Environment):
+                raise TensorforceError.type(
+                    name='VectorEnvironment', argument='environments', dtype=type(environments),
+                    condition='num_environments', hint='is not specification'
+                )
+            environments = [environments for _ in range(num_environments)]
+
+        self._environments = list()
+        for environment in environments:
+            environment = Environment.create(
+                environment=environment, max_episode_timesteps=max_episode_timesteps
+            )
+            if isinstance(environment, (RemoteEnvironment, VectorEnvironment)):
+                raise TensorforceError.type(
+                    name='VectorEnvironment', argument='environments', dtype=type(environment)
+                )
+            if len(self._environments) > 0:
+                assert util.is_equal(x=environment.states(), y=self._environments[0].states())
+                assert util.is_equal(x=environment.actions(), y=self._environments[0].actions())
+            self._environments.append(environment)
+        self._max_episode_timesteps = self._environments[0].max_episode_timesteps()
+
+    def __str__(self):
+        if self._environments is None:
+            return super().__str__()
+        return '{}[{}x{}]'.format(
+            self.__class__.__name__, len(self._environments), self._environments[0]
+        )
+
+    def states(self):
+        return self._environments[0].states()
+
+    def actions(self):
+        return self._environments[0].actions()
+
+    def max_episode_timesteps(self):
+        return self._max_episode_timesteps
+
+    def num_environments(self):
+        """
+        Returns the number of environment instances.
+
+        Returns:
+            int: Number of environment instances.
+        """
+        return len(self._environments)
+
+    def close(self):
+        if self._environments is not None:
+            for environment in self._environments:
+                environment.close()
+            self._environments = None
+
+    def reset_batch(self):
+        """
+        Resets all environment instances to start a new episode.
+
+        Returns:
+            dict[state]: Dictionary containing stacked initial state(s) and auxiliary information.
+        """
+        return self.__class__.stack_values(
+            values=[environment.reset() for environment in self._environments]
+        )
+
+    def execute_batch(self, actions, index=None):
+        """
+        Executes the given stacked action(s) and advances all environment instances by one step,
+        instances which reach a terminal state are automatically reset.
+
+        Args:
+            actions (dict[action]): Dictionary containing stacked action(s) to be executed
+                (<span style="color:#C00000"><b>required</b></span>).
+            index (list[int]): Environment instances to advance, in which case actions and
+                returned values are stacked for these instances only
+                (<span style="color:#00C000"><b>default</b></span>: all instances).
+
+        Returns:
+            dict[state], int array, float array: Dictionary containing stacked next state(s) or
+            initial state(s) of the next episode if terminal, stacked terminal values (0, 1, or 2
+            if the episode was aborted), and stacked observed rewards.
+        """
+        if index is None:
+            index = range(len(self._environments))
+        states = list()
+        terminal = list()
+        reward = list()
+        for n, i in enumerate(index):
+            environment = self._environments[i]
+            x = self.__class__.index_values(values=actions, index=n)
+            s, t, r = environment.execute(actions=x)
+            if t > 0:
+                s = environment.reset()
+            states.append(s)
+            terminal.append(int(t))
+            reward.append(r)
+        return (
+            self.__class__.stack_values(values=states),
+            np.asarray(terminal, dtype=util.np_dtype(dtype='int')),
+            np.asarray(reward, dtype=util.np_dtype(dtype='float'))
+        )
+
+
 class RemoteEnvironment(Environment):
 
     @classmethod
@@ -425,6 +644,16 @@ class RemoteEnvironment(Environment):
     def proxy_close(cls, connection):
         raise NotImplementedError
 
+    @classmethod
+    def proxy_waitable(cls, connection):
+        # Object for multiprocessing.connection.wait(), e.g. connection or socket
+        raise NotImplementedError
+
+    @classmethod
+    def proxy_poll(cls, connection):
+        # Whether a result is available, or None if determined by proxy_waitable() readiness
+        return None
+
     @classmethod
     def remote_send(cls, connection, success, result):
         raise NotImplementedError
@@ -433,6 +662,54 @@ class RemoteEnvironment(Environment):
     def remote_receive(cls, connection):
         raise NotImplementedError
 
+    @staticmethod
+    def wait(environments, timeout=None):
+        """
+        Blocks until a result is available for at least one of the given remote environments with
+        a pending request.
+
+        Args:
+            environments (list[RemoteEnvironment]): Remote environments
+                (<span style="color:#C00000"><b>required</b></span>).
+            timeout (float): Maximum number of seconds to wait
+                (<span style="color:#00C000"><b>default</b></span>: no timeout).
+
+        Returns:
+            list[RemoteEnvironment]: Remote environments with result available.
+        """
+        environments = [
+            environment for environment in environments if environment._expect_receive is not None
+        ]
+        if timeout is not None:
+            deadline = time.time() + timeout
+        while len(environments) > 0:
+            ready = list()
+            waitables = dict()
+            for environment in environments:
+                if environment.__class__.proxy_poll(connection=environment._connection):
+                    ready.append(environment)
+                else:
+                    waitable = environment.__class__.proxy_waitable(
+                        connection=environment._connection
+                    )
+                    waitables.setdefault(waitable, list()).append(environment)
+            if len(ready) > 0:
+                return ready
+            if timeout is None:
+                waitables_ready = wait_connections(object_list=list(waitables))
+            else:
+                waitables_ready = wait_connections(
+                    object_list=list(waitables), timeout=max(deadline - time.time(), 0.0)
+                )
+            for waitable in waitables_ready:
+                for environment in waitables[waitable]:
+                    # Environments sharing a connection are checked via proxy_poll() again
+                    if environment.__class__.proxy_poll(connection=environment._connection) is None:
+                        ready.append(environment)
+            if len(ready) > 0 or (timeout is not None and time.time() >= deadline):
+                return ready
+        return list()
+
     @classmethod
     def remote_close(cls, connection):
         raise NotImplementedError
@@ -509,8 +786,6 @@ class RemoteEnvironment(Environment):
         super().__init__()
         self._connection = connection
         self._blocking = blocking
-        self._observation = None
-        self._thread = None
         self._episode_seconds = None
 
     def send(self, function, kwargs):
@@ -547,8 +822,7 @@ class RemoteEnvironment(Environment):
             raise TensorforceError(message='\n{}\n{}: {}`'.format(''.join(traceback), etype, value))
 
     _ATTRIBUTES = frozenset([
-        '_actions', '_blocking', '_connection', 'create', '_episode_seconds', '_expect_receive',
-        '_observation', '_thread'
+        '_actions', '_blocking', '_connection', 'create', '_episode_seconds', '_expect_receive'
     ])
 
     def __getattr__(self, name):
@@ -594,16 +868,12 @@ class RemoteEnvironment(Environment):
         return self.receive(function='max_episode_timesteps')
 
     def close(self):
-        if self._thread is not None:
-            self._thread.join()
         if self._expect_receive is not None:
             self.receive(function=self._expect_receive)
         self.send(function='close', kwargs=dict())
         self.receive(function='close')
         self.__class__.proxy_close(connection=self._connection)
         self._connection = None
-        self._observation = None
-        self._thread = None
 
     def reset(self):
         self._episode_seconds = 0.0
@@ -619,49 +889,21 @@ class RemoteEnvironment(Environment):
         return states, int(terminal), reward
 
     def start_reset(self):
+        # Request is sent immediately, non-blocking only affects receive_execute()
         self._episode_seconds = 0.0
-        if self._blocking:
-            self.send(function='reset', kwargs=dict())
-        else:
-            if self._thread is not None:  # TODO: not expected
-                self._thread.join()
-            self._observation = None
-            self._thread = Thread(target=self.finish_reset)
-            self._thread.start()
-
-    def finish_reset(self):
-        assert self._thread is not None and self._observation is None
-        self._observation = (self.reset(), -1, None)
-        self._thread = None
+        self.send(function='reset', kwargs=dict())
 
     def start_execute(self, actions):
-        if self._blocking:
-            self.send(function='execute', kwargs=dict(actions=actions))
-        else:
-            assert self._thread is None and self._observation is None
-            self._thread = Thread(target=self.finish_execute, kwargs=dict(actions=actions))
-            self._thread.start()
-
-    def finish_execute(self, actions):
-        assert self._thread is not None and self._observation is None
-        self._observation = self.execute(actions=actions)
-        self._thread = None
+        self.send(function='execute', kwargs=dict(actions=actions))
 
     def receive_execute(self):
-        if self._blocking:
-            if self._expect_receive == 'reset':
-                states, seconds = self.receive(function='reset')
-                self._episode_seconds += seconds
-                return states, -1, None
-            else:
-                states, terminal, reward, seconds = self.receive(function='execute')
-                self._episode_seconds += seconds
-                return states, int(terminal), reward
+        if not self._blocking and len(self.__class__.wait(environments=(self,), timeout=0.0)) == 0:
+            return None
+        elif self._expect_receive == 'reset':
+            states, seconds = self.receive(function='reset')
+            self._episode_seconds += seconds
+            return states, -1, None
         else:
-            if self._thread is not None:
-                return None
-            else:
-                assert self._observation is not None
-                observation = self._observation
-                self._observation = None
-                return observation
+            states, terminal, reward, seconds = self.receive(function='execute')
+            self._episode_seconds += seconds
+            return states, int(terminal), reward
@@ -36,6 +36,10 @@ class MultiprocessingEnvironment(RemoteEnvironment):
         connection[0].close()
         connection[1].join()
 
+    @classmethod
+    def proxy_waitable(cls, connection):
+        return connection[0]
+
     @classmethod
     def remote_send(cls, connection, success, result):
         connection.send(obj=(success, result))
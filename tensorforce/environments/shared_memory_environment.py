@@ -0,0 +1,237 @@
+# Copyright 2020 Tensorforce Team. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+
+try:
+    from multiprocessing import resource_tracker
+    from multiprocessing.shared_memory import SharedMemory
+except ImportError:
+    # Python < 3.8
+    resource_tracker = None
+    SharedMemory = None
+
+import numpy as np
+
+from tensorforce import TensorforceError, util
+from tensorforce.environments import MultiprocessingEnvironment
+
+
+class SharedMemoryEnvironment(MultiprocessingEnvironment):
+    """
+    Multiprocessing environment which transfers states via shared memory instead of the pipe.
+
+    The shared memory is preallocated based on `states()` as a ring of `num_slots` slots per state
+    component. The worker process writes states directly into the next slot, and only a small
+    control message (terminal, reward, timing, slot index, plus state components not covered by
+    `states()` like action masks) is sent through the pipe. States are returned as zero-copy NumPy
+    views, which remain valid until the slot is overwritten `num_slots` execute calls later, so
+    consumers which keep states around for longer have to copy them.
+
+    Args:
+        environment (specification): Environment specification
+            (<span style="color:#C00000"><b>required</b></span>).
+        blocking (bool): Whether remote environment calls should be blocking
+            (<span style="color:#00C000"><b>default</b></span>: not blocking).
+        max_episode_timesteps (int > 0): Maximum number of timesteps per episode
+            (<span style="color:#00C000"><b>default</b></span>: environment default).
+        num_slots (int >= 2): Number of shared-memory ring slots per state component
+            (<span style="color:#00C000"><b>default</b></span>: 2).
+        kwargs: Additional arguments.
+    """
+
+    @classmethod
+    def flatten_states_spec(cls, states_spec, prefix=None):
+        # Returns list of (path, shape, dtype), path is None for a singleton state
+        if 'type' in states_spec or 'shape' in states_spec:
+            shape = states_spec['shape']
+            if isinstance(shape, int):
+                shape = (shape,)
+            dtype = util.np_dtype(dtype=states_spec.get('type', 'float'))
+            return [(prefix, tuple(shape), dtype)]
+        specs = list()
+        for name, spec in states_spec.items():
+            path = name if prefix is None else '{}/{}'.format(prefix, name)
+            specs.extend(cls.flatten_states_spec(states_spec=spec, prefix=path))
+        return specs
+
+    @classmethod
+    def remote(cls, connection, environment, max_episode_timesteps=None, **kwargs):
+        super().remote(
+            connection=SharedMemoryRemote(connection=connection), environment=environment,
+            max_episode_timesteps=max_episode_timesteps, **kwargs
+        )
+
+    @classmethod
+    def proxy_receive(cls, connection):
+        success, result, slot = connection[0].recv()
+        if slot is not None:
+            states = connection[2].read(slot=slot, extra=result[0])
+            result = (states,) + tuple(result[1:])
+        return success, result
+
+    @classmethod
+    def proxy_close(cls, connection):
+        super().proxy_close(connection=connection)
+        if len(connection) > 2:
+            connection[2].close(unlink=True)
+
+    @classmethod
+    def remote_send(cls, connection, success, result):
+        if success and connection.function in ('reset', 'execute') and \
+                connection.buffers is not None:
+            extra, slot = connection.write(states=result[0])
+            result = (extra,) + tuple(result[1:])
+        else:
+            slot = None
+        connection.connection.send(obj=(success, result, slot))
+
+    @classmethod
+    def remote_receive(cls, connection):
+        while True:
+            function, kwargs = connection.connection.recv()
+            if function == '_shared_memory_attach':
+                connection.attach(**kwargs)
+                connection.connection.send(obj=(True, None, None))
+            else:
+                connection.function = function
+                return function, kwargs
+
+    @classmethod
+    def remote_close(cls, connection):
+        connection.close(unlink=False)
+        connection.connection.close()
+
+    def __init__(
+        self, environment, blocking=False, max_episode_timesteps=None, num_slots=2, **kwargs
+    ):
+        if SharedMemory is None:
+            raise TensorforceError(
+                message="Remote mode shared-memory requires Python >= 3.8 (multiprocessing."
+                        "shared_memory)."
+            )
+        if not isinstance(num_slots, int) or num_slots < 2:
+            raise TensorforceError.value(
+                name='SharedMemoryEnvironment', argument='num_slots', value=num_slots, hint='< 2'
+            )
+        # Worker process has to share the resource tracker, otherwise its own tracker unlinks the
+        # shared memory when the worker process exits
+        resource_tracker.ensure_running()
+        super().__init__(
+            environment=environment, blocking=blocking,
+            max_episode_timesteps=max_episode_timesteps, **kwargs
+        )
+        proxy_connection, process = self._connection
+        buffers = SharedMemoryBuffers(
+            specs=self.__class__.flatten_states_spec(states_spec=self.states()),
+            num_slots=num_slots
+        )
+        self._connection = (proxy_connection, process, buffers)
+        try:
+            self.send(function='_shared_memory_attach', kwargs=buffers.attach_kwargs())
+            self.receive(function='_shared_memory_attach')
+        except BaseException:
+            buffers.close(unlink=True)
+            raise
+
+
+class SharedMemoryBuffers(object):
+    """
+    Shared-memory ring buffers for a flattened states specification.
+    """
+
+    def __init__(self, specs, num_slots, names=None):
+        self.specs = specs
+        self.num_slots = num_slots
+        self.memories = list()
+        self.arrays = list()
+        for n, (_, shape, dtype) in enumerate(specs):
+            nbytes = max(util.product(xs=shape) * np.dtype(dtype).itemsize, 1)
+            if names is None:
+                memory = SharedMemory(create=True, size=(nbytes * num_slots))
+            else:
+                memory = SharedMemory(name=names[n])
+            self.memories.append(memory)
+            self.arrays.append(
+                np.ndarray(shape=((num_slots,) + shape), dtype=dtype, buffer=memory.buf)
+            )
+
+    def attach_kwargs(self):
+        return dict(
+            specs=self.specs, num_slots=self.num_slots,
+            names=[memory.name for memory in self.memories]
+        )
+
+    def write(self, states, slot):
+        if self.specs[0][0] is None and not isinstance(states, dict):
+            np.copyto(self.arrays[0][slot, ...], states, casting='unsafe')
+            return None
+        extra = dict(states)
+        for (path, _, _), array in zip(self.specs, self.arrays):
+            # Singleton state plus auxiliaries is given as dict with name "state"
+            *names, name = ('state' if path is None else path).split('/')
+            parent = extra
+            for x in names:
+                parent[x] = parent = dict(parent[x])
+            np.copyto(array[slot, ...], parent.pop(name), casting='unsafe')
+        return extra
+
+    def read(self, slot, extra):
+        if self.specs[0][0] is None and extra is None:
+            return self.arrays[0][slot, ...]
+        states = dict(extra)
+        for (path, _, _), array in zip(self.specs, self.arrays):
+            *names, name = ('state' if path is None else path).split('/')
+            parent = states
+            for x in names:
+                parent[x] = parent = dict(parent.get(x, ()))
+            parent[name] = array[slot, ...]
+        return states
+
+    def close(self, unlink):
+        # Arrays have to be released before the underlying buffers can be closed
+        self.arrays = list()
+        for memory in self.memories:
+            try:
+                memory.close()
+            except BufferError:
+                # States views still referenced externally, released once garbage-collected
+                pass
+            if unlink:
+                memory.unlink()
+        self.memories = list()
+
+
+class SharedMemoryRemote(object):
+    """
+    Worker-side connection wrapper which writes states into the shared-memory ring.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.function = None
+        self.buffers = None
+        self.slot = 0
+
+    def attach(self, specs, num_slots, names):
+        self.buffers = SharedMemoryBuffers(specs=specs, num_slots=num_slots, names=names)
+
+    def write(self, states):
+        slot = self.slot
+        self.slot = (self.slot + 1) % self.buffers.num_slots
+        return self.buffers.write(states=states, slot=slot), slot
+
+    def close(self, unlink):
+        if self.buffers is not None:
+            self.buffers.close(unlink=unlink)
+            self.buffers = None
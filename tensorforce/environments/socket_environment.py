@@ -13,17 +13,19 @@
 # limitations under the License.
 # ==============================================================================
 
-from socket import SHUT_RDWR, socket as Socket
+from collections import deque
+from multiprocessing import Pipe, Process
+from multiprocessing.connection import wait as wait_connections
+from socket import IPPROTO_TCP, MSG_PEEK, SHUT_RDWR, SO_REUSEADDR, SOL_SOCKET, TCP_NODELAY, \
+    socket as Socket
+import struct
 import time
 
 import msgpack
-import msgpack_numpy
+import numpy as np
 
 from tensorforce import TensorforceError
-from tensorforce.environments import RemoteEnvironment
-
-
-msgpack_numpy.patch()
+from tensorforce.environments import MultiprocessingEnvironment, RemoteEnvironment
 
 
 class SocketEnvironment(RemoteEnvironment):
@@ -32,111 +34,290 @@ class SocketEnvironment(RemoteEnvironment):
 
     Rabault, J., Kuhnle, A (2019). Accelerating Deep Reinforcement Leaning strategies of Flow
     Control through a multi-environment approach. Physics of Fluids.
+
+    Wire protocol (version 2): each message consists of a fixed 8-byte header (protocol version,
+    number of raw buffers, number of metadata bytes), a table of raw buffer sizes (8 bytes each),
+    the msgpack-encoded metadata and the raw buffers. Numeric NumPy arrays are not serialized but
+    replaced in the metadata by a (buffer index, dtype, shape) descriptor, and their memory is
+    sent as is via scatter/gather I/O. On the receiving side, the message body is read via
+    `recv_into` into a single preallocated buffer, and arrays are returned as NumPy views into it.
+
+    A socket server started with `num_instances` hosts multiple environment instances, each in its
+    own process, behind a single port. Requests and results are then tagged with the environment
+    id, and the environment instances of a client connected with the same host and port share one
+    socket connection, so requests for all of them can be sent without waiting for each result.
+
+    Args:
+        host (str): Socket server hostname or IP address
+            (<span style="color:#C00000"><b>required</b></span>).
+        port (int): Socket server port
+            (<span style="color:#C00000"><b>required</b></span>).
+        blocking (bool): Whether remote environment calls should be blocking
+            (<span style="color:#00C000"><b>default</b></span>: not blocking).
+        environment_id (int >= 0): Environment instance id on a socket server hosting multiple
+            environment instances
+            (<span style="color:#00C000"><b>default</b></span>: socket server hosting a single
+            environment instance).
     """
 
-    MAX_BYTES = 4096
+    PROTOCOL_VERSION = 2
+
+    HEADER = struct.Struct('!BxHI')
+
+    ARRAY_EXT_TYPE = 1
+
+    MAX_BUFFERS_PER_SEND = 512
+
+    @classmethod
+    def encode_message(cls, obj, buffers):
+        # Recursively replaces numeric arrays by msgpack extension descriptors
+        if isinstance(obj, np.ndarray):
+            if obj.dtype.kind in 'biuf':
+                obj = np.ascontiguousarray(obj)
+                descriptor = msgpack.packb((len(buffers), obj.dtype.str, obj.shape))
+                buffers.append(memoryview(obj.reshape(-1)).cast('B'))
+                return msgpack.ExtType(cls.ARRAY_EXT_TYPE, descriptor)
+            else:
+                return obj.tolist()
+        elif isinstance(obj, np.generic):
+            return obj.item()
+        elif isinstance(obj, dict):
+            return {
+                key: cls.encode_message(obj=value, buffers=buffers) for key, value in obj.items()
+            }
+        elif isinstance(obj, (tuple, list)):
+            return [cls.encode_message(obj=value, buffers=buffers) for value in obj]
+        else:
+            return obj
 
     @classmethod
-    def remote(cls, port, environment, max_episode_timesteps=None, **kwargs):
+    def decode_message(cls, metadata, buffers):
+        def ext_hook(code, data):
+            if code != cls.ARRAY_EXT_TYPE:
+                raise TensorforceError.unexpected()
+            index, dtype, shape = msgpack.unpackb(data)
+            return np.frombuffer(buffers[index], dtype=np.dtype(dtype)).reshape(shape)
+
+        return msgpack.unpackb(metadata, ext_hook=ext_hook)
+
+    @classmethod
+    def pack_message(cls, obj):
+        buffers = list()
+        metadata = msgpack.packb(cls.encode_message(obj=obj, buffers=buffers))
+        header = cls.HEADER.pack(cls.PROTOCOL_VERSION, len(buffers), len(metadata))
+        sizes = struct.pack('!{}Q'.format(len(buffers)), *(len(x) for x in buffers))
+        return [header + sizes, metadata] + buffers
+
+    @classmethod
+    def unpack_header(cls, header):
+        version, num_buffers, num_metadata_bytes = cls.HEADER.unpack(header)
+        if version != cls.PROTOCOL_VERSION:
+            raise TensorforceError.value(
+                name='SocketEnvironment', argument='protocol version', value=version,
+                hint='!= {}'.format(cls.PROTOCOL_VERSION)
+            )
+        return num_buffers, num_metadata_bytes
+
+    @classmethod
+    def unpack_body(cls, body, num_metadata_bytes, sizes):
+        view = memoryview(body)
+        metadata = view[:num_metadata_bytes]
+        buffers = list()
+        offset = num_metadata_bytes
+        for size in sizes:
+            buffers.append(view[offset: offset + size])
+            offset += size
+        return cls.decode_message(metadata=metadata, buffers=buffers)
+
+    @classmethod
+    def send_message(cls, connection, obj):
+        buffers = [x for x in cls.pack_message(obj=obj) if len(x) > 0]
+        if not hasattr(connection, 'sendmsg'):
+            for buffer in buffers:
+                connection.sendall(buffer)
+            return
+        buffers = [memoryview(x).cast('B') for x in buffers]
+        while len(buffers) > 0:
+            bytes_sent = connection.sendmsg(buffers[:cls.MAX_BUFFERS_PER_SEND])
+            # Partial send: drop completely sent buffers and slice the remainder
+            while bytes_sent > 0:
+                if bytes_sent >= len(buffers[0]):
+                    bytes_sent -= len(buffers[0])
+                    buffers.pop(0)
+                else:
+                    buffers[0] = buffers[0][bytes_sent:]
+                    bytes_sent = 0
+
+    @classmethod
+    def receive_into(cls, connection, buffer):
+        view = memoryview(buffer)
+        offset = 0
+        while offset < len(view):
+            num_bytes = connection.recv_into(view[offset:])
+            if num_bytes == 0:
+                raise TensorforceError(message="Remote socket connection closed unexpectedly.")
+            offset += num_bytes
+        return buffer
+
+    @classmethod
+    def receive_message(cls, connection):
+        header = cls.receive_into(connection=connection, buffer=bytearray(cls.HEADER.size))
+        num_buffers, num_metadata_bytes = cls.unpack_header(header=header)
+        sizes = cls.receive_into(connection=connection, buffer=bytearray(8 * num_buffers))
+        sizes = struct.unpack('!{}Q'.format(num_buffers), sizes)
+        body = cls.receive_into(
+            connection=connection, buffer=bytearray(num_metadata_bytes + sum(sizes))
+        )
+        return cls.unpack_body(body=body, num_metadata_bytes=num_metadata_bytes, sizes=sizes)
+
+    @classmethod
+    def remote(
+        cls, port, environment, max_episode_timesteps=None, num_instances=None, **kwargs
+    ):
+        if num_instances is not None:
+            return cls.remote_multiplexed(
+                port=port, environment=environment, max_episode_timesteps=max_episode_timesteps,
+                num_instances=num_instances, **kwargs
+            )
         socket = Socket()
+        socket.setsockopt(SOL_SOCKET, SO_REUSEADDR, 1)
         socket.bind(('', port))
         socket.listen(1)
         connection, address = socket.accept()
         socket.close()
+        connection.setsockopt(IPPROTO_TCP, TCP_NODELAY, 1)
         super().remote(
             connection=connection, environment=environment,
             max_episode_timesteps=max_episode_timesteps, **kwargs
         )
 
     @classmethod
-    def proxy_send(cls, connection, function, kwargs):
-        str_function = function.encode()
-        num_bytes = len(str_function)
-        str_num_bytes = '{:08d}'.format(num_bytes).encode()
-        bytes_sent = connection.send(str_num_bytes + str_function)
-        if bytes_sent != num_bytes + 8:
-            raise TensorforceError.unexpected()
+    def remote_multiplexed(
+        cls, port, environment, num_instances, max_episode_timesteps=None, **kwargs
+    ):
+        if not isinstance(num_instances, int) or num_instances < 1:
+            raise TensorforceError.value(
+                name='SocketEnvironment.remote', argument='num_instances', value=num_instances,
+                hint='< 1'
+            )
+
+        # Environment instances run in worker processes, communicating via pipes
+        pipes = dict()
+        processes = list()
+        for environment_id in range(num_instances):
+            proxy_connection, remote_connection = Pipe(duplex=True)
+            process = Process(
+                target=MultiprocessingEnvironment.remote, kwargs=dict(
+                    connection=remote_connection, environment=environment,
+                    max_episode_timesteps=max_episode_timesteps, **kwargs
+                )
+            )
+            process.start()
+            # Only the worker process keeps the remote end, so its exit is signaled as EOF
+            remote_connection.close()
+            pipes[proxy_connection] = environment_id
+            processes.append(process)
+
+        connection = None
+        try:
+            socket = Socket()
+            socket.setsockopt(SOL_SOCKET, SO_REUSEADDR, 1)
+            socket.bind(('', port))
+            socket.listen(1)
+            connection, address = socket.accept()
+            socket.close()
+            connection.setsockopt(IPPROTO_TCP, TCP_NODELAY, 1)
+            proxy_connections = {environment_id: pipe for pipe, environment_id in pipes.items()}
 
-        str_kwargs = msgpack.packb(o=kwargs)
-        num_bytes = len(str_kwargs)
-        str_num_bytes = '{:08d}'.format(num_bytes).encode()
-        bytes_sent = connection.send(str_num_bytes + str_kwargs)
-        if bytes_sent != num_bytes + 8:
-            raise TensorforceError.unexpected()
+            # Forward requests to and results from worker processes as soon as they are available
+            closing = set()
+            waitables = [connection] + list(pipes)
+            while len(pipes) > 0:
+                for ready in wait_connections(object_list=waitables):
+                    if ready is connection:
+                        if len(connection.recv(1, MSG_PEEK)) == 0:
+                            # Client disconnected, only wait for worker processes being closed
+                            waitables.remove(connection)
+                            for pipe, environment_id in list(pipes.items()):
+                                if environment_id not in closing:
+                                    waitables.remove(pipe)
+                                    pipes.pop(pipe)
+                                    pipe.close()
+                                    processes[environment_id].terminate()
+                                    processes[environment_id].join()
+                            continue
+                        environment_id, function, kwargs = cls.receive_message(
+                            connection=connection
+                        )
+                        if function == 'close':
+                            closing.add(environment_id)
+                        proxy_connections[environment_id].send(obj=(function, kwargs))
+                    else:
+                        try:
+                            success, result = ready.recv()
+                        except EOFError:
+                            # Worker process finished after close request or failure
+                            waitables.remove(ready)
+                            processes[pipes.pop(ready)].join()
+                            ready.close()
+                            continue
+                        if connection in waitables:
+                            cls.send_message(
+                                connection=connection, obj=(pipes[ready], success, result)
+                            )
+
+        finally:
+            for pipe, environment_id in pipes.items():
+                pipe.close()
+                processes[environment_id].terminate()
+                processes[environment_id].join()
+            if connection is not None:
+                connection.close()
 
     @classmethod
-    def proxy_receive(cls, connection):
-        str_success = connection.recv(1)
-        if len(str_success) != 1:
-            raise TensorforceError.unexpected()
-        success = bool(str_success)
-
-        str_num_bytes = connection.recv(8)
-        if len(str_num_bytes) != 8:
-            raise TensorforceError.unexpected()
-        num_bytes = int(str_num_bytes.decode())
-        str_result = b''
-        for n in range(num_bytes // cls.MAX_BYTES):
-            str_result += connection.recv(cls.MAX_BYTES)
-            if len(str_result) != n * cls.MAX_BYTES:
-                raise TensorforceError.unexpected()
-        str_result += connection.recv(num_bytes % cls.MAX_BYTES)
-        if len(str_result) != num_bytes:
-            raise TensorforceError.unexpected()
-        result = msgpack.unpackb(packed=str_result)
+    def proxy_send(cls, connection, function, kwargs):
+        if isinstance(connection, tuple):
+            connection[0].send(environment_id=connection[1], function=function, kwargs=kwargs)
+        else:
+            cls.send_message(connection=connection, obj=(function, kwargs))
 
+    @classmethod
+    def proxy_receive(cls, connection):
+        if isinstance(connection, tuple):
+            success, result = connection[0].receive(environment_id=connection[1])
+        else:
+            success, result = cls.receive_message(connection=connection)
         return success, result
 
     @classmethod
     def proxy_close(cls, connection):
-        connection.shutdown(SHUT_RDWR)
-        connection.close()
+        if isinstance(connection, tuple):
+            connection[0].release()
+        else:
+            connection.shutdown(SHUT_RDWR)
+            connection.close()
 
     @classmethod
-    def remote_send(cls, connection, success, result):
-        str_success = str(int(success)).encode()
-        bytes_sent = connection.send(str_success)
-        if bytes_sent != 1:
-            raise TensorforceError.unexpected()
+    def proxy_waitable(cls, connection):
+        if isinstance(connection, tuple):
+            return connection[0].socket
+        else:
+            return connection
 
-        str_result = msgpack.packb(o=result)
-        num_bytes = len(str_result)
-        str_num_bytes = '{:08d}'.format(num_bytes).encode()
-        bytes_sent = connection.send(str_num_bytes + str_result)
-        assert bytes_sent == num_bytes + 8
-        if bytes_sent != num_bytes + 8:
-            raise TensorforceError.unexpected()
+    @classmethod
+    def proxy_poll(cls, connection):
+        if isinstance(connection, tuple):
+            return connection[0].poll(environment_id=connection[1])
+        else:
+            return None
 
     @classmethod
-    def remote_receive(cls, connection):
-        str_num_bytes = connection.recv(8)
-        if len(str_num_bytes) != 8:
-            raise TensorforceError.unexpected()
-        num_bytes = int(str_num_bytes.decode())
-        str_function = b''
-        for n in range(num_bytes // cls.MAX_BYTES):
-            str_function += connection.recv(cls.MAX_BYTES)
-            if len(str_function) != n * cls.MAX_BYTES:
-                raise TensorforceError.unexpected()
-        str_function += connection.recv(num_bytes % cls.MAX_BYTES)
-        if len(str_function) != num_bytes:
-            raise TensorforceError.unexpected()
-        function = str_function.decode()
-
-        str_num_bytes = connection.recv(8)
-        if len(str_num_bytes) != 8:
-            raise TensorforceError.unexpected()
-        num_bytes = int(str_num_bytes.decode())
-        str_kwargs = b''
-        for n in range(num_bytes // cls.MAX_BYTES):
-            str_kwargs += connection.recv(cls.MAX_BYTES)
-            if len(str_kwargs) != n * cls.MAX_BYTES:
-                raise TensorforceError.unexpected()
-        str_kwargs += connection.recv(num_bytes % cls.MAX_BYTES)
-        if len(str_kwargs) != num_bytes:
-            raise TensorforceError.unexpected()
-        kwargs = msgpack.unpackb(packed=str_kwargs)
+    def remote_send(cls, connection, success, result):
+        cls.send_message(connection=connection, obj=(success, result))
 
+    @classmethod
+    def remote_receive(cls, connection):
+        function, kwargs = cls.receive_message(connection=connection)
         return function, kwargs
 
     @classmethod
@@ -144,7 +325,8 @@ class SocketEnvironment(RemoteEnvironment):
         connection.shutdown(SHUT_RDWR)
         connection.close()
 
-    def __init__(self, host, port, blocking=False):
+    @classmethod
+    def connect(cls, host, port):
         socket = Socket()
         for _ in range(100):  # TODO: 10sec timeout, not configurable
             try:
@@ -154,4 +336,64 @@ class SocketEnvironment(RemoteEnvironment):
                 time.sleep(0.1)
         else:
             raise TensorforceError("Remote socket connection could not be established.")
-        super().__init__(connection=socket, blocking=blocking)
+        socket.setsockopt(IPPROTO_TCP, TCP_NODELAY, 1)
+        return socket
+
+    def __init__(self, host, port, blocking=False, environment_id=None):
+        if environment_id is None:
+            connection = self.__class__.connect(host=host, port=port)
+        else:
+            connection = (SocketMultiplexer.acquire(host=host, port=port), environment_id)
+        super().__init__(connection=connection, blocking=blocking)
+
+
+class SocketMultiplexer(object):
+    """
+    Client-side socket connection shared by the environment instances hosted by one socket server,
+    which buffers results per environment id in the order received.
+    """
+
+    multiplexers = dict()
+
+    @classmethod
+    def acquire(cls, host, port):
+        if (host, port) not in cls.multiplexers:
+            cls.multiplexers[(host, port)] = SocketMultiplexer(host=host, port=port)
+        multiplexer = cls.multiplexers[(host, port)]
+        multiplexer.num_references += 1
+        return multiplexer
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.socket = SocketEnvironment.connect(host=host, port=port)
+        self.results = dict()
+        self.num_references = 0
+
+    def send(self, environment_id, function, kwargs):
+        SocketEnvironment.send_message(
+            connection=self.socket, obj=(environment_id, function, kwargs)
+        )
+
+    def receive_next(self):
+        environment_id, success, result = SocketEnvironment.receive_message(connection=self.socket)
+        self.results.setdefault(environment_id, deque()).append((success, result))
+
+    def poll(self, environment_id):
+        while len(self.results.get(environment_id, ())) == 0:
+            if len(wait_connections(object_list=(self.socket,), timeout=0.0)) == 0:
+                return False
+            self.receive_next()
+        return True
+
+    def receive(self, environment_id):
+        while len(self.results.get(environment_id, ())) == 0:
+            self.receive_next()
+        return self.results[environment_id].popleft()
+
+    def release(self):
+        self.num_references -= 1
+        if self.num_references == 0:
+            SocketMultiplexer.multiplexers.pop((self.host, self.port))
+            self.socket.shutdown(SHUT_RDWR)
+            self.socket.close()
@@ -13,13 +13,15 @@
 # limitations under the License.
 # ==============================================================================
 
+import asyncio
 import time
 
 import numpy as np
 from tqdm import tqdm
 
 from tensorforce import Agent, Environment, TensorforceError, util
-from tensorforce.environments import RemoteEnvironment
+from tensorforce.environments import AsyncRemoteEnvironment, RemoteEnvironment, \
+    VectorEnvironment
 
 
 class Runner(object):
@@ -34,7 +36,9 @@ class Runner(object):
             (<span style="color:#C00000"><b>required</b></span>).
         environment (specification | Environment object): Environment specification or object, the
             latter is not (!) closed automatically as part of `runner.close()`, argument
-            `max_episode_timesteps` is implicitly specified as the following argument
+            `max_episode_timesteps` is implicitly specified as the following argument, a
+            `VectorEnvironment` is executed as `num_environments()` parallel environments with
+            batched agent calls
             (<span style="color:#C00000"><b>required</b></span>, or alternatively `environments`,
             invalid for "socket-client" remote mode).
         max_episode_timesteps (int > 0): Maximum number of timesteps per episode, overwrites the
@@ -53,20 +57,23 @@ class Runner(object):
         evaluation (bool): Whether to run the last of multiple parallel environments in evaluation
             mode, only valid with `num_parallel` or `environments`
             (<span style="color:#00C000"><b>default</b></span>: no evaluation).
-        remote ("multiprocessing" | "socket-client"): Communication mode for remote environment
-            execution of parallelized environment execution, not compatible with environment(s)
-            given as Environment objects, "socket-client" mode requires a corresponding
-            "socket-server" running
+        remote ("multiprocessing" | "shared-memory" | "socket-client" | "async-socket-client"):
+            Communication mode for remote environment execution of parallelized environment
+            execution, not compatible with environment(s) given as Environment objects,
+            "shared-memory" is a multiprocessing mode which transfers states via preallocated
+            shared memory, "(async-)socket-client" mode requires a corresponding "socket-server"
+            running, and "async-socket-client" mode is required for `arun()`
             (<span style="color:#00C000"><b>default</b></span>: local execution).
         blocking (bool): Whether remote environment calls should be blocking, only valid if remote
             mode given
             (<span style="color:#00C000"><b>default</b></span>: not blocking, invalid unless
-            "multiprocessing" or "socket-client" remote mode).
+            "multiprocessing", "shared-memory" or "(async-)socket-client" remote mode).
         host (str, iter[str]): Socket server hostname(s) or IP address(es)
-            (<span style="color:#C00000"><b>required</b></span> only for "socket-client" remote
-            mode).
+            (<span style="color:#C00000"><b>required</b></span> only for "(async-)socket-client"
+            remote mode).
         port (int, iter[int]): Socket server port(s), increasing sequence if single host and port
-            given
+            given, environments with the same host and port are addressed as environment instances
+            of one socket server hosting multiple instances and share a multiplexed connection
             (<span style="color:#C00000"><b>required</b></span> only for "socket-client" remote
             mode).
     """
@@ -76,7 +83,7 @@ class Runner(object):
         environments=None, evaluation=False, remote=None, blocking=False, host=None, port=None
     ):
         if environment is None and environments is None:
-            if remote != 'socket-client':
+            if remote not in ('socket-client', 'async-socket-client'):
                 raise TensorforceError.required(
                     name='Runner', argument='environment or environments'
                 )
@@ -157,11 +164,20 @@ class Runner(object):
                     name='Runner', argument='len(host)', value=len(host), hint='!= num_parallel'
                 )
 
+        # Socket-client environments with the same host and port share a multiplexed connection
+        socket_kwargs = [dict() for _ in range(num_parallel)]
+        if remote == 'socket-client':
+            addresses = list(zip(host, port))
+            for n, address in enumerate(addresses):
+                if addresses.count(address) > 1:
+                    socket_kwargs[n]['environment_id'] = addresses[:n].count(address)
+
         self.environments = list()
         self.is_environment_external = isinstance(environments[0], Environment)
         environment = Environment.create(
             environment=environments[0], max_episode_timesteps=max_episode_timesteps,
-            remote=remote, blocking=blocking, host=host[0], port=port[0]
+            remote=remote, blocking=blocking, host=host[0], port=port[0],
+            **socket_kwargs[0]
         )
         self.is_environment_remote = isinstance(environment, RemoteEnvironment)
         states = environment.states()
@@ -172,13 +188,26 @@ class Runner(object):
             assert isinstance(environment, Environment) == self.is_environment_external
             environment = Environment.create(
                 environment=environment, max_episode_timesteps=max_episode_timesteps,
-                remote=remote, blocking=blocking, host=host[n], port=port[n]
+                remote=remote, blocking=blocking, host=host[n], port=port[n],
+                **socket_kwargs[n]
             )
             assert isinstance(environment, RemoteEnvironment) == self.is_environment_remote
             assert util.is_equal(x=environment.states(), y=states)
             assert util.is_equal(x=environment.actions(), y=actions)
             self.environments.append(environment)
 
+        self.is_environment_vectorized = isinstance(self.environments[0], VectorEnvironment)
+        if self.is_environment_vectorized:
+            if num_parallel > 1:
+                raise TensorforceError.invalid(
+                    name='Runner', argument='num_parallel', condition='VectorEnvironment'
+                )
+            if evaluation:
+                raise TensorforceError.invalid(
+                    name='Runner', argument='evaluation', condition='VectorEnvironment'
+                )
+            num_parallel = self.environments[0].num_environments()
+
         self.evaluation = evaluation
 
         self.is_agent_external = isinstance(agent, Agent)
@@ -234,7 +263,9 @@ class Runner(object):
             sync_episodes (bool): Whether to synchronize parallel environment execution on
                 episode-level
                 (<span style="color:#00C000"><b>default</b></span>: false).
-            num_sleep_secs (float): Sleep duration if no environment is ready
+            num_sleep_secs (float): Sleep duration if no environment is ready, only relevant for
+                non-remote environments since the runner otherwise waits on the remote
+                environment connections until a result is available
                 (<span style="color:#00C000"><b>default</b></span>: one milliseconds).
             callback ((Runner, parallel) -> bool): Callback function taking the runner instance
                 plus parallel index and returning a boolean value indicating whether execution
@@ -268,6 +299,172 @@ class Runner(object):
                 (<span style="color:#00C000"><b>default</b></span>: cumulative evaluation reward
                 averaged over mean_horizon episodes).
         """
+        self.initialize_run(
+            num_episodes=num_episodes, num_timesteps=num_timesteps, num_updates=num_updates,
+            batch_agent_calls=batch_agent_calls, sync_timesteps=sync_timesteps,
+            sync_episodes=sync_episodes, num_sleep_secs=num_sleep_secs, callback=callback,
+            callback_episode_frequency=callback_episode_frequency,
+            callback_timestep_frequency=callback_timestep_frequency, use_tqdm=use_tqdm,
+            mean_horizon=mean_horizon, evaluation=evaluation, save_best_agent=save_best_agent,
+            evaluation_callback=evaluation_callback
+        )
+
+        # VectorEnvironment loop
+        if self.is_environment_vectorized:
+            self.is_reset_on_terminal = False
+            self.run_vectorized()
+            return
+        self.is_reset_on_terminal = True
+
+        # Episode statistics
+        self.episode_reward = [0.0 for _ in self.environments]
+        self.episode_timestep = [0 for _ in self.environments]
+        # if self.batch_agent_calls:
+        #     self.episode_agent_second = 0.0
+        #     self.episode_start = time.time()
+        if self.evaluation_run:
+            self.episode_agent_second = [0.0 for _ in self.environments[:-1]]
+            self.episode_start = [time.time() for _ in self.environments[:-1]]
+        else:
+            self.episode_agent_second = [0.0 for _ in self.environments]
+            self.episode_start = [time.time() for _ in self.environments]
+        self.evaluation_agent_second = 0.0
+        self.evaluation_start = time.time()
+
+        # Values
+        self.terminate = 0
+        self.prev_terminals = [-1 for _ in self.environments]
+        self.states = [None for _ in self.environments]
+        self.terminals = [None for _ in self.environments]
+        self.rewards = [None for _ in self.environments]
+        if self.evaluation_run:
+            self.evaluation_internals = self.agent.initial_internals()
+
+        # Required if agent was previously stopped mid-episode
+        self.agent.reset()
+
+        # Reset environments
+        for environment in self.environments:
+            environment.start_reset()
+
+        # Runner loop
+        while any(terminal <= 0 for terminal in self.prev_terminals):
+            self.terminals = [None for _ in self.terminals]
+
+            if self.batch_agent_calls:
+                # Retrieve observations (only if not already terminated)
+                while any(terminal is None for terminal in self.terminals):
+                    for n in range(len(self.environments)):
+                        if self.terminals[n] is not None:
+                            # Already received
+                            continue
+                        elif self.prev_terminals[n] <= 0:
+                            # Receive if not terminal
+                            observation = self.environments[n].receive_execute()
+                            if observation is None:
+                                continue
+                            self.states[n], self.terminals[n], self.rewards[n] = observation
+                        else:
+                            # Terminal
+                            self.states[n] = None
+                            self.terminals[n] = self.prev_terminals[n]
+                            self.rewards[n] = None
+
+                    # Wait until one of the remaining environments is ready
+                    if any(terminal is None for terminal in self.terminals):
+                        self.wait_environments(parallel=[
+                            n for n, terminal in enumerate(self.terminals) if terminal is None
+                        ])
+
+                self.handle_observe_joint()
+                self.handle_act_joint()
+
+            # Parallel environments loop
+            no_environment_ready = True
+            for n in range(len(self.environments)):
+
+                if self.prev_terminals[n] > 0:
+                    # Continue if episode terminated (either sync_episodes or finished)
+                    self.terminals[n] = self.prev_terminals[n]
+                    continue
+
+                elif self.batch_agent_calls:
+                    # Handled before parallel environments loop
+                    pass
+
+                elif self.sync_timesteps:
+                    # Wait until environment is ready
+                    while True:
+                        observation = self.environments[n].receive_execute()
+                        if observation is not None:
+                            break
+                        self.wait_environments(parallel=[n])
+
+                else:
+                    # Check whether environment is ready, otherwise continue
+                    observation = self.environments[n].receive_execute()
+                    if observation is None:
+                        self.terminals[n] = self.prev_terminals[n]
+                        continue
+
+                no_environment_ready = False
+                if not self.batch_agent_calls:
+                    self.states[n], self.terminals[n], self.rewards[n] = observation
+
+                # Check whether evaluation environment
+                if self.evaluation_run and n == (len(self.environments) - 1):
+                    if self.terminals[n] == -1:
+                        # Initial act
+                        self.handle_act_evaluation()
+                    else:
+                        # Observe
+                        self.handle_observe_evaluation()
+                        if self.terminals[n] == 0:
+                            # Act
+                            self.handle_act_evaluation()
+                        else:
+                            # Terminal
+                            self.handle_terminal_evaluation()
+
+                else:
+                    if self.terminals[n] == -1:
+                        # Initial act
+                        self.handle_act(parallel=n)
+                    else:
+                        # Observe
+                        self.handle_observe(parallel=n)
+                        if self.terminals[n] == 0:
+                            # Act
+                            self.handle_act(parallel=n)
+                        else:
+                            # Terminal
+                            self.handle_terminal(parallel=n)
+
+            self.prev_terminals = list(self.terminals)
+
+            # Sync_episodes: Reset if all episodes terminated
+            if self.sync_episodes and all(terminal > 0 for terminal in self.terminals):
+                num_episodes_left = self.num_episodes - self.episodes
+                num_noneval_environments = len(self.environments) - int(self.evaluation_run)
+                for n in range(min(num_noneval_environments, num_episodes_left)):
+                    self.prev_terminals[n] = -1
+                    self.environments[n].start_reset()
+                if self.evaluation_run and num_episodes_left > 0:
+                    self.prev_terminals[-1] = -1
+                    self.environments[-1].start_reset()
+
+            # Wait if no environment was ready
+            if no_environment_ready:
+                self.wait_environments(parallel=[
+                    n for n, terminal in enumerate(self.prev_terminals) if terminal <= 0
+                ])
+
+    def initialize_run(
+        self, num_episodes, num_timesteps, num_updates, batch_agent_calls, sync_timesteps,
+        sync_episodes, num_sleep_secs, callback, callback_episode_frequency,
+        callback_timestep_frequency, use_tqdm, mean_horizon, evaluation, save_best_agent,
+        evaluation_callback
+    ):
         # General
         if num_episodes is None:
             self.num_episodes = float('inf')
@@ -283,7 +480,14 @@ class Runner(object):
             self.num_updates = num_updates
 
         # Parallel
-        if len(self.environments) > 1:
+        if self.is_environment_vectorized:
+            # VectorEnvironment implies batched agent calls and synchronized timesteps
+            if sync_episodes:
+                raise TensorforceError.invalid(
+                    name='Runner.run', argument='sync_episodes', condition='VectorEnvironment'
+                )
+            batch_agent_calls = True
+        elif len(self.environments) > 1:
             pass
         elif batch_agent_calls:
             raise TensorforceError.invalid(
@@ -442,7 +646,7 @@ class Runner(object):
             self.callback = tqdm_callback
 
         # Evaluation
-        if evaluation and len(self.environments) > 1:
+        if evaluation and (len(self.environments) > 1 or self.is_environment_vectorized):
             raise TensorforceError.invalid(
                 name='Runner.run', argument='evaluation', condition='multiple environments'
             )
@@ -465,139 +669,250 @@ class Runner(object):
             self.evaluation_callback = mean_reward_callback
             self.best_evaluation_score = None
 
+    async def arun(
+        self,
+        # General
+        num_episodes=None, num_timesteps=None, num_updates=None,
+        # Callback
+        callback=None, callback_episode_frequency=None, callback_timestep_frequency=None,
+        # Tqdm
+        use_tqdm=True, mean_horizon=1
+    ):
+        """
+        Run experiment as asyncio coroutine, requires "async-socket-client" remote environments.
+
+        All environments are kept in flight on the running event loop, and in each scheduling
+        round the agent acts and observes batched over all environments which have completed
+        their request in the meantime.
+
+        Args:
+            num_episodes (int > 0): Number of episodes to run experiment
+                (<span style="color:#00C000"><b>default</b></span>: no episode limit).
+            num_timesteps (int > 0): Number of timesteps to run experiment
+                (<span style="color:#00C000"><b>default</b></span>: no timestep limit).
+            num_updates (int > 0): Number of agent updates to run experiment
+                (<span style="color:#00C000"><b>default</b></span>: no update limit).
+            callback ((Runner, parallel) -> bool): Callback function taking the runner instance
+                plus parallel index and returning a boolean value indicating whether execution
+                should continue
+                (<span style="color:#00C000"><b>default</b></span>: callback always true).
+            callback_episode_frequency (int): Episode interval between callbacks
+                (<span style="color:#00C000"><b>default</b></span>: every episode).
+            callback_timestep_frequency (int): Timestep interval between callbacks
+                (<span style="color:#00C000"><b>default</b></span>: not specified).
+            use_tqdm (bool): Whether to display a tqdm progress bar for the experiment run, see
+                `run()`
+                (<span style="color:#00C000"><b>default</b></span>: true).
+            mean_horizon (int): Number of episodes progress bar values are averaged over
+                (<span style="color:#00C000"><b>default</b></span>: not averaged).
+        """
+        if not all(isinstance(x, AsyncRemoteEnvironment) for x in self.environments):
+            raise TensorforceError.invalid(
+                name='Runner.arun', argument='environments',
+                condition='not async-socket-client remote mode'
+            )
+        if self.evaluation:
+            raise TensorforceError.invalid(
+                name='Runner.arun', argument='evaluation', condition='arun'
+            )
+
+        self.initialize_run(
+            num_episodes=num_episodes, num_timesteps=num_timesteps, num_updates=num_updates,
+            batch_agent_calls=False, sync_timesteps=False, sync_episodes=False,
+            num_sleep_secs=None, callback=callback,
+            callback_episode_frequency=callback_episode_frequency,
+            callback_timestep_frequency=callback_timestep_frequency, use_tqdm=use_tqdm,
+            mean_horizon=mean_horizon, evaluation=False, save_best_agent=None,
+            evaluation_callback=None
+        )
+        self.is_reset_on_terminal = False
+
         # Episode statistics
         self.episode_reward = [0.0 for _ in self.environments]
         self.episode_timestep = [0 for _ in self.environments]
-        # if self.batch_agent_calls:
-        #     self.episode_agent_second = 0.0
-        #     self.episode_start = time.time()
-        if self.evaluation_run:
-            self.episode_agent_second = [0.0 for _ in self.environments[:-1]]
-            self.episode_start = [time.time() for _ in self.environments[:-1]]
-        else:
-            self.episode_agent_second = [0.0 for _ in self.environments]
-            self.episode_start = [time.time() for _ in self.environments]
-        self.evaluation_agent_second = 0.0
-        self.evaluation_start = time.time()
+        self.episode_agent_second = [0.0 for _ in self.environments]
+        self.episode_start = [time.time() for _ in self.environments]
 
         # Values
         self.terminate = 0
-        self.prev_terminals = [-1 for _ in self.environments]
-        self.states = [None for _ in self.environments]
-        self.terminals = [None for _ in self.environments]
-        self.rewards = [None for _ in self.environments]
-        if self.evaluation_run:
-            self.evaluation_internals = self.agent.initial_internals()
 
         # Required if agent was previously stopped mid-episode
         self.agent.reset()
 
+        async def reset(environment):
+            return await environment.areset(), -1, None
+
         # Reset environments
-        for environment in self.environments:
-            environment.start_reset()
+        pending = dict()
+        for n, environment in enumerate(self.environments):
+            pending[asyncio.ensure_future(reset(environment=environment))] = n
 
         # Runner loop
-        while any(terminal <= 0 for terminal in self.prev_terminals):
-            self.terminals = [None for _ in self.terminals]
-
-            if self.batch_agent_calls:
-                # Retrieve observations (only if not already terminated)
-                while any(terminal is None for terminal in self.terminals):
-                    for n in range(len(self.environments)):
-                        if self.terminals[n] is not None:
-                            # Already received
-                            continue
-                        elif self.prev_terminals[n] <= 0:
-                            # Receive if not terminal
-                            observation = self.environments[n].receive_execute()
-                            if observation is None:
-                                continue
-                            self.states[n], self.terminals[n], self.rewards[n] = observation
-                        else:
-                            # Terminal
-                            self.states[n] = None
-                            self.terminals[n] = self.prev_terminals[n]
-                            self.rewards[n] = None
-
-                self.handle_observe_joint()
-                self.handle_act_joint()
+        while len(pending) > 0:
+            done, _ = await asyncio.wait(list(pending), return_when=asyncio.FIRST_COMPLETED)
+
+            # Collect results of completed environments
+            parallel = list()
+            states = list()
+            terminals = list()
+            rewards = list()
+            for task in done:
+                n = pending.pop(task)
+                parallel.append(n)
+                state, terminal, reward = task.result()
+                states.append(state)
+                terminals.append(terminal)
+                rewards.append(reward)
+
+            # Observe (batched over completed environments)
+            observe = [index for index, terminal in enumerate(terminals) if terminal >= 0]
+            if len(observe) > 0:
+                for index in observe:
+                    n = parallel[index]
+                    self.episode_reward[n] += rewards[index]
+                    # Not terminal but finished
+                    if terminals[index] == 0 and self.terminate == 2:
+                        terminals[index] = 2
+                agent_start = time.time()
+                updated = self.agent.observe(
+                    terminal=[terminals[index] for index in observe],
+                    reward=[rewards[index] for index in observe],
+                    parallel=[parallel[index] for index in observe]
+                )
+                agent_second = (time.time() - agent_start) / len(observe)
+                for index in observe:
+                    self.episode_agent_second[parallel[index]] += agent_second
+                self.updates += updated
+
+                # Maximum number of updates (after counter increment!)
+                if self.updates >= self.num_updates:
+                    self.terminate = 2
+
+            # Terminal
+            for index in observe:
+                if terminals[index] > 0:
+                    n = parallel[index]
+                    self.handle_terminal(parallel=n)
+                    if self.terminate == 0:
+                        pending[asyncio.ensure_future(reset(environment=self.environments[n]))] = n
+
+            # Act (batched over completed environments)
+            act = [index for index, terminal in enumerate(terminals) if terminal <= 0]
+            if len(act) > 0:
+                agent_start = time.time()
+                actions = self.agent.act(
+                    states=[states[index] for index in act],
+                    parallel=[parallel[index] for index in act]
+                )
+                agent_second = (time.time() - agent_start) / len(act)
+                for index, action in zip(act, actions):
+                    n = parallel[index]
+                    self.episode_agent_second[n] += agent_second
+                    execute = self.environments[n].aexecute(actions=action)
+                    pending[asyncio.ensure_future(execute)] = n
+
+                    # Update episode statistics
+                    self.episode_timestep[n] += 1
+
+                    # Maximum number of timesteps or timestep callback (after counter increment!)
+                    self.timesteps += 1
+                    if ((
+                        self.episode_timestep[n] % self.callback_timestep_frequency == 0 and
+                        not self.callback(self, n)
+                    ) or self.timesteps >= self.num_timesteps):
+                        self.terminate = 2
+
+    def wait_environments(self, parallel):
+        if self.is_environment_remote:
+            # Event-driven: block until one of the remote environments has a result available
+            RemoteEnvironment.wait(environments=[self.environments[n] for n in parallel])
+        else:
+            time.sleep(self.num_sleep_secs)
 
-            # Parallel environments loop
-            no_environment_ready = True
-            for n in range(len(self.environments)):
+    def run_vectorized(self):
+        environment = self.environments[0]
+        num_parallel = environment.num_environments()
+        parallel = list(range(num_parallel))
 
-                if self.prev_terminals[n] > 0:
-                    # Continue if episode terminated (either sync_episodes or finished)
-                    self.terminals[n] = self.prev_terminals[n]
-                    continue
+        # Episode statistics
+        self.episode_reward = np.zeros(shape=(num_parallel,))
+        self.episode_timestep = np.zeros(shape=(num_parallel,), dtype=util.np_dtype(dtype='int'))
+        self.episode_agent_second = np.zeros(shape=(num_parallel,))
+        self.episode_start = np.full(shape=(num_parallel,), fill_value=time.time())
 
-                elif self.batch_agent_calls:
-                    # Handled before parallel environments loop
-                    pass
+        # Values
+        self.terminate = 0
+        is_running = np.ones(shape=(num_parallel,), dtype=util.np_dtype(dtype='bool'))
 
-                elif self.sync_timesteps:
-                    # Wait until environment is ready
-                    while True:
-                        observation = self.environments[n].receive_execute()
-                        if observation is not None:
-                            break
+        # Required if agent was previously stopped mid-episode
+        self.agent.reset()
 
-                else:
-                    # Check whether environment is ready, otherwise continue
-                    observation = self.environments[n].receive_execute()
-                    if observation is None:
-                        self.terminals[n] = self.prev_terminals[n]
-                        continue
+        # Reset environments
+        states = environment.reset_batch()
 
-                no_environment_ready = False
-                if not self.batch_agent_calls:
-                    self.states[n], self.terminals[n], self.rewards[n] = observation
+        # Runner loop
+        while is_running.any():
 
-                # Check whether evaluation environment
-                if self.evaluation_run and n == (len(self.environments) - 1):
-                    if self.terminals[n] == -1:
-                        # Initial act
-                        self.handle_act_evaluation()
-                    else:
-                        # Observe
-                        self.handle_observe_evaluation()
-                        if self.terminals[n] == 0:
-                            # Act
-                            self.handle_act_evaluation()
-                        else:
-                            # Terminal
-                            self.handle_terminal_evaluation()
+            # Act and execute (only environments still running once terminated)
+            agent_start = time.time()
+            if is_running.all():
+                index = parallel
+                actions = self.agent.act(states=states, parallel=index)
+                self.episode_agent_second[index] += (time.time() - agent_start) / len(index)
+                states, terminals, rewards = environment.execute_batch(actions=actions)
+            else:
+                index = np.flatnonzero(is_running).tolist()
+                actions = self.agent.act(
+                    states=VectorEnvironment.index_values(values=states, index=index),
+                    parallel=index
+                )
+                self.episode_agent_second[index] += (time.time() - agent_start) / len(index)
+                next_states, next_terminals, next_rewards = environment.execute_batch(
+                    actions=actions, index=index
+                )
+                states = VectorEnvironment.update_values(
+                    values=states, index=index, updates=next_states
+                )
+                terminals = np.zeros(shape=(num_parallel,), dtype=util.np_dtype(dtype='int'))
+                terminals[index] = next_terminals
+                rewards = np.zeros(shape=(num_parallel,), dtype=util.np_dtype(dtype='float'))
+                rewards[index] = next_rewards
+
+            # Update episode statistics
+            self.episode_timestep[index] += 1
+            self.episode_reward[index] += rewards[index]
+
+            # Maximum number of timesteps or timestep callback (after counter increment!)
+            self.timesteps += len(index)
+            if self.callback_timestep_frequency != float('inf'):
+                for n in index:
+                    if self.episode_timestep[n] % self.callback_timestep_frequency == 0 and \
+                            not self.callback(self, n):
+                        self.terminate = 2
+            if self.timesteps >= self.num_timesteps:
+                self.terminate = 2
 
-                else:
-                    if self.terminals[n] == -1:
-                        # Initial act
-                        self.handle_act(parallel=n)
-                    else:
-                        # Observe
-                        self.handle_observe(parallel=n)
-                        if self.terminals[n] == 0:
-                            # Act
-                            self.handle_act(parallel=n)
-                        else:
-                            # Terminal
-                            self.handle_terminal(parallel=n)
+            # Not terminal but finished
+            terminals = terminals[index]
+            if self.terminate == 2:
+                terminals = np.where(terminals == 0, 2, terminals)
 
-            self.prev_terminals = list(self.terminals)
+            # Observe
+            agent_start = time.time()
+            updated = self.agent.observe(terminal=terminals, reward=rewards[index], parallel=index)
+            self.episode_agent_second[index] += (time.time() - agent_start) / len(index)
+            self.updates += updated
 
-            # Sync_episodes: Reset if all episodes terminated
-            if self.sync_episodes and all(terminal > 0 for terminal in self.terminals):
-                num_episodes_left = self.num_episodes - self.episodes
-                num_noneval_environments = len(self.environments) - int(self.evaluation_run)
-                for n in range(min(num_noneval_environments, num_episodes_left)):
-                    self.prev_terminals[n] = -1
-                    self.environments[n].start_reset()
-                if self.evaluation_run and num_episodes_left > 0:
-                    self.prev_terminals[-1] = -1
-                    self.environments[-1].start_reset()
+            # Maximum number of updates (after counter increment!)
+            if self.updates >= self.num_updates:
+                self.terminate = 2
 
-            # Sleep if no environment was ready
-            if no_environment_ready:
-                time.sleep(self.num_sleep_secs)
+            # Terminal (environments are automatically reset)
+            terminated = [n for n, terminal in zip(index, terminals.tolist()) if terminal > 0]
+            for n in terminated:
+                self.handle_terminal(parallel=n)
+            if self.terminate > 0:
+                is_running[terminated] = False
 
     def handle_act(self, parallel):
         if self.batch_agent_calls:
@@ -742,8 +1057,8 @@ class Runner(object):
         self.episode_agent_second[parallel] = 0.0
         self.episode_start[parallel] = time.time()
 
-        # Reset environment
-        if self.terminate == 0 and not self.sync_episodes:
+        # Reset environment (unless handled by run_vectorized()/arun())
+        if self.terminate == 0 and not self.sync_episodes and self.is_reset_on_terminal:
             self.terminals[parallel] = -1
             self.environments[parallel].start_reset()
 
@@ -15,6 +15,7 @@
 
 from datetime import datetime
 import logging
+import threading
 
 import numpy as np
 import tensorflow as tf
@@ -59,6 +60,35 @@ class NullContext(object):
         raise NotImplementedError
 
 
+class ThreadLocalStack(threading.local):
+    """
+    List-like stack which is separate per thread, so functions can be called concurrently from
+    multiple threads, like the acting thread and an asynchronous learner thread.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.items = list()
+
+    def append(self, item):
+        self.items.append(item)
+
+    def pop(self):
+        return self.items.pop()
+
+    def clear(self):
+        self.items.clear()
+
+    def __getitem__(self, index):
+        return self.items[index]
+
+    def __setitem__(self, index, item):
+        self.items[index] = item
+
+    def __len__(self):
+        return len(self.items)
+
+
 def debug(message):
     logging.warning('{}: {}'.format(datetime.now().strftime('%H:%M:%S-%f')[:-3], message))
 
@@ -20,7 +20,8 @@ import unittest
 
 import numpy as np
 
-from tensorforce import Agent, Environment, Runner
+from tensorforce import Agent, Environment, Runner, TensorforceError
+from tensorforce.agents.traces import TraceDataset
 from test.unittest_base import UnittestBase
 
 
@@ -41,3 +42,148 @@ class TestFeatures(UnittestBase, unittest.TestCase):
         )
         action = agent.act(states=states)
         assert action != 1
+
+    def test_async_update(self):
+        self.start_tests(name='async-update')
+
+        config = dict(
+            eager_mode=True, create_debug_assertions=True, tf_log_level=20, async_update=2
+        )
+        self.unittest(config=config)
+
+        agent, environment = self.prepare(config=config)
+        states = environment.reset()
+        for _ in range(20):
+            actions = agent.act(states=states)
+            states, terminal, reward = environment.execute(actions=actions)
+            agent.observe(terminal=terminal, reward=reward)
+            if terminal:
+                states = environment.reset()
+        agent.update()
+        self.assertGreater(agent.updates, 1)
+        model = agent.model
+        self.assertEqual(len(model.acting_policy.variables), len(model.policy.variables))
+        for source, target in zip(model.policy.variables, model.acting_policy.variables):
+            self.assertTrue(np.allclose(source.numpy(), target.numpy()))
+        agent.close()
+        environment.close()
+        self.finished_test()
+
+        # Memory enqueue, priority updates and periodic saving while updates are in progress
+        with TemporaryDirectory() as directory:
+            saver = dict(directory=directory, frequency=1, unit='timesteps', memory='incremental')
+            self.unittest(
+                num_episodes=5, memory=dict(type='prioritized_replay'),
+                update=dict(unit='timesteps', batch_size=4), saver=saver, config=config
+            )
+
+    def test_jit_compile(self):
+        self.start_tests(name='jit-compile')
+
+        config = dict(eager_mode=True, create_debug_assertions=True, jit_compile=True)
+        self.unittest(config=config)
+
+        config = dict(eager_mode=True, create_debug_assertions=True, jit_compile=['act', 'update'])
+        self.unittest(config=config)
+
+    def test_mixed_precision(self):
+        self.start_tests(name='mixed-precision')
+
+        config = dict(eager_mode=True, create_debug_assertions=True, mixed_precision='bfloat16')
+        self.unittest(config=config)
+
+        config = dict(eager_mode=True, create_debug_assertions=True, mixed_precision='float16')
+        self.unittest(config=config)
+
+    def test_make_act_fn(self):
+        self.start_tests(name='make-act-fn')
+
+        agent, environment = self.prepare(
+            policy=dict(network=dict(type='auto', size=8, depth=1, rnn=False)),
+            baseline=dict(network=dict(type='auto', size=7, depth=1, rnn=False)),
+            parallel_interactions=2
+        )
+
+        # Independent deterministic act matches act()
+        act_fn = agent.make_act_fn(independent=True, deterministic=True)
+        states = [environment.reset(), environment.reset()]
+        batch = {name: np.stack([x[name] for x in states], axis=0) for name in states[0]}
+        actions = act_fn(batch)
+        for n, x in enumerate(states):
+            expected = agent.act(states=x, independent=True, deterministic=True)
+            for name in expected:
+                self.assertTrue(np.allclose(actions[name][n], expected[name]))
+        unmasked = {name: x for name, x in batch.items() if not name.endswith('_mask')}
+        self.assertEqual(act_fn(unmasked)['int_action'].shape, (2, 2))
+        act_fn = agent.make_act_fn(batched=False, independent=True, deterministic=True)
+        actions = act_fn(states[0])
+        self.assertEqual(actions['int_action'].shape, (2,))
+        self.finished_test()
+
+        # Act-observe interaction with parallel indices
+        act_fn = agent.make_act_fn()
+        for _ in range(3):
+            actions = act_fn(batch, parallel=np.asarray([1, 0]))
+            self.assertEqual(actions['gaussian_action1'].shape, (2, 1, 2))
+            agent.observe(terminal=[False, False], reward=[0.0, 0.0], parallel=[1, 0])
+        with self.assertRaises(TensorforceError):
+            agent.make_act_fn(deterministic=True)
+        act_fn(batch)
+        with self.assertRaises(TensorforceError):
+            act_fn(batch)
+        self.finished_test()
+
+        agent.close()
+        environment.close()
+
+    def test_recording(self):
+        self.start_tests(name='recording')
+
+        with TemporaryDirectory() as directory:
+            # npz traces, at most two kept
+            recorder = {'directory': os.path.join(directory, 'npz'), 'max-traces': 2}
+            runner = Runner(
+                agent=self.agent_spec(recorder=recorder), environment=self.environment_spec()
+            )
+            runner.run(num_episodes=4, use_tqdm=False)
+            runner.close()
+            self.assertEqual(
+                sorted(os.listdir(recorder['directory'])),
+                ['trace-000000002.npz', 'trace-000000003.npz']
+            )
+            self.finished_test()
+
+            # hdf5 traces appended to one file, subsequently used for pretraining
+            recorder = dict(directory=os.path.join(directory, 'hdf5'), format='hdf5', frequency=2)
+            runner = Runner(
+                agent=self.agent_spec(recorder=recorder), environment=self.environment_spec()
+            )
+            runner.run(num_episodes=4, use_tqdm=False)
+            runner.close()
+            self.assertEqual(os.listdir(recorder['directory']), ['traces.h5'])
+            self.finished_test()
+
+            environment = Environment.create(environment=self.environment_spec())
+            agent = Agent.create(agent=self.agent_spec(
+                policy=dict(network=dict(type='auto', size=8, depth=1, rnn=False)),
+                baseline=dict(network=dict(type='auto', size=7, depth=1, rnn=False))
+            ), environment=environment)
+            agent.pretrain(directory=recorder['directory'], num_iterations=2, num_traces=2)
+            agent.pretrain(
+                directory=os.path.join(directory, 'npz'), num_iterations=3, num_episodes=1
+            )
+            agent.close()
+            environment.close()
+            self.finished_test()
+
+            # Memory-mapped dataset index, reused until traces change
+            dataset = TraceDataset(directory=recorder['directory'])
+            self.assertEqual((dataset.num_traces, dataset.num_episodes), (2, 4))
+            batches = list(dataset.batches(num_batches=3, num_episodes=3))
+            self.assertEqual(len(batches), 3)
+            self.assertTrue(all(
+                np.count_nonzero(batch['terminal']) == 3 and batch['terminal'][-1] > 0
+                for batch in batches
+            ))
+            self.finished_test()
+
@@ -13,6 +13,7 @@
 # limitations under the License.
 # ==============================================================================
 
+from tempfile import TemporaryDirectory
 import unittest
 
 from test.unittest_base import UnittestBase
@@ -20,6 +21,21 @@ from test.unittest_base import UnittestBase
 
 class TestMemories(UnittestBase, unittest.TestCase):
 
+    def test_prioritized_replay(self):
+        self.start_tests(name='prioritized-replay')
+
+        memory = dict(type='prioritized_replay')
+        update = dict(unit='timesteps', batch_size=4)
+        self.unittest(update=update, memory=memory)
+
+        memory = dict(
+            type='prioritized_replay', capacity=100, alpha=0.5, beta=dict(
+                type='linear', unit='updates', num_steps=10, initial_value=0.4, final_value=1.0
+            )
+        )
+        update = dict(unit='timesteps', batch_size=4)
+        self.unittest(update=update, memory=memory)
+
     def test_recent(self):
         self.start_tests(name='recent')
 
@@ -45,3 +61,57 @@ class TestMemories(UnittestBase, unittest.TestCase):
         memory = 100
         update = 4
         self.unittest(update=update, memory=memory)
+
+        memory = dict(type='replay', storage='compact')
+        update = dict(unit='episodes', batch_size=1)
+        self.unittest(update=update, memory=memory)
+
+        memory = dict(type='replay', storage=dict(
+            states='compact', actions='compact', reward='float16'
+        ))
+        update = dict(unit='timesteps', batch_size=4)
+        self.unittest(update=update, memory=memory)
+
+        states = dict(type='float', shape=(8,), min_value=1.0, max_value=2.0)
+        memory = dict(type='replay', storage='compact', frame_stack=dict(states=4))
+        update = dict(unit='episodes', batch_size=1)
+        self.unittest(states=states, update=update, memory=memory)
+
+        memory = dict(type='replay', sampling='episodes')
+        update = dict(unit='timesteps', batch_size=4)
+        self.unittest(update=update, memory=memory)
+
+        memory = dict(type='replay', capacity=100, sampling='episodes', retention='reservoir')
+        update = dict(unit='timesteps', batch_size=4)
+        self.unittest(update=update, memory=memory, parallel_interactions=2)
+
+    def test_sharded_replay(self):
+        self.start_tests(name='sharded-replay')
+
+        memory = dict(type='sharded_replay')
+        update = dict(unit='timesteps', batch_size=4)
+        self.unittest(update=update, memory=memory, parallel_interactions=2)
+
+        memory = dict(
+            type='sharded_replay', capacity=100, num_shards=2, devices=['CPU:0', 'CPU:0'],
+            storage='compact'
+        )
+        update = dict(unit='episodes', batch_size=1)
+        self.unittest(update=update, memory=memory)
+
+    def test_tiered_replay(self):
+        self.start_tests(name='tiered-replay')
+
+        with TemporaryDirectory() as directory:
+            memory = dict(type='tiered_replay', capacity=100, hot_capacity=10, directory=directory)
+            update = dict(unit='timesteps', batch_size=4)
+            self.unittest(update=update, memory=memory)
+
+        with TemporaryDirectory() as directory:
+            memory = dict(
+                type='tiered_replay', directory=directory, storage='compact',
+                frame_stack=dict(states=2)
+            )
+            states = dict(type='float', shape=(4,), min_value=1.0, max_value=2.0)
+            update = dict(unit='episodes', batch_size=1)
+            self.unittest(states=states, update=update, memory=memory)
@@ -37,6 +37,26 @@ class TestOptimizers(UnittestBase, unittest.TestCase):
 
         self.unittest(optimizer=dict(optimizer='adam', subsampling_fraction=2))
 
+        # Delta-free step, since no debug assertions
+        self.unittest(
+            optimizer=dict(optimizer='adam', multi_step=3, subsampling_fraction=0.5),
+            config=dict(eager_mode=True, create_debug_assertions=False, tf_log_level=20)
+        )
+
+    def test_minibatch_step(self):
+        self.start_tests(name='minibatch-step')
+
+        self.unittest(optimizer=dict(
+            type='minibatch_step', optimizer=dict(type='adam', learning_rate=1e-3),
+            minibatch_size=0.5, num_epochs=2
+        ))
+
+        # Recurrent policy with state horizons
+        self.unittest(
+            policy=dict(network=dict(type='auto', size=8, depth=1, rnn=2)),
+            optimizer=dict(optimizer='adam', minibatch_size=2, num_epochs=3)
+        )
+
     def test_natural_gradient(self):
         self.start_tests(name='natural-gradient')
 
@@ -53,6 +73,12 @@ class TestOptimizers(UnittestBase, unittest.TestCase):
         )
         self.unittest(optimizer=optimizer)
 
+        # Delta-free step, since no debug assertions
+        self.unittest(
+            optimizer=optimizer,
+            config=dict(eager_mode=True, create_debug_assertions=False, tf_log_level=20)
+        )
+
     def test_synchronization(self):
         self.start_tests(name='synchronization')
 
@@ -88,6 +114,12 @@ class TestOptimizers(UnittestBase, unittest.TestCase):
 
         self.unittest(optimizer=dict(type='adam', learning_rate=1e-3, gradient_norm_clipping=1.0))
 
+        # Delta-free step, since no debug assertions
+        self.unittest(
+            optimizer=dict(type='adam', learning_rate=1e-3),
+            config=dict(eager_mode=True, create_debug_assertions=False, tf_log_level=20)
+        )
+
         try:
             import tensorflow_addons as tfa
 
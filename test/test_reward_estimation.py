@@ -204,6 +204,27 @@ class TestRewardEstimation(UnittestBase, unittest.TestCase):
             baseline_optimizer=baseline_optimizer, baseline_objective=baseline_objective
         )
 
+        # Bootstrap horizon precomputed on enqueue (requires non-recurrent baseline)
+        actions = dict(
+            bool_action=dict(type='bool', shape=(1,)),
+            int_action=dict(type='int', shape=(2,), num_values=4)
+        )
+        policy = dict(network=dict(type='auto', size=8, depth=1, rnn=False))
+        reward_estimation = dict(
+            horizon=3, predict_horizon_values='late', predict_action_values=True,
+            predict_terminal_values=True, return_processing='batch_normalization'
+        )
+        baseline_optimizer = dict(optimizer='adam', learning_rate=1e-3)
+        baseline_objective = 'action_value'
+        self.unittest(
+            actions=actions, policy=policy, reward_estimation=reward_estimation,
+            baseline_optimizer=baseline_optimizer, baseline_objective=baseline_objective,
+            config=dict(
+                precompute_bootstrap=True, eager_mode=True, create_debug_assertions=True,
+                tf_log_level=20
+            )
+        )
+
     def test_advantage_estimate(self):
         self.start_tests(name='advantage estimate')
 
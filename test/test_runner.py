@@ -13,9 +13,11 @@
 # limitations under the License.
 # ==============================================================================
 
+import asyncio
+from threading import Thread
 import unittest
 
-from tensorforce import Runner
+from tensorforce import Environment, Runner
 from test.unittest_base import UnittestBase
 
 
@@ -208,3 +210,124 @@ class TestRunner(UnittestBase, unittest.TestCase):
         )
         runner.close()
         self.finished_test(assertion=(self.num_evaluations >= 2))
+
+    def test_shared_memory(self):
+        self.start_tests(name='shared-memory')
+
+        agent = self.agent_spec()
+        environment = self.environment_spec()
+
+        # unbatched
+        runner = Runner(
+            agent=agent, environment=environment, num_parallel=2, remote='shared-memory'
+        )
+        runner.run(num_episodes=3, use_tqdm=False)
+        runner.close()
+        self.finished_test()
+
+        # batched
+        runner = Runner(
+            agent=agent, environment=environment, num_parallel=2, remote='shared-memory',
+            blocking=True
+        )
+        runner.run(num_episodes=3, use_tqdm=False, batch_agent_calls=True)
+        runner.close()
+        self.finished_test()
+
+    def test_vectorized(self):
+        self.start_tests(name='vectorized')
+
+        from tensorforce.environments import VectorEnvironment
+
+        agent = self.agent_spec()
+        environment = self.environment_spec()
+        max_episode_timesteps = environment.pop('max_episode_timesteps')
+        environment = dict(
+            environment=VectorEnvironment, environments=environment, num_environments=3
+        )
+
+        # default
+        runner = Runner(
+            agent=agent, environment=environment, max_episode_timesteps=max_episode_timesteps
+        )
+        runner.run(num_episodes=5, use_tqdm=False)
+        self.finished_test(assertion=(runner.episodes >= 5))
+
+        # timestep callback
+        callback_timestep_frequency = 3
+
+        def callback(r, p):
+            self.assertEqual(r.episode_timestep[p] % callback_timestep_frequency, 0)
+
+        runner.run(
+            num_episodes=2, callback=callback,
+            callback_timestep_frequency=callback_timestep_frequency, use_tqdm=False
+        )
+        self.finished_test()
+
+        # number of timesteps
+        runner.run(num_timesteps=20, use_tqdm=False)
+        runner.close()
+        self.finished_test(assertion=(runner.timesteps >= 20))
+
+    def test_async(self):
+        self.start_tests(name='async')
+
+        agent = self.agent_spec()
+        environment = self.environment_spec()
+
+        def server(port):
+            Environment.create(environment=environment, remote='socket-server', port=port)
+
+        servers = [Thread(target=server, kwargs=dict(port=port)) for port in (65442, 65443)]
+        for thread in servers:
+            thread.start()
+
+        runner = Runner(
+            agent=agent, num_parallel=2, remote='async-socket-client', host='127.0.0.1',
+            port=65442
+        )
+        asyncio.run(runner.arun(num_episodes=3, use_tqdm=False))
+        self.finished_test(assertion=(runner.episodes >= 3))
+
+        # synchronous run on same environments
+        runner.run(num_episodes=2, use_tqdm=False)
+
+        # synchronous environment interface besides coroutines
+        environment = runner.environments[0]
+        states = environment.reset()
+        actions, _ = runner.agent.act(
+            states=states, internals=runner.agent.initial_internals(), independent=True
+        )
+        _, terminal, _ = environment.execute(actions=actions)
+        self.finished_test(assertion=(terminal in (0, 1, 2)))
+        runner.close()
+        for thread in servers:
+            thread.join()
+        self.finished_test()
+
+    def test_multiplexed(self):
+        self.start_tests(name='multiplexed')
+
+        agent = self.agent_spec()
+        environment = self.environment_spec()
+
+        def server():
+            Environment.create(
+                environment=environment, remote='socket-server', port=65444, num_instances=3
+            )
+
+        thread = Thread(target=server)
+        thread.start()
+
+        runner = Runner(
+            agent=agent, num_parallel=3, remote='socket-client', host=['127.0.0.1'] * 3,
+            port=65444
+        )
+        runner.run(num_episodes=3, batch_agent_calls=True, use_tqdm=False)
+        self.finished_test(assertion=(runner.episodes >= 3))
+
+        runner.run(num_episodes=3, use_tqdm=False)
+        runner.close()
+        thread.join()
+        self.finished_test()
@@ -295,6 +295,121 @@ class TestSaving(UnittestBase, unittest.TestCase):
 
         self.finished_test()
 
+    def test_memory_log(self):
+        self.start_tests(name='memory-log')
+
+        with TemporaryDirectory() as directory:
+            saver = dict(directory=directory, frequency=100, memory='incremental')
+            agent, environment = self.prepare(memory=50, saver=saver)
+            memory = agent.model.memory
+
+            for n in range(3):
+                states = environment.reset()
+                terminal = False
+                while not terminal:
+                    actions = agent.act(states=states)
+                    states, terminal, reward = environment.execute(actions=actions)
+                    agent.observe(terminal=terminal, reward=reward)
+                agent.save(directory=directory, format='numpy')
+
+            # memory excluded from saved variables, instead one log segment per save (including
+            # initial saver checkpoint)
+            variables = np.load(file=os.path.join(directory, 'agent.npz'))
+            self.assertFalse(any(name.startswith('memory/') for name in variables.files))
+            files = set(os.listdir(path=os.path.join(directory, 'agent.memory-log')))
+            self.assertTrue(files == {
+                'segment-00000000.npz', 'segment-00000001.npz', 'segment-00000002.npz',
+                'segment-00000003.npz'
+            })
+            buffers = {name: buffer.numpy() for name, buffer in memory.buffers.items()}
+            buffer_index = memory.buffer_index.numpy()
+            agent.close()
+            self.finished_test()
+
+            # restore replays memory log
+            agent, _ = self.prepare(memory=50, saver=saver)
+            agent.restore(directory=directory, filename='agent', format='numpy')
+            memory = agent.model.memory
+            self.assertEqual(memory.buffer_index.numpy(), buffer_index)
+            for name, buffer in memory.buffers.items():
+                self.assertTrue(np.array_equal(buffer.numpy(), buffers[name]))
+            agent.close()
+            environment.close()
+
+        self.finished_test()
+
+        with TemporaryDirectory() as directory:
+            # abort rewrites bootstrap horizons of slots logged before previous save
+            saver = dict(directory=directory, frequency=100, memory='incremental')
+            baseline = dict(network=dict(type='auto', size=7, depth=1, rnn=False))
+            config = dict(
+                precompute_bootstrap=True, eager_mode=True, create_debug_assertions=True,
+                tf_log_level=20
+            )
+            agent, environment = self.prepare(
+                memory=50, saver=saver, baseline=baseline, config=config
+            )
+            memory = agent.model.memory
+            self.assertIn('bootstrap_horizon', memory.buffers)
+
+            states = environment.reset()
+            for _ in range(9):
+                agent.act(states=states)
+                agent.observe(terminal=False, reward=1.0)
+            agent.save(directory=directory, format='numpy')
+            bootstrap_horizon = memory.buffers['bootstrap_horizon'].numpy()
+            agent.reset()
+            self.assertFalse(np.array_equal(
+                memory.buffers['bootstrap_horizon'].numpy(), bootstrap_horizon
+            ))
+            agent.save(directory=directory, format='numpy')
+            buffers = {name: buffer.numpy() for name, buffer in memory.buffers.items()}
+            agent.close()
+
+            agent, _ = self.prepare(memory=50, saver=saver, baseline=baseline, config=config)
+            agent.restore(directory=directory, filename='agent', format='numpy')
+            memory = agent.model.memory
+            for name, buffer in memory.buffers.items():
+                self.assertTrue(np.array_equal(buffer.numpy(), buffers[name]))
+            agent.close()
+            environment.close()
+
+        self.finished_test()
+
+        with TemporaryDirectory() as directory:
+            # priority updates rewrite slots logged before previous save, only tree leaves logged
+            saver = dict(directory=directory, frequency=100, memory='incremental')
+            memory = dict(type='prioritized_replay', capacity=50)
+            update = dict(unit='timesteps', batch_size=4)
+            agent, environment = self.prepare(memory=memory, update=update, saver=saver)
+
+            for n in range(3):
+                states = environment.reset()
+                terminal = False
+                while not terminal:
+                    actions = agent.act(states=states)
+                    states, terminal, reward = environment.execute(actions=actions)
+                    agent.observe(terminal=terminal, reward=reward)
+                agent.save(directory=directory, format='numpy')
+
+            segment = np.load(file=os.path.join(
+                directory, 'agent.memory-log', 'segment-00000003.npz'
+            ))
+            self.assertFalse(segment['snapshot'])
+            self.assertNotIn('sum-tree', segment.files)
+            sum_tree = agent.model.memory.sum_tree.numpy()
+            min_tree = agent.model.memory.min_tree.numpy()
+            agent.close()
+
+            agent, _ = self.prepare(memory=memory, update=update, saver=saver)
+            agent.restore(directory=directory, filename='agent', format='numpy')
+            self.assertTrue(np.allclose(agent.model.memory.sum_tree.numpy(), sum_tree))
+            self.assertTrue(np.allclose(agent.model.memory.min_tree.numpy(), min_tree))
+            agent.close()
+            environment.close()
+
+        self.finished_test()
+
     def test_config(self):
         # FEATURES.MD
         self.start_tests(name='config')